@@ -0,0 +1,99 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .models import Attendance, AttendanceMonthly
+
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def _monthly_totals(attendance):
+    """Groups an Attendance queryset into (user, year, month) rollup values."""
+    return attendance.annotate(
+        year=ExtractYear('date'), month=ExtractMonth('date'),
+    ).values('user_id', 'year', 'month').annotate(
+        present_days=Count('id', filter=Q(total_hours__gt=0)),  # Present if hours worked
+        absent_days=Count('id', filter=Q(total_hours=0)),  # Absent if no hours
+        hours=Sum('total_hours'),
+    ).order_by()
+
+
+def _rollup_from_row(row):
+    return AttendanceMonthly(
+        user_id=row['user_id'], year=row['year'], month=row['month'],
+        present=row['present_days'], absent=row['absent_days'], total_hours=row['hours'] or 0,
+    )
+
+
+def record_attendance_change(user_id, date, old_hours, new_hours):
+    """
+    Applies one Attendance change to the user's rollup for that month.
+    ``old_hours`` is None when the attendance row was just created.
+    """
+    new_hours = Decimal(str(new_hours))
+    old_present = old_hours is not None and old_hours > 0
+    old_absent = old_hours is not None and old_hours == 0
+    present = int(new_hours > 0) - int(old_present)
+    absent = int(new_hours == 0) - int(old_absent)
+    hours = new_hours - Decimal(str(old_hours or 0))
+    if not (present or absent or hours):
+        return
+
+    def apply():
+        return AttendanceMonthly.objects.filter(user_id=user_id, year=date.year, month=date.month).update(
+            present=F('present') + present, absent=F('absent') + absent, total_hours=F('total_hours') + hours,
+        )
+
+    if apply():
+        return
+    # First punch of the month: build the row from the table, which already
+    # includes this change.
+    month = Attendance.objects.filter(user_id=user_id, date__year=date.year, date__month=date.month)
+    try:
+        with transaction.atomic():
+            for row in _monthly_totals(month):
+                _rollup_from_row(row).save(force_insert=True)
+    except IntegrityError:
+        apply()  # created concurrently
+
+
+def rebuild_attendance_rollups(user_ids=None, year=None):
+    """Recomputes the rollups from Attendance; returns the number of rows written."""
+    attendance = Attendance.objects.all()
+    rollups = AttendanceMonthly.objects.all()
+    if user_ids is not None:
+        attendance = attendance.filter(user_id__in=user_ids)
+        rollups = rollups.filter(user_id__in=user_ids)
+    if year is not None:
+        attendance = attendance.filter(date__year=year)
+        rollups = rollups.filter(year=year)
+
+    rows = [_rollup_from_row(row) for row in _monthly_totals(attendance)]
+    with transaction.atomic():
+        rollups.delete()
+        AttendanceMonthly.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def monthly_summary(rollups):
+    """
+    Sums rollup rows per month and returns all twelve months, e.g.
+    [{'month': 'Jan', 'present': 20, 'absent': 2, 'total_hours': 160.5}, ...].
+    """
+    totals = {
+        row['month']: row for row in rollups.values('month').annotate(
+            present_days=Sum('present'), absent_days=Sum('absent'), hours=Sum('total_hours'),
+        ).order_by()
+    }
+    summary = []
+    for number, name in enumerate(MONTH_NAMES, 1):
+        row = totals.get(number, {})
+        summary.append({
+            'month': name,
+            'present': row.get('present_days') or 0,
+            'absent': row.get('absent_days') or 0,
+            'total_hours': float(row.get('hours') or 0),
+        })
+    return summary
@@ -0,0 +1,51 @@
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+# Token authentication cache settings
+TOKEN_CACHE_TIMEOUT = 5 * 60  # seconds a resolved token stays cached
+
+
+def token_cache_key(key):
+    return 'auth_token:%s' % key
+
+
+def revoke_token(key):
+    cache.delete(token_cache_key(key))
+
+
+def revoke_user_tokens(user_id):
+    """Drops every cached token of the user so the next request re-reads it."""
+    for key in Token.objects.filter(user_id=user_id).values_list('key', flat=True):
+        revoke_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that keeps the resolved token, together with the
+    user's profile, role, department and branch, in the cache for
+    TOKEN_CACHE_TIMEOUT seconds instead of querying them on every request.
+
+    Cached entries are revoked on logout, password change and whenever the
+    user or profile is saved (see core.signals).
+    """
+
+    def authenticate_credentials(self, key):
+        token = cache.get(token_cache_key(key))
+        if token is None:
+            try:
+                token = Token.objects.select_related(
+                    'user__profile__role',
+                    'user__profile__department',
+                    'user__profile__branch',
+                ).get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            cache.set(token_cache_key(key), token, TOKEN_CACHE_TIMEOUT)
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (token.user, token)
@@ -0,0 +1,38 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from .master_cache import cached_list_data, get_last_modified, get_versions
+
+
+def list_etag(request, models):
+    raw = '%s?%s|%s' % (request.path, request.META.get('QUERY_STRING', ''), get_versions(models))
+    return quote_etag(hashlib.md5(raw.encode()).hexdigest())
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    # Let clients keep the body but always revalidate it
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def conditional_list_response(request, models, build):
+    """
+    Serves a master/reference list with ETag and Last-Modified taken from
+    the tables' version counters. A matching If-None-Match (or
+    If-Modified-Since) gets a 304 straight from the cache, without touching
+    the database or the serializers.
+    """
+    etag = list_etag(request, models)
+    last_modified = get_last_modified(models)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return _set_validators(not_modified, etag, last_modified)
+
+    data = cached_list_data(request, models, build)
+    return _set_validators(Response(data, status=status.HTTP_200_OK), etag, last_modified)
@@ -0,0 +1,229 @@
+import difflib
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from .export import iter_rows
+from .models import Customer
+
+logger = logging.getLogger(__name__)
+
+# Pairs scoring at least this much are reported as duplicates
+DEDUP_THRESHOLD = getattr(settings, 'CUSTOMER_DEDUP_THRESHOLD', 0.6)
+# Blocks with more customers than this are too big to compare pairwise.
+# Name n-gram blocks that size (common fragments) are skipped; exact-key
+# blocks (a common full name, a placeholder phone number) only compare
+# each customer with its NEIGHBOURHOOD_WINDOW neighbours in sorted order,
+# which still links every exact duplicate into one group.
+MAX_BLOCK_SIZE = getattr(settings, 'CUSTOMER_DEDUP_MAX_BLOCK_SIZE', 50)
+NEIGHBOURHOOD_WINDOW = 5
+NAME_GRAM_SIZE = 4
+# Cached result set; served while a refresh runs once it is older than this
+DUPLICATES_MAX_AGE = getattr(settings, 'CUSTOMER_DUPLICATES_MAX_AGE', 15 * 60)
+DUPLICATES_CACHE_KEY = 'customer_duplicates'
+# Groups in the unpaginated response; page through the rest with ?page=
+DUPLICATES_LIST_LIMIT = getattr(settings, 'CUSTOMER_DUPLICATES_LIST_LIMIT', 100)
+_REFRESH_LOCK_KEY = 'customer_duplicates:refreshing'
+_REFRESH_LOCK_TIMEOUT = 60 * 60
+
+# Evidence weights, combined as 1 - prod(1 - weight * similarity): an exact
+# name match alone reaches the default threshold, a shared phone number
+# alone does not.
+WEIGHTS = {'name': 0.6, 'email': 0.6, 'phone': 0.5, 'gst': 0.8}
+MIN_NAME_SIMILARITY = 0.8
+
+
+def normalize(first_name, last_name, email, phone_number, gst_tax_id):
+    """
+    Matching keys of a customer: sorted lowercase name tokens, the email
+    local part without dots or +tags, the last ten phone digits and the
+    alphanumeric GST id.
+    """
+    name = ' '.join(sorted(re.findall(r'[a-z0-9]+', f'{first_name} {last_name}'.lower())))
+    local = (email or '').lower().split('@')[0].split('+')[0].replace('.', '')
+    phone = re.sub(r'\D', '', phone_number or '')[-10:]
+    gst = re.sub(r'[^A-Z0-9]', '', (gst_tax_id or '').upper())
+    return name, local, phone, gst
+
+
+def blocking_keys(record):
+    name, local, phone, gst = record
+    keys = set()
+    if name:
+        keys.add(f'x:{name}')
+    joined = name.replace(' ', '')
+    if len(joined) <= NAME_GRAM_SIZE:
+        if joined:
+            keys.add(f'n:{joined}')
+    else:
+        keys.update(f'n:{joined[i:i + NAME_GRAM_SIZE]}' for i in range(len(joined) - NAME_GRAM_SIZE + 1))
+    if len(local) >= 3:
+        keys.add(f'e:{local}')
+    if len(phone) >= 7:
+        keys.add(f'p:{phone}')
+    if len(gst) >= 5:
+        keys.add(f'g:{gst}')
+    return keys
+
+
+def score(a, b):
+    """Duplicate likelihood in [0, 1] of two normalized records."""
+    missing = 1.0
+    if a[0] and b[0]:
+        similarity = 1.0 if a[0] == b[0] else difflib.SequenceMatcher(None, a[0], b[0]).ratio()
+        if similarity >= MIN_NAME_SIMILARITY:
+            missing *= 1 - WEIGHTS['name'] * similarity
+    for index, field in ((1, 'email'), (2, 'phone'), (3, 'gst')):
+        if a[index] and a[index] == b[index]:
+            missing *= 1 - WEIGHTS[field]
+    return round(1 - missing, 3)
+
+
+def _candidate_pairs(records):
+    """
+    Pairs of ids sharing a blocking key. Name n-grams only count when the
+    two names share at least half of the shorter name's n-grams.
+    """
+    blocks = defaultdict(list)
+    gram_counts = {}
+    for pk, record in records.items():
+        keys = blocking_keys(record)
+        gram_counts[pk] = sum(1 for key in keys if key.startswith('n:'))
+        for key in keys:
+            blocks[key].append(pk)
+
+    exact = set()
+    shared_grams = Counter()
+    for key, ids in blocks.items():
+        if len(ids) < 2:
+            continue
+        gram = key.startswith('n:')
+        if len(ids) > MAX_BLOCK_SIZE:
+            if not gram:
+                # Sorted neighbourhood: records alike sit next to each other
+                ids.sort(key=lambda pk: (records[pk], pk))
+                for i, a in enumerate(ids):
+                    for b in ids[i + 1:i + 1 + NEIGHBOURHOOD_WINDOW]:
+                        exact.add((min(a, b), max(a, b)))
+            continue
+        ids.sort()
+        for i, a in enumerate(ids):
+            for b in ids[i + 1:]:
+                if gram:
+                    shared_grams[(a, b)] += 1
+                else:
+                    exact.add((a, b))
+
+    pairs = exact
+    for (a, b), shared in shared_grams.items():
+        if shared * 2 >= min(gram_counts[a], gram_counts[b]):
+            pairs.add((a, b))
+    return pairs
+
+
+def find_duplicate_groups(queryset=None, threshold=DEDUP_THRESHOLD):
+    """
+    Reads every customer once and returns the duplicate groups, largest
+    score first: [{'ids': [primary_id, duplicate_id, ...], 'score': 0.84}].
+    The primary is the customer edited earliest, as before.
+    """
+    queryset = Customer.objects.all() if queryset is None else queryset
+    records = {}
+    edited = {}
+    fields = ['id', 'first_name', 'last_name', 'email', 'phone_number', 'gst_tax_id', 'last_edit_date']
+    for pk, first_name, last_name, email, phone, gst, last_edit_date in iter_rows(queryset, fields):
+        records[pk] = normalize(first_name, last_name, email, phone, gst)
+        edited[pk] = last_edit_date
+
+    # Union-find over the pairs that score above the threshold
+    parent = {}
+    best = {}
+
+    def find(pk):
+        root = pk
+        while parent[root] != root:
+            root = parent[root]
+        while pk != root:
+            parent[pk], pk = root, parent[pk]
+        return root
+
+    for a, b in _candidate_pairs(records):
+        pair_score = score(records[a], records[b])
+        if pair_score < threshold:
+            continue
+        parent.setdefault(a, a)
+        parent.setdefault(b, b)
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+        root = find(a)
+        best[root] = max(best.pop(root_a, 0), best.pop(root_b, 0), pair_score)
+
+    members = defaultdict(list)
+    for pk in parent:
+        members[find(pk)].append(pk)
+
+    groups = []
+    for root, ids in members.items():
+        ids.sort(key=lambda pk: (edited[pk], pk))
+        groups.append({'ids': ids, 'score': best.get(root, threshold)})
+    groups.sort(key=lambda group: (-group['score'], group['ids'][0]))
+    return groups
+
+
+def refresh_duplicates():
+    """Recomputes the duplicate groups and stores them in the shared cache."""
+    result = {'groups': find_duplicate_groups(), 'built_at': time.time()}
+    cache.set(DUPLICATES_CACHE_KEY, result, None)
+    return result
+
+
+def discard_customers(ids):
+    """Drops merged or deleted customers from the cached result set."""
+    result = cache.get(DUPLICATES_CACHE_KEY)
+    if result is None:
+        return
+    ids = set(ids)
+    groups = []
+    for group in result['groups']:
+        remaining = [pk for pk in group['ids'] if pk not in ids]
+        if len(remaining) > 1:
+            groups.append({**group, 'ids': remaining})
+    cache.set(DUPLICATES_CACHE_KEY, {**result, 'groups': groups}, None)
+
+
+def _refresh_worker():
+    try:
+        refresh_duplicates()
+    except Exception:
+        logger.exception("Refreshing customer duplicates failed")
+    finally:
+        cache.delete(_REFRESH_LOCK_KEY)
+        connection.close()
+
+
+def refresh_duplicates_in_background():
+    """Starts a refresh thread unless one is already running in any process."""
+    if cache.add(_REFRESH_LOCK_KEY, 1, _REFRESH_LOCK_TIMEOUT):
+        threading.Thread(target=_refresh_worker, daemon=True).start()
+
+
+def get_duplicates():
+    """
+    Returns the cached result set, or None on a cold cache while a
+    background refresh builds it; requests never run the full pass. A
+    stale result is still returned while a refresh replaces it.
+    """
+    result = cache.get(DUPLICATES_CACHE_KEY)
+    if result is None:
+        refresh_duplicates_in_background()
+        return None
+    if time.time() - result['built_at'] > DUPLICATES_MAX_AGE:
+        refresh_duplicates_in_background()
+    return result
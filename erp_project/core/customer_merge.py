@@ -0,0 +1,76 @@
+from django.db import transaction
+from django.db.models import Case, Value, When
+
+from .customer_dedup import discard_customers
+from .models import Customer
+
+# Duplicates re-pointed per UPDATE statement (one CASE branch each)
+MERGE_CHUNK_SIZE = 1000
+
+
+def _duplicate_map(groups):
+    """{duplicate_id: primary_id} for [(primary_id, [duplicate_id, ...]), ...]."""
+    mapping = {}
+    primaries = set()
+    for primary_id, duplicate_ids in groups:
+        primaries.add(primary_id)
+        for duplicate_id in duplicate_ids:
+            if duplicate_id == primary_id:
+                raise ValueError(f'Customer {primary_id} cannot be merged into itself')
+            if duplicate_id in mapping:
+                raise ValueError(f'Customer {duplicate_id} appears in more than one group')
+            mapping[duplicate_id] = primary_id
+    chained = primaries & set(mapping)
+    if chained:
+        raise ValueError(f'Customers {sorted(chained)} are both a primary and a duplicate')
+    return mapping
+
+
+def _related_fields():
+    """(model, field) for every foreign key pointing at Customer."""
+    return [
+        (relation.related_model, relation.field)
+        for relation in Customer._meta.related_objects
+        if not relation.many_to_many
+    ]
+
+
+def merge_customers(groups):
+    """
+    Merges each group of duplicates into its primary customer: every
+    document pointing at a duplicate is moved to the primary, then the
+    duplicates are deleted. All groups go in one transaction with one
+    UPDATE per related table (per MERGE_CHUNK_SIZE duplicates).
+
+    Returns {'merged': <deleted customers>, 'updated': {model label: rows}}.
+    Raises ValueError for inconsistent groups and Customer.DoesNotExist
+    when a customer no longer exists.
+    """
+    mapping = _duplicate_map(groups)
+    if not mapping:
+        raise ValueError('No duplicates given')
+
+    updated = {}
+    with transaction.atomic():
+        ids = set(mapping) | set(mapping.values())
+        found = set(Customer.objects.select_for_update().filter(id__in=ids).values_list('id', flat=True))
+        if found != ids:
+            raise Customer.DoesNotExist(f'Customers not found: {sorted(ids - found)}')
+
+        items = sorted(mapping.items())
+        for model, field in _related_fields():
+            rows = 0
+            for start in range(0, len(items), MERGE_CHUNK_SIZE):
+                chunk = items[start:start + MERGE_CHUNK_SIZE]
+                primary = Case(
+                    *[When(**{field.attname: duplicate_id}, then=Value(primary_id)) for duplicate_id, primary_id in chunk],
+                    output_field=field.target_field,
+                )
+                rows += model._base_manager.filter(
+                    **{f'{field.attname}__in': [duplicate_id for duplicate_id, _ in chunk]}
+                ).update(**{field.attname: primary})
+            updated[model._meta.label] = rows
+
+        _, deleted = Customer.objects.filter(id__in=list(mapping)).delete()
+        transaction.on_commit(lambda: discard_customers(mapping))
+    return {'merged': deleted.get(Customer._meta.label, 0), 'updated': updated}
@@ -0,0 +1,176 @@
+from decimal import Decimal
+
+from django.apps import apps
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+CENT = Decimal('0.01')
+# Percentages are multiplied by this rather than divided by 100, which
+# SQLite turns into integer division for whole numbers.
+PERCENT = Decimal('0.01')
+
+
+def _cents(value):
+    """A line total as stored: DecimalField(decimal_places=2)."""
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def _discounted(amount):
+    """Expression for ``amount`` less the row's global_discount percentage."""
+    return amount - amount * F('global_discount') * PERCENT
+
+
+class LineTotals:
+    """
+    How a line-item model feeds the stored totals of its document.
+    ``amounts(line)`` gives {name: Decimal} for one line; each target is
+    (model label, lookup for the document id, updates) where
+    ``updates(delta)`` maps stored fields to expressions adding the change
+    in those amounts, plus optional filters for documents whose totals are
+    only kept under a condition. Updates only reference fields they don't
+    assign, so every backend evaluates them the same way.
+    """
+
+    def __init__(self, parent_field, amounts, targets):
+        self.parent_field = parent_field
+        self.amounts = amounts
+        self.targets = targets
+
+    def state(self, line):
+        return getattr(line, self.parent_field), self.amounts(line)
+
+    def apply(self, parent_id, delta):
+        if parent_id is None or not any(delta.values()):
+            return
+        for model_label, lookup, updates, *filters in self.targets:
+            rows = apps.get_model(model_label)._base_manager.filter(**{lookup: parent_id}, **(filters[0] if filters else {}))
+            rows.update(**updates(delta))
+
+
+def _invoice_line(line):
+    total = _cents(line.total)
+    return {'total': total, 'tax': Decimal(str(line.tax or 0)) * total * PERCENT}
+
+
+def _line_total(line):
+    return {'total': _cents(line.total)}
+
+
+def _order_summary_updates(delta):
+    change = _discounted(delta['total']) + delta['tax']
+    return {
+        'subtotal': F('subtotal') + delta['total'],
+        'tax_summary': F('tax_summary') + delta['tax'],
+        'grand_total': F('grand_total') + change,
+        'balance_due': F('balance_due') + change,
+    }
+
+
+def _return_updates(total_field):
+    def updates(delta):
+        return {
+            'return_subtotal': F('return_subtotal') + delta['total'],
+            'global_discount_amount': F('global_discount_amount') + delta['total'] * F('global_discount') * PERCENT,
+            total_field: F(total_field) + _discounted(delta['total']),
+        }
+    return updates
+
+
+def _refund_updates(amount_field, balance_field):
+    def updates(delta):
+        return {amount_field: F(amount_field) + delta['total'], balance_field: F(balance_field) + delta['total']}
+    return updates
+
+
+# Line-item model -> the document totals its saves and deletes adjust
+# (wired in core.signals). Document saves recompute the same totals with
+# one SUM query, so bulk_create()/update() of lines is followed by saving
+# the document.
+LINE_TOTALS = {
+    'crm.InvoiceItem': LineTotals('invoice_id', _invoice_line, [
+        ('crm.Invoice', 'id', lambda delta: {'invoice_total': F('invoice_total') + delta['total']}),
+        ('crm.OrderSummary', 'invoice_id', _order_summary_updates),
+    ]),
+    'crm.InvoiceReturnItem': LineTotals('invoice_return_id', _line_total, [
+        ('crm.InvoiceReturnSummary', 'invoice_return_id', _return_updates('amount_to_refund')),
+    ]),
+    'purchase.StockReturnItem': LineTotals('stock_return_id', _line_total, [
+        ('purchase.StockReturn', 'id', _return_updates('amount_to_recover')),
+    ]),
+    'finance.CreditNoteItem': LineTotals('credit_note_id', _line_total, [
+        ('finance.CreditNotePaymentRefund', 'credit_note_id', _refund_updates('invoice_return_amount', 'balance_to_refund'),
+         {'credit_note__invoice_reference__summary__isnull': False}),
+    ]),
+    'finance.DebitNoteItem': LineTotals('debit_note_id', _line_total, [
+        ('finance.DebitNotePaymentRecover', 'debit_note_id', _refund_updates('purchase_return_amount', 'balance_to_recover'),
+         {'debit_note__po_reference__isnull': False}),
+    ]),
+}
+
+
+def line_totals_for(model):
+    return LINE_TOTALS.get(model._meta.label)
+
+
+def sum_lines(lines, **expressions):
+    """
+    {name: Decimal} sums of ``lines`` in one aggregate query, e.g.
+    sum_lines(invoice.items.all(), subtotal='total'); 0 without lines.
+    """
+    zero = Value(Decimal('0'), output_field=DecimalField())
+    return lines.aggregate(**{
+        name: Coalesce(Sum(expression, output_field=DecimalField()), zero) for name, expression in expressions.items()
+    })
+
+
+def _line_sum(model_label, parent_field, expression):
+    """Correlated subquery summing ``expression`` over the lines of the outer row."""
+    lines = apps.get_model(model_label)._base_manager.filter(**{parent_field: OuterRef('pk')})
+    total = lines.order_by().values(parent_field).annotate(total=Sum(expression)).values('total')
+    return Coalesce(Subquery(total, output_field=DecimalField()), Value(Decimal('0'), output_field=DecimalField()))
+
+
+def with_quotation_totals(quotations):
+    """
+    Annotates items_subtotal, discount_amount and grand_total, computed by
+    the database with one subquery per row instead of reading the items.
+    """
+    money = DecimalField(max_digits=14, decimal_places=2)
+    quotations = quotations.annotate(items_subtotal=_line_sum('crm.QuotationItem', 'quotation', 'total'))
+    quotations = quotations.annotate(
+        discount_amount=ExpressionWrapper(F('items_subtotal') * F('globalDiscount') * PERCENT, output_field=money),
+    )
+    return quotations.annotate(grand_total=ExpressionWrapper(
+        F('items_subtotal') - F('discount_amount') + F('shippingCharges'), output_field=money,
+    ))
+
+
+def with_enquiry_totals(enquiries):
+    """Annotates grand_total, the sum of the enquiry's item amounts."""
+    return enquiries.annotate(grand_total=_line_sum('crm.EnquiryItem', 'enquiry', 'total_amount'))
+
+
+def record_line_change(totals, old_state, new_state):
+    """
+    Applies a line's change to its document's stored totals. States are
+    (document id, amounts), or None for a line that did not exist before /
+    does not exist any more.
+    """
+    old_parent, old_amounts = old_state or (None, {})
+    new_parent, new_amounts = new_state or (None, {})
+    names = set(old_amounts) | set(new_amounts)
+    if old_parent == new_parent:
+        totals.apply(new_parent, {name: new_amounts.get(name, 0) - old_amounts.get(name, 0) for name in names})
+        return
+    totals.apply(old_parent, {name: -old_amounts.get(name, 0) for name in names})
+    totals.apply(new_parent, {name: new_amounts.get(name, 0) for name in names})
+
+
+def deleted_directly(sender, origin):
+    """
+    False when a line is deleted because its document is: the document's
+    totals go with it, so there is nothing to adjust.
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model is sender
+    return isinstance(origin, sender)
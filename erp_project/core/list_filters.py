@@ -0,0 +1,95 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ParseError
+
+EQUALITY_LOOKUPS = ('exact', 'in')
+RANGE_LOOKUPS = ('gte', 'lte', 'gt', 'lt')
+
+
+class UnindexedFilter(ParseError):
+    default_detail = 'This filter and ordering combination is not supported'
+
+
+def date_param(value):
+    """``convert`` for date parameters (YYYY-MM-DD)."""
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise ParseError(f'Invalid date: {value}')
+    return date
+
+
+class IndexedFilter:
+    """
+    Query-parameter filtering and ordering for a list view, limited to
+    combinations one of the model's Meta.indexes can serve: the equality
+    filters must be the leading columns of an index (in any order) and the
+    ordering column must come right after them. Range filters are only
+    allowed on the ordering column.
+
+    ``params`` maps query parameter -> (field, lookup) or (field, lookup,
+    convert); ``convert`` turns the raw value into the lookup value. 'All'
+    or an empty value means no filter. ``orderings`` lists the accepted
+    ``?ordering=`` values, the first being the default; rows are ordered by
+    id after it, so the ordering also works for cursor pagination.
+    ``fixed`` names the fields the view always filters on (e.g. the
+    current user); their values are passed to apply().
+    """
+
+    def __init__(self, model, params, orderings, fixed=()):
+        self.model = model
+        self.params = params
+        self.orderings = tuple(orderings)
+        self.fixed = set(fixed)
+        self.indexes = [
+            tuple(field.lstrip('-') for field in index.fields) for index in model._meta.indexes
+        ]
+        for ordering in self.orderings:
+            if not self._index_for(self.fixed, ordering.lstrip('-')):
+                raise ImproperlyConfigured(f'{model.__name__}: no index serves {sorted(self.fixed)} ordered by {ordering}')
+
+    def _index_for(self, equal, order_field):
+        for index in self.indexes:
+            if len(index) > len(equal) and set(index[:len(equal)]) == equal and index[len(equal)] == order_field:
+                return index
+        return None
+
+    def apply(self, queryset, request, **fixed):
+        """
+        Filters and orders ``queryset`` from the query string plus the
+        ``fixed`` field values. Returns (queryset, ordering) with
+        ``ordering`` ready for ListPagination; raises UnindexedFilter for
+        anything no index serves.
+        """
+        if set(fixed) != self.fixed:
+            raise ImproperlyConfigured(f'{self.model.__name__}: apply() needs values for {sorted(self.fixed)}')
+        ordering = request.query_params.get('ordering') or self.orderings[0]
+        if ordering not in self.orderings:
+            raise UnindexedFilter(f'ordering must be one of {list(self.orderings)}')
+        order_field = ordering.lstrip('-')
+
+        equal = set(fixed)
+        filters = dict(fixed)
+        for param, spec in self.params.items():
+            value = request.query_params.get(param)
+            if value in (None, '', 'All'):
+                continue
+            field, lookup = spec[0], spec[1]
+            if len(spec) > 2:
+                value = spec[2](value)
+            if lookup in EQUALITY_LOOKUPS:
+                equal.add(field)
+            elif lookup in RANGE_LOOKUPS and field != order_field:
+                raise UnindexedFilter(f'{param} can only be combined with ordering by {field}')
+            filters[f'{field}__{lookup}'] = value
+
+        if not self._index_for(equal, order_field):
+            raise UnindexedFilter(
+                f'Filtering on {sorted(equal - set(fixed)) or "nothing"} with ordering {ordering} is not supported'
+            )
+
+        tiebreak = '-id' if ordering.startswith('-') else 'id'
+        ordering = (ordering, tiebreak)
+        return queryset.filter(**filters).order_by(*ordering), ordering
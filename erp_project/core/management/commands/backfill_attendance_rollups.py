@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from core.attendance_rollup import rebuild_attendance_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the monthly attendance rollups from the Attendance table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--year', type=int, default=None, help='Only rebuild this year')
+        parser.add_argument('--user', type=int, action='append', dest='users', help='Only rebuild this user id (repeatable)')
+
+    def handle(self, *args, **options):
+        count = rebuild_attendance_rollups(user_ids=options['users'], year=options['year'])
+        self.stdout.write(self.style.SUCCESS(f'Wrote {count} monthly attendance rows'))
@@ -0,0 +1,143 @@
+import datetime
+import random
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from core.models import Customer, Task
+from core.search import reindex
+from core.sequences import next_document_numbers
+from crm.models import DeliveryNoteReturn, InvoiceReturn, Quotation, SalesOrder
+from purchase.models import PurchaseOrder
+
+PAGE_SIZE = 50
+BENCHMARK_MODELS = (InvoiceReturn, DeliveryNoteReturn, Quotation, SalesOrder, Task, PurchaseOrder)
+
+
+def _sample(model, field):
+    return model.objects.exclude(**{f'{field}__isnull': True}).values_list(field, flat=True).first()
+
+
+def _cases():
+    """(name, model, queryset) for the first page of each list screen, as the views query it."""
+    user_id = _sample(Task, 'assigned_to_id')
+    return [
+        ('invoice returns', InvoiceReturn, InvoiceReturn.objects.order_by('-invoice_return_date', '-id')),
+        ('invoice returns by status', InvoiceReturn, InvoiceReturn.objects.filter(status='Submitted').order_by('-invoice_return_date', '-id')),
+        ('invoice returns by customer', InvoiceReturn, InvoiceReturn.objects.filter(customer_id=_sample(InvoiceReturn, 'customer_id')).order_by('-invoice_return_date', '-id')),
+        ('delivery note returns', DeliveryNoteReturn, DeliveryNoteReturn.objects.order_by('-dnr_date', '-id')),
+        ('delivery note returns by status', DeliveryNoteReturn, DeliveryNoteReturn.objects.filter(status='Submitted').order_by('-dnr_date', '-id')),
+        ('quotations of a user', Quotation, Quotation.objects.filter(user_id=_sample(Quotation, 'user_id')).order_by('-created_at', '-id')),
+        ('sales orders of a rep', SalesOrder, SalesOrder.objects.filter(sales_rep_id=_sample(SalesOrder, 'sales_rep_id')).order_by('-created_at', '-id')),
+        ('tasks of a user', Task, Task.objects.filter(assigned_to_id=user_id).order_by('due_date', 'id')),
+        ('purchase orders', PurchaseOrder, PurchaseOrder.objects.order_by('-PO_date', '-id')),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Show EXPLAIN plans and first-page latency of the document list queries. '
+        '--compare drops the list indexes to measure without them and recreates them '
+        '(schema change: use a copy of the database).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='First insert this many rows into each benchmarked table')
+        parser.add_argument('--runs', type=int, default=20, help='Timed runs per query')
+        parser.add_argument('--compare', action='store_true', help='Also measure with the list indexes dropped')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+
+        cases = _cases()
+        before = None
+        if options['compare']:
+            self.set_indexes(False)
+            try:
+                before = self.measure(cases, options['runs'])
+            finally:
+                self.set_indexes(True)
+        after = self.measure(cases, options['runs'])
+
+        for name, _, _ in cases:
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            if before:
+                self.stdout.write(f'  without indexes: {before[name][0]:.2f} ms')
+                self.stdout.write('    ' + before[name][1].replace('\n', '\n    '))
+            self.stdout.write(self.style.SUCCESS(f'  with indexes:    {after[name][0]:.2f} ms'))
+            self.stdout.write('    ' + after[name][1].replace('\n', '\n    '))
+
+    def measure(self, cases, runs):
+        results = {}
+        for name, _, queryset in cases:
+            page = queryset[:PAGE_SIZE]
+            list(page)  # warm up
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                list(page.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            results[name] = (statistics.median(timings), page.explain())
+        return results
+
+    def set_indexes(self, present):
+        with connection.schema_editor() as editor:
+            for model in BENCHMARK_MODELS:
+                for index in model._meta.indexes:
+                    if present:
+                        editor.add_index(model, index)
+                    else:
+                        editor.remove_index(model, index)
+
+    def seed(self, rows):
+        """Bulk inserts ``rows`` synthetic rows per table, spread over 20 users and 1000 customers."""
+        rng = random.Random(rows)
+        tag = uuid.uuid4().hex[:6]
+        User.objects.bulk_create([User(username=f'bench-{tag}-{i}') for i in range(20)])
+        users = list(User.objects.filter(username__startswith=f'bench-{tag}-'))
+        Customer.objects.bulk_create([
+            Customer(first_name=f'Bench {i}', customer_type='Business', status='Active', email=f'bench-{tag}-{i}@example.com',
+                     phone_number='0', street='-', city='-', state='-', zip_code='-', country='-')
+            for i in range(1000)
+        ])
+        reindex('customer', Customer.objects.filter(email__startswith=f'bench-{tag}-'))
+        customers = list(Customer.objects.filter(email__startswith=f'bench-{tag}-').values_list('id', flat=True))
+        today = datetime.date.today()
+        statuses = ['Draft', 'Submitted', 'Cancelled']
+
+        def day():
+            return today - datetime.timedelta(days=rng.randrange(1000))
+
+        def numbered(doc_type, build):
+            for start in range(0, rows, 5000):
+                count = min(5000, rows - start)
+                yield from (build(number) for number in next_document_numbers(doc_type, count))
+
+        InvoiceReturn.objects.bulk_create(numbered('invoice_return', lambda number: InvoiceReturn(
+            INVOICE_RETURN_ID=number, invoice_return_date=day(), customer_id=rng.choice(customers), status=rng.choice(statuses),
+        )), batch_size=5000)
+        DeliveryNoteReturn.objects.bulk_create(numbered('delivery_note_return', lambda number: DeliveryNoteReturn(
+            DNR_ID=number, dnr_date=day(), customer_id=rng.choice(customers), status=rng.choice(statuses),
+        )), batch_size=5000)
+        Quotation.objects.bulk_create(numbered('quotation', lambda number: Quotation(
+            quotation_id=number[:10], user=rng.choice(users), customer_name_id=rng.choice(customers), quotation_type='Standard',
+            quotation_date=day(), expiry_date=today, expected_delivery=today, currency='INR', status='Draft',
+        )), batch_size=5000)
+        SalesOrder.objects.bulk_create(numbered('sales_order', lambda number: SalesOrder(
+            sales_order_id=number, sales_rep=rng.choice(users), customer_id=rng.choice(customers), order_type='Standard', currency='IND',
+        )), batch_size=5000)
+        Task.objects.bulk_create((Task(
+            name=f'Bench task {i}', status='Not Started', start_date=today, due_date=day(), assigned_to=rng.choice(users), priority='Low',
+        ) for i in range(rows)), batch_size=5000)
+        PurchaseOrder.objects.bulk_create(numbered('purchase_order', lambda number: PurchaseOrder(
+            PO_ID=number, PO_date=day(), delivery_date=today, sales_order_reference='-', supplier_name='-', payment_terms='-',
+            inco_terms='-', currency='INR', subtotal=Decimal('0'), tax_summary=Decimal('0'), shipping_charges=Decimal('0'),
+            total_order_value=Decimal('0'),
+        )), batch_size=5000)
+        self.stdout.write(self.style.SUCCESS(f'Seeded {rows} rows per table'))
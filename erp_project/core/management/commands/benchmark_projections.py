@@ -0,0 +1,103 @@
+import json
+import random
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.utils.encoders import JSONEncoder
+
+from core.models import Customer, Product
+from core.projections import projection_for
+from core.query_planner import optimize_queryset
+from core.search import reindex
+from core.sequences import next_document_numbers
+from core.serializers import CustomerSerializer, ProductSerializer
+from crm.models import Invoice, InvoiceItem
+from crm.serializers import InvoiceSerializer
+
+
+def _cases(rows):
+    """(name, serializer class, queryset) for the list endpoints with a projection."""
+    return [
+        ('products', ProductSerializer, Product.objects.order_by('id')[:rows]),
+        ('customers', CustomerSerializer, Customer.objects.order_by('last_edit_date', 'id')[:rows]),
+        ('invoices', InvoiceSerializer, Invoice.objects.order_by('-invoice_date', '-id')[:rows]),
+    ]
+
+
+def _dump(data):
+    return json.dumps(data, cls=JSONEncoder)
+
+
+class Command(BaseCommand):
+    help = 'Compare list serialization through the serializers and through values() projections.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='First insert this many products, customers and invoices')
+        parser.add_argument('--rows', type=int, default=10000, help='Rows serialized per run')
+        parser.add_argument('--runs', type=int, default=5, help='Timed runs per path')
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self.seed(options['seed'])
+
+        for name, serializer_class, queryset in _cases(options['rows']):
+            projection = projection_for(serializer_class)
+
+            def serialize():
+                return serializer_class(list(optimize_queryset(queryset, serializer_class)), many=True).data
+
+            def project():
+                return projection.data(queryset)
+
+            identical = _dump(serialize()) == _dump(project())
+            serializer_ms = self.measure(serialize, options['runs'])
+            projection_ms = self.measure(project, options['runs'])
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name} ({queryset.count()} rows)'))
+            self.stdout.write(f'  serializer: {serializer_ms:.1f} ms')
+            self.stdout.write(f'  projection: {projection_ms:.1f} ms ({serializer_ms / projection_ms:.1f}x)')
+            if identical:
+                self.stdout.write(self.style.SUCCESS('  identical JSON'))
+            else:
+                self.stdout.write(self.style.ERROR('  JSON differs'))
+
+    def measure(self, render, runs):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            render()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def seed(self, rows):
+        """Bulk inserts ``rows`` products, customers and invoices with three items each."""
+        rng = random.Random(rows)
+        tag = uuid.uuid4().hex[:6]
+        Product.objects.bulk_create([
+            Product(product_id=number, name=f'Bench product {i}', product_type='Goods', unit_price=Decimal(rng.randrange(100, 100000)) / 100,
+                    discount=Decimal('5.00'), status='Active', product_usage='Both', weight='1kg', sub_category=tag)
+            for i, number in enumerate(next_document_numbers('product', rows))
+        ], batch_size=2000)
+        Customer.objects.bulk_create([
+            Customer(customer_id=number, first_name=f'Bench {i}', customer_type='Business', status='Active',
+                     email=f'bench-{tag}-{i}@example.com', phone_number='0', street='-', city='-', state='-', zip_code='-', country='-')
+            for i, number in enumerate(next_document_numbers('customer', rows))
+        ], batch_size=2000)
+        reindex('product', Product.objects.filter(sub_category=tag))
+        reindex('customer', Customer.objects.filter(email__startswith=f'bench-{tag}-'))
+        products = list(Product.objects.filter(sub_category=tag).values_list('id', flat=True))
+        customers = list(Customer.objects.filter(email__startswith=f'bench-{tag}-').values_list('id', flat=True))
+
+        Invoice.objects.bulk_create([
+            Invoice(INVOICE_ID=number, customer_id=rng.choice(customers), customer_ref_no=tag, invoice_total=Decimal('0'))
+            for number in next_document_numbers('invoice', rows)
+        ], batch_size=2000)
+        invoices = Invoice.objects.filter(customer_ref_no=tag).values_list('id', flat=True)
+        InvoiceItem.objects.bulk_create([
+            InvoiceItem(invoice_id=invoice_id, product_id=rng.choice(products), quantity=rng.randrange(1, 10),
+                        unit_price=Decimal('10.00'), tax=Decimal('18.00'), discount=Decimal('0'), total=Decimal('11.80'))
+            for invoice_id in invoices for _ in range(3)
+        ], batch_size=2000)
+        self.stdout.write(self.style.SUCCESS(f'Seeded {rows} products, customers and invoices'))
@@ -0,0 +1,385 @@
+import datetime
+import itertools
+import math
+import random
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.attendance_rollup import rebuild_attendance_rollups
+from core.document_totals import CENT
+from core.models import Attendance, AttendancePunch, Customer, Product, Profile, SearchTerm
+from core.search import reindex
+from core.sequences import next_document_numbers
+from crm.models import Invoice, InvoiceItem, OrderSummary
+from purchase.models import SerialNumber, StockReceipt, StockReceiptItem
+
+# Markers of generated rows, so --wipe removes them and nothing else
+EMAIL_DOMAIN = 'synthetic.example'
+PRODUCT_DESCRIPTION = 'Synthetic product'
+INVOICE_TAG = 'synthetic'
+RECEIPT_DN_NO = 'SYNTHETIC'
+USERNAME_PREFIX = 'synthetic-'
+
+FIRST_NAMES = [
+    'Aarav', 'Vivaan', 'Aditya', 'Arjun', 'Sai', 'Rohan', 'Karthik', 'Rahul', 'Vikram', 'Suresh', 'Ananya', 'Diya',
+    'Priya', 'Lakshmi', 'Kavya', 'Meera', 'Divya', 'Sneha', 'Pooja', 'Nandini', 'Mohammed', 'Imran', 'Joseph', 'Mary',
+]
+LAST_NAMES = [
+    'Sharma', 'Verma', 'Reddy', 'Naidu', 'Iyer', 'Nair', 'Menon', 'Patel', 'Shah', 'Gupta', 'Rao', 'Kumar', 'Singh',
+    'Das', 'Banerjee', 'Pillai', 'Khan', 'Fernandes', 'Joshi', 'Kulkarni',
+]
+# (city, state, weight): customers concentrate in the large metros
+CITIES = [
+    ('Mumbai', 'Maharashtra', 20), ('Delhi', 'Delhi', 19), ('Bengaluru', 'Karnataka', 13), ('Hyderabad', 'Telangana', 10),
+    ('Chennai', 'Tamil Nadu', 10), ('Kolkata', 'West Bengal', 9), ('Pune', 'Maharashtra', 7), ('Ahmedabad', 'Gujarat', 6),
+    ('Jaipur', 'Rajasthan', 3), ('Visakhapatnam', 'Andhra Pradesh', 2), ('Kochi', 'Kerala', 1),
+]
+INDUSTRIES = ['Retail', 'Manufacturing', 'IT Services', 'Healthcare', 'Construction', 'Logistics', 'Education', 'Hospitality']
+PRODUCT_WORDS = ['Steel', 'Copper', 'Industrial', 'Premium', 'Compact', 'Heavy Duty', 'Smart', 'Eco', 'Pro', 'Classic']
+PRODUCT_NOUNS = ['Valve', 'Pump', 'Bearing', 'Cable', 'Sensor', 'Panel', 'Drill', 'Router', 'Filter', 'Motor', 'Switch', 'Adapter']
+# GST slabs and how common they are
+TAX_RATES = ([Decimal('0'), Decimal('5'), Decimal('12'), Decimal('18'), Decimal('28')], [5, 15, 20, 50, 10])
+DISCOUNTS = ([Decimal('0'), Decimal('5'), Decimal('10')], [70, 20, 10])
+
+
+def _zipf_cum_weights(count, exponent=1.0):
+    """Cumulative weights for picking among ``count`` items by a Zipf-like popularity."""
+    return list(itertools.accumulate(1 / (rank + 10) ** exponent for rank in range(count)))
+
+
+def _chunks(total, size):
+    for start in range(0, total, size):
+        yield min(size, total - start)
+
+
+def _line_total(quantity, unit_price, discount, tax):
+    # InvoiceItem.save() formula, stored to the cent
+    return (quantity * unit_price * (1 - discount / 100) * (1 + tax / 100)).quantize(CENT)
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk insert synthetic customers, products, invoices, serial numbers and attendance for capacity '
+        'testing. The same --seed and --end-date on the same starting data produce the same rows. '
+        'Existing data is kept; --wipe first removes rows generated earlier.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--end-date', type=datetime.date.fromisoformat, default=None, help='Last document date (default: today)')
+        parser.add_argument('--days', type=int, default=730, help='Days of history before --end-date')
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--products', type=int, default=200)
+        parser.add_argument('--invoice-lines', type=int, default=10000, help='Approximate number of invoice lines')
+        parser.add_argument('--lines-per-invoice', type=float, default=4.0, help='Average lines per invoice')
+        parser.add_argument('--serial-numbers', type=int, default=1000)
+        parser.add_argument('--employees', type=int, default=20, help='Users to generate attendance for')
+        parser.add_argument('--attendance-days', type=int, default=90, help='Days of attendance punches per employee')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows per bulk_create / transaction')
+        parser.add_argument('--skip-search-index', action='store_true', help='Leave the generated rows out of the search index')
+        parser.add_argument('--wipe', action='store_true', help='First delete everything generated by earlier runs')
+
+    def handle(self, *args, **options):
+        if options['lines_per_invoice'] < 1:
+            raise CommandError('--lines-per-invoice must be at least 1')
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.end_date = options['end_date'] or timezone.localdate()
+        self.days = options['days']
+        self.index = not options['skip_search_index']
+
+        if options['wipe']:
+            self.wipe()
+        customers = self.generate_customers(options['customers'])
+        products = self.generate_products(options['products'])
+        if options['invoice_lines']:
+            customers = customers or list(Customer.objects.values_list('id', flat=True))
+            products = products or list(Product.objects.values_list('id', 'unit_price', 'tax_code__percentage'))
+            if not customers or not products:
+                raise CommandError('Invoices need customers and products: generate some or add --customers/--products')
+            self.generate_invoices(options['invoice_lines'], options['lines_per_invoice'], customers, products)
+        if options['serial_numbers']:
+            products = products or list(Product.objects.values_list('id', 'unit_price', 'tax_code__percentage'))
+            if not products:
+                raise CommandError('Serial numbers need products: generate some with --products')
+            self.generate_serial_numbers(options['serial_numbers'], products)
+        if options['employees'] and options['attendance_days']:
+            self.generate_attendance(options['employees'], options['attendance_days'])
+
+    def log(self, message):
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def day(self):
+        # Recent days are busier (growing business); Sundays are quiet
+        while True:
+            day = self.end_date - datetime.timedelta(days=int(self.days * (1 - math.sqrt(self.rng.random()))))
+            if day.weekday() != 6 or self.rng.random() < 0.3:
+                return day
+
+    def line_count(self, mean):
+        # Geometric: many short invoices, a few long ones
+        if mean == 1:
+            return 1
+        return 1 + int(math.log(1 - self.rng.random()) / math.log(1 - 1 / mean))
+
+    def generate_customers(self, count):
+        rng = self.rng
+        cities, _, city_weights = zip(*CITIES)
+        city_states = dict((city, state) for city, state, _ in CITIES)
+        ids = []
+        for size in _chunks(count, self.chunk_size):
+            rows = []
+            for number in next_document_numbers('customer', size):
+                first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+                city = rng.choices(cities, city_weights)[0]
+                business = rng.random() < 0.7
+                street = f'{rng.randint(1, 999)}, {rng.choice(["MG Road", "Station Road", "Main Street", "Ring Road", "Lake View"])}'
+                address = f'{street}, {city}, {city_states[city]}'
+                rows.append(Customer(
+                    customer_id=number, first_name=first, last_name=last,
+                    customer_type='Business' if business else rng.choice(['Individual', 'Organization']),
+                    status='Active' if rng.random() < 0.9 else 'Inactive',
+                    email=f'{first}.{last}.{number}@{EMAIL_DOMAIN}'.lower(),
+                    phone_number=f'{rng.choice("6789")}{rng.randrange(10 ** 9):09d}',
+                    address=address, street=street, city=city, state=city_states[city],
+                    zip_code=f'{rng.randint(110001, 855999)}', country='India',
+                    company_name=f'{last} {rng.choice(["Traders", "Industries", "Enterprises", "Pvt Ltd"])}' if business else '',
+                    industry=rng.choice(INDUSTRIES) if business else '', location=city,
+                    gst_tax_id=f'{rng.randint(10, 37)}{number[-5:]}X1Z{rng.randint(0, 9)}' if business else '',
+                    credit_limit=Decimal(rng.choice([0, 50000, 100000, 500000])),
+                    billing_address=address, shipping_address=address,
+                    payment_terms=rng.choice(['Net 15', 'Net 30', 'Net 45', 'Due on Receipt']), credit_term='',
+                ))
+            with transaction.atomic():
+                Customer.objects.bulk_create(rows, batch_size=self.chunk_size)
+            created = Customer.objects.filter(customer_id__in=[row.customer_id for row in rows])
+            ids.extend(created.order_by('id').values_list('id', flat=True))
+            if self.index:
+                reindex('customer', created)
+        if count:
+            self.log(f'Created {len(ids)} customers')
+        return ids
+
+    def generate_products(self, count):
+        rng = self.rng
+        created = []
+        for size in _chunks(count, self.chunk_size):
+            rows = []
+            for number in next_document_numbers('product', size):
+                # Log-normal prices: mostly hundreds of rupees, a long tail of expensive items
+                price = Decimal(str(min(round(rng.lognormvariate(math.log(500), 1.0), 2), 50000))).quantize(CENT)
+                rows.append(Product(
+                    product_id=number, name=f'{rng.choice(PRODUCT_WORDS)} {rng.choice(PRODUCT_NOUNS)} {number}',
+                    product_type=rng.choices(['Goods', 'Services', 'Combo'], [85, 10, 5])[0],
+                    description=PRODUCT_DESCRIPTION, unit_price=price,
+                    discount=rng.choices(*DISCOUNTS)[0], quantity=rng.randint(0, 500),
+                    stock_level=rng.randint(0, 500), reorder_level=rng.choice([10, 25, 50]),
+                    weight=f'{rng.randint(1, 50)}kg', status=rng.choices(['Active', 'Inactive', 'Discontinued'], [90, 7, 3])[0],
+                    product_usage=rng.choices(['Sale', 'Purchase', 'Both'], [50, 10, 40])[0],
+                    sub_category=rng.choice(PRODUCT_NOUNS),
+                ))
+            with transaction.atomic():
+                Product.objects.bulk_create(rows, batch_size=self.chunk_size)
+            chunk = Product.objects.filter(product_id__in=[row.product_id for row in rows])
+            created.extend(chunk.order_by('id').values_list('id', 'unit_price', 'tax_code__percentage'))
+            if self.index:
+                reindex('product', chunk)
+        if count:
+            self.log(f'Created {len(created)} products')
+        return created
+
+    def generate_invoices(self, lines, lines_per_invoice, customers, products):
+        """Invoices with items and an order summary, popular customers and products ordering most."""
+        rng = self.rng
+        # Popularity follows the shuffled order, not the id order
+        customers, products = list(customers), list(products)
+        rng.shuffle(customers)
+        rng.shuffle(products)
+        customer_weights = _zipf_cum_weights(len(customers))
+        product_weights = _zipf_cum_weights(len(products))
+        invoice_count = max(1, round(lines / lines_per_invoice))
+
+        created_invoices = created_lines = 0
+        for size in _chunks(invoice_count, self.chunk_size):
+            invoices, items, summaries = [], {}, {}
+            for number in next_document_numbers('invoice', size):
+                invoice_date = self.day()
+                line_rows = []
+                for _ in range(self.line_count(lines_per_invoice)):
+                    product_id, unit_price, tax_percentage = rng.choices(products, cum_weights=product_weights)[0]
+                    quantity = 1 + min(int(rng.expovariate(0.5)), 49)
+                    tax = Decimal(str(tax_percentage)) if tax_percentage is not None else rng.choices(*TAX_RATES)[0]
+                    discount = rng.choices(*DISCOUNTS)[0]
+                    line_rows.append(InvoiceItem(
+                        product_id=product_id, quantity=quantity, unit_price=unit_price, tax=tax, discount=discount,
+                        total=_line_total(quantity, unit_price, discount, tax),
+                    ))
+                subtotal = sum(line.total for line in line_rows)
+                tax_summary = sum(line.tax * line.total / 100 for line in line_rows).quantize(CENT)
+                grand_total = subtotal + tax_summary
+                payment_status = rng.choices(['Paid', 'Unpaid', 'Partial'], [60, 25, 15])[0]
+                amount_paid = {'Paid': grand_total, 'Unpaid': Decimal('0'), 'Partial': (grand_total / 2).quantize(CENT)}[payment_status]
+                terms, days = rng.choices([('Net 15', 15), ('Net 45', 45), ('Due on Receipt', 0)], [50, 30, 20])[0]
+                overdue = (self.end_date - invoice_date).days > days
+                invoices.append(Invoice(
+                    INVOICE_ID=number, invoice_date=invoice_date, due_date=invoice_date + datetime.timedelta(days=days),
+                    customer_id=rng.choices(customers, cum_weights=customer_weights)[0], invoice_tags=INVOICE_TAG,
+                    invoice_status='Paid' if payment_status == 'Paid' else ('Overdue' if overdue else 'Sent'),
+                    payment_terms=terms, payment_method=rng.choice(['Credit Card', 'Bank Transfer', 'COD', 'PayPal']),
+                    payment_status=payment_status, invoice_total=subtotal,
+                ))
+                items[number] = line_rows
+                summaries[number] = OrderSummary(
+                    subtotal=subtotal, tax_summary=tax_summary, grand_total=grand_total, amount_paid=amount_paid,
+                    balance_due=grand_total - amount_paid,
+                )
+            with transaction.atomic():
+                Invoice.objects.bulk_create(invoices, batch_size=self.chunk_size)
+                ids = dict(Invoice.objects.filter(INVOICE_ID__in=list(items)).values_list('INVOICE_ID', 'id'))
+                for number, line_rows in items.items():
+                    for line in line_rows:
+                        line.invoice_id = ids[number]
+                    summaries[number].invoice_id = ids[number]
+                InvoiceItem.objects.bulk_create([line for line_rows in items.values() for line in line_rows], batch_size=self.chunk_size)
+                OrderSummary.objects.bulk_create(summaries.values(), batch_size=self.chunk_size)
+            if self.index:
+                reindex('invoice', Invoice.objects.filter(id__in=ids.values()))
+            created_invoices += len(invoices)
+            created_lines += sum(len(line_rows) for line_rows in items.values())
+        self.log(f'Created {created_invoices} invoices with {created_lines} lines')
+
+    def generate_serial_numbers(self, count, products):
+        """Serial-tracked stock receipts: 1-5 items per receipt, 1-20 serial numbers per item."""
+        rng = self.rng
+        plan = []  # serial numbers per item, grouped per receipt
+        remaining = count
+        while remaining > 0:
+            receipt = []
+            for _ in range(rng.randint(1, 5)):
+                serials = min(rng.randint(1, 20), remaining)
+                receipt.append(serials)
+                remaining -= serials
+                if not remaining:
+                    break
+            plan.append(receipt)
+
+        created = 0
+        for start in range(0, len(plan), self.chunk_size):
+            receipts_plan = plan[start:start + self.chunk_size]
+            numbers = next_document_numbers('stock_receipt', len(receipts_plan))
+            receipts, items = [], {}
+            for number, receipt in zip(numbers, receipts_plan):
+                receipts.append(StockReceipt(
+                    GRN_ID=number, received_date=self.day(), supplier_dn_no=RECEIPT_DN_NO,
+                    supplier_invoice_no=f'SUP-{rng.randrange(10 ** 6):06d}', status=rng.choices(['Submitted', 'Draft'], [90, 10])[0],
+                ))
+                items[number] = []
+                for serials in receipt:
+                    product_id, unit_price, _ = rng.choice(products)
+                    items[number].append((StockReceiptItem(
+                        product_id=product_id, qty_ordered=serials, qty_received=serials, accepted_qty=serials,
+                        stock_dim='Serial', unit_price=unit_price, total=(serials * unit_price).quantize(CENT),
+                    ), serials))
+            with transaction.atomic():
+                StockReceipt.objects.bulk_create(receipts, batch_size=self.chunk_size)
+                ids = dict(StockReceipt.objects.filter(GRN_ID__in=numbers).values_list('GRN_ID', 'id'))
+                for number, receipt_items in items.items():
+                    for item, _ in receipt_items:
+                        item.stock_receipt_id = ids[number]
+                StockReceiptItem.objects.bulk_create([item for receipt_items in items.values() for item, _ in receipt_items],
+                                                     batch_size=self.chunk_size)
+                # bulk_create() only sets primary keys on some backends; match the items back in creation order
+                item_ids = {}
+                for receipt_id, item_id in StockReceiptItem.objects.filter(stock_receipt_id__in=ids.values()).order_by('id').values_list('stock_receipt_id', 'id'):
+                    item_ids.setdefault(receipt_id, []).append(item_id)
+                serial_numbers = [
+                    SerialNumber(stock_receipt_item_id=item_id, serial_no=f'{number}-{position:02d}-{serial:04d}')
+                    for number, receipt_items in items.items()
+                    for position, ((_, serials), item_id) in enumerate(zip(receipt_items, item_ids[ids[number]]), 1)
+                    for serial in range(1, serials + 1)
+                ]
+                SerialNumber.objects.bulk_create(serial_numbers, batch_size=self.chunk_size)
+            if self.index:
+                reindex('stock_receipt', StockReceipt.objects.filter(id__in=ids.values()))
+            created += len(serial_numbers)
+        self.log(f'Created {created} serial numbers on {len(plan)} stock receipts')
+
+    def generate_attendance(self, employees, days):
+        """Working-day attendance: ~93% present with check-in/out (some with a lunch break), the rest absent."""
+        rng = self.rng
+        # Continue the numbering of earlier runs, usernames are unique
+        offset = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+        usernames = [f'{USERNAME_PREFIX}{offset + i:06d}' for i in range(employees)]
+        User.objects.bulk_create([
+            User(username=username, first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES), password='!')
+            for username in usernames
+        ], batch_size=self.chunk_size)
+        users = list(User.objects.filter(username__in=usernames).order_by('id').values_list('id', flat=True))
+        Profile.objects.bulk_create([Profile(user_id=user_id) for user_id in users], batch_size=self.chunk_size)
+
+        dates = [self.end_date - datetime.timedelta(days=back) for back in range(days)]
+        workdays = [date for date in dates if date.weekday() < 5]
+        users_per_chunk = max(1, self.chunk_size // max(1, len(workdays)))
+        punches = 0
+        for start in range(0, len(users), users_per_chunk):
+            chunk_users = users[start:start + users_per_chunk]
+            attendance, day_punches = [], []
+            for user_id in chunk_users:
+                for date in workdays:
+                    if rng.random() < 0.07:
+                        attendance.append(Attendance(user_id=user_id, date=date, total_hours=Decimal('0')))
+                        day_punches.append([])
+                        continue
+                    check_in = timezone.make_aware(datetime.datetime.combine(date, datetime.time(9)))
+                    check_in += datetime.timedelta(minutes=rng.gauss(0, 20))
+                    check_out = check_in + datetime.timedelta(hours=rng.gauss(9, 0.75))
+                    times = [check_in, check_out]
+                    worked = check_out - check_in
+                    if rng.random() < 0.2:
+                        lunch_out = check_in + datetime.timedelta(hours=rng.uniform(3.5, 4.5))
+                        lunch_in = lunch_out + datetime.timedelta(minutes=rng.uniform(20, 60))
+                        times = [check_in, lunch_out, lunch_in, check_out]
+                        worked -= lunch_in - lunch_out
+                    hours = Decimal(str(worked.total_seconds() / 3600)).quantize(CENT)
+                    attendance.append(Attendance(user_id=user_id, date=date, total_hours=hours))
+                    day_punches.append(times)
+            with transaction.atomic():
+                Attendance.objects.bulk_create(attendance, batch_size=self.chunk_size)
+                ids = dict(((user_id, date), pk) for pk, user_id, date in Attendance.objects.filter(
+                    user_id__in=chunk_users, date__in=workdays,
+                ).values_list('id', 'user_id', 'date'))
+                rows = [
+                    AttendancePunch(attendance_id=ids[row.user_id, row.date], punched_at=punched_at, is_check_in=position % 2 == 0)
+                    for row, times in zip(attendance, day_punches) for position, punched_at in enumerate(times)
+                ]
+                AttendancePunch.objects.bulk_create(rows, batch_size=self.chunk_size)
+            punches += len(rows)
+        rebuild_attendance_rollups(user_ids=users)
+        self.log(f'Created {employees} employees with {punches} attendance punches over {len(workdays)} working days')
+
+    def wipe(self):
+        """Deletes rows generated by earlier runs (recognised by their markers), in chunks."""
+        def delete(queryset, kind=None):
+            deleted = 0
+            while True:
+                ids = list(queryset.values_list('id', flat=True)[:self.chunk_size])
+                if not ids:
+                    return deleted
+                with transaction.atomic():
+                    queryset.model.objects.filter(id__in=ids).delete()
+                    if kind:
+                        SearchTerm.objects.filter(kind=kind, object_id__in=ids).delete()
+                deleted += len(ids)
+
+        counts = [
+            ('invoices', delete(Invoice.objects.filter(invoice_tags=INVOICE_TAG), 'invoice')),
+            ('stock receipts', delete(StockReceipt.objects.filter(supplier_dn_no=RECEIPT_DN_NO), 'stock_receipt')),
+            ('customers', delete(Customer.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}'), 'customer')),
+            ('products', delete(Product.objects.filter(description=PRODUCT_DESCRIPTION), 'product')),
+            ('employees', delete(User.objects.filter(username__startswith=USERNAME_PREFIX))),
+        ]
+        self.log('Deleted ' + ', '.join(f'{count} {name}' for name, count in counts))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.search import SEARCH_SOURCES, reindex
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the search index for all (or the given) types'
+
+    def add_arguments(self, parser):
+        parser.add_argument('types', nargs='*', help=f'Any of: {", ".join(SEARCH_SOURCES)}')
+
+    def handle(self, *args, **options):
+        kinds = options['types'] or list(SEARCH_SOURCES)
+        unknown = [kind for kind in kinds if kind not in SEARCH_SOURCES]
+        if unknown:
+            raise CommandError(f'Unknown types: {", ".join(unknown)}')
+        for kind in kinds:
+            count = reindex(kind)
+            self.stdout.write(self.style.SUCCESS(f'Indexed {count} {kind} records'))
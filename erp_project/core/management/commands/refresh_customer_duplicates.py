@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.customer_dedup import refresh_duplicates
+
+
+class Command(BaseCommand):
+    help = 'Recompute the cached customer duplicate groups'
+
+    def handle(self, *args, **options):
+        result = refresh_duplicates()
+        self.stdout.write(self.style.SUCCESS(f"Found {len(result['groups'])} duplicate groups"))
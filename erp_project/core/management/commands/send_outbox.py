@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.outbox import OUTBOX_BATCH_SIZE, send_pending
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbox emails in batches over a single SMTP connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=OUTBOX_BATCH_SIZE, help='Emails sent per connection')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds to wait when the outbox is empty')
+        parser.add_argument('--once', action='store_true', help='Drain the outbox once and exit')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        while True:
+            try:
+                sent, failed = send_pending(batch_size)
+            except Exception as e:
+                # e.g. the mail server is unreachable; the batch was rescheduled
+                if options['once']:
+                    raise
+                self.stderr.write(f'Outbox batch failed: {e}')
+                time.sleep(options['interval'])
+                continue
+            if sent or failed:
+                self.stdout.write(f'Sent {sent} email(s), {failed} failed')
+            if sent + failed < batch_size:
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
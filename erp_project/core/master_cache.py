@@ -0,0 +1,105 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from rest_framework import serializers
+
+from .models import Branch, Category, Color, Department, GovernmentHoliday, Role, Size, Supplier, TaxCode, UOM, Warehouse
+
+# Master/reference tables served from the shared cache. Each has a version
+# key that core.signals bumps on save/delete; every cached entry embeds the
+# versions it was built from, so edits are visible to all processes at once.
+MASTER_MODELS = (Category, TaxCode, UOM, Warehouse, Size, Color, Supplier, Branch, Department, Role, GovernmentHoliday)
+MASTER_CACHE_TIMEOUT = 60 * 60
+
+
+def _version_key(model):
+    return 'master_version:%s' % model._meta.label_lower
+
+
+def _modified_key(model):
+    return 'master_modified:%s' % model._meta.label_lower
+
+
+def get_version(model):
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        # Start from a fresh number so entries written under an evicted
+        # version can never be picked up again.
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(model):
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time() * 1000), None)
+    cache.set(_modified_key(model), int(time.time()), None)
+
+
+def get_versions(models):
+    return '.'.join(str(get_version(model)) for model in models)
+
+
+def get_last_modified(models):
+    """Unix time of the latest save/delete on any of ``models``."""
+    latest = 0
+    for model in models:
+        key = _modified_key(model)
+        modified = cache.get(key)
+        if modified is None:
+            # Unknown (never changed since the cache was filled): assume now.
+            cache.add(key, int(time.time()), None)
+            modified = cache.get(key)
+        latest = max(latest, modified)
+    return latest
+
+
+def get_master_objects(model):
+    """Returns {pk: instance} for every row of a master-data table."""
+    key = 'master_objects:%s:%s' % (model._meta.label_lower, get_version(model))
+    objects = cache.get(key)
+    if objects is None:
+        objects = {obj.pk: obj for obj in model._default_manager.order_by('pk')}
+        cache.set(key, objects, MASTER_CACHE_TIMEOUT)
+    return objects
+
+
+def cached_list_data(request, models, build):
+    """
+    Returns the response payload built by ``build()`` for this path and
+    query string, cached until any of ``models`` changes.
+    """
+    query = hashlib.md5(request.META.get('QUERY_STRING', '').encode()).hexdigest()
+    key = 'master_list:%s:%s:%s' % (request.path, get_versions(models), query)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, MASTER_CACHE_TIMEOUT)
+    return data
+
+
+class MasterPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField for master-data tables that validates against the
+    cached rows instead of querying the table. Only for unfiltered querysets.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            if self.pk_field is not None:
+                pk = self.pk_field.to_internal_value(data)
+            else:
+                pk = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = get_master_objects(self.get_queryset().model).get(pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
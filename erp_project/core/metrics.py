@@ -0,0 +1,270 @@
+import contextvars
+import os
+import socket
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.filebased import FileBasedCache
+from django.db import connections
+
+# Request latency buckets (seconds) of erp_http_request_duration_seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# How often a worker copies its counters to the shared cache, where
+# /api/metrics/ adds up the copies of every worker process
+FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+SNAPSHOT_TIMEOUT = 24 * 60 * 60
+WORKERS_KEY = 'metrics_workers'
+_worker = f'{socket.gethostname()}:{os.getpid()}'
+
+_current = contextvars.ContextVar('request_stats', default=None)
+_MISSING = object()
+
+
+class RequestStats:
+    """What one request spent: DB queries, cache lookups and serialization."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serialize_time = 0.0
+        self._serializing = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+
+def current_stats():
+    """RequestStats of the request being handled, or None outside PerformanceMiddleware."""
+    return _current.get()
+
+
+@contextmanager
+def serializing():
+    """Counts the enclosed time as serializer time (nested blocks count once)."""
+    stats = _current.get()
+    if stats is None or stats._serializing:
+        yield
+        return
+    stats._serializing += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats._serializing -= 1
+        stats.serialize_time += time.perf_counter() - start
+
+
+def time_serializer_data():
+    """
+    Times Serializer.data / ListSerializer.data, which every view goes
+    through to build its payload. Called once from CoreConfig.ready().
+    """
+    from rest_framework import serializers
+
+    for serializer_class in (serializers.Serializer, serializers.ListSerializer):
+        data = serializer_class.data
+        if getattr(data.fget, 'timed', False):
+            continue
+
+        def timed_data(self, _fget=data.fget):
+            with serializing():
+                return _fget(self)
+        timed_data.timed = True
+        serializer_class.data = property(timed_data)
+
+
+class MeteredFileBasedCache(FileBasedCache):
+    """FileBasedCache that counts hits and misses of the current request."""
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        self._count(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        stats = _current.get()
+        if stats is not None:
+            stats.cache_hits += len(found)
+            stats.cache_misses += len(keys) - len(found)
+        return found
+
+    @staticmethod
+    def _count(hit):
+        stats = _current.get()
+        if stats is not None:
+            if hit:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+
+
+class Registry:
+    """
+    Per-process counters and histograms, keyed by (metric, labels).
+    Snapshots of every process are kept in the shared cache so the
+    metrics endpoint reports all workers, whichever one serves it.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.flushed_at = 0.0
+
+    def add(self, name, labels, amount=1):
+        key = (name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self.lock:
+            buckets, total, count = self.histograms.get(key) or ([0] * len(LATENCY_BUCKETS), 0.0, 0)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+            self.histograms[key] = (buckets, total + value, count + 1)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'counters': dict(self.counters),
+                'histograms': {key: (list(buckets), total, count) for key, (buckets, total, count) in self.histograms.items()},
+            }
+
+    def flush(self, force=False):
+        now = time.monotonic()
+        if not force and now - self.flushed_at < FLUSH_INTERVAL:
+            return
+        self.flushed_at = now
+        cache.set(f'metrics:{_worker}', self.snapshot(), SNAPSHOT_TIMEOUT)
+        workers = cache.get(WORKERS_KEY) or []
+        if _worker not in workers:
+            cache.set(WORKERS_KEY, workers + [_worker], None)
+
+    def collect(self):
+        """Sum of the snapshots of every live worker, this one up to date."""
+        self.flush(force=True)
+        workers = cache.get(WORKERS_KEY) or []
+        snapshots = cache.get_many([f'metrics:{worker}' for worker in workers])
+        live = [worker for worker in workers if f'metrics:{worker}' in snapshots]
+        if live != workers:
+            cache.set(WORKERS_KEY, live, None)
+        counters, histograms = {}, {}
+        for snapshot in snapshots.values():
+            for key, value in snapshot['counters'].items():
+                counters[key] = counters.get(key, 0) + value
+            for key, (buckets, total, count) in snapshot['histograms'].items():
+                merged = histograms.setdefault(key, [[0] * len(LATENCY_BUCKETS), 0.0, 0])
+                merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+                merged[1] += total
+                merged[2] += count
+        return counters, histograms
+
+
+registry = Registry()
+
+METRIC_HELP = {
+    'erp_http_requests_total': ('counter', 'Requests handled, by route, method and status code.'),
+    'erp_http_request_duration_seconds': ('histogram', 'Request latency, by route and method.'),
+    'erp_http_db_queries_total': ('counter', 'Database queries run by requests.'),
+    'erp_http_db_seconds_total': ('counter', 'Time requests spent in database queries.'),
+    'erp_http_cache_hits_total': ('counter', 'Cache lookups that found a value.'),
+    'erp_http_cache_misses_total': ('counter', 'Cache lookups that found nothing.'),
+    'erp_http_serializer_seconds_total': ('counter', 'Time requests spent serializing payloads.'),
+    'erp_http_response_bytes_total': ('counter', 'Response body bytes sent (streaming responses excluded).'),
+}
+
+
+def _labels(names, values):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+def render_prometheus():
+    """All workers' metrics in the Prometheus text exposition format."""
+    counters, histograms = registry.collect()
+    lines = []
+    for name, (kind, help_text) in METRIC_HELP.items():
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'histogram':
+            for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, value in [*zip(LATENCY_BUCKETS, buckets), ('+Inf', count)]:
+                    lines.append(f'{name}_bucket{_labels(("route", "method", "le"), (*labels, bound))} {value}')
+                lines.append(f'{name}_sum{_labels(("route", "method"), labels)} {total}')
+                lines.append(f'{name}_count{_labels(("route", "method"), labels)} {count}')
+        else:
+            label_names = ('route', 'method', 'status') if name == 'erp_http_requests_total' else ('route', 'method')
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{name}{_labels(label_names, labels)} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+def _route(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None else 'unmatched'
+
+
+class PerformanceMiddleware:
+    """
+    Records latency, DB queries and time, cache hits/misses, serializer
+    time and response size per route, reports the request's figures in a
+    Server-Timing header and adds them to the /api/metrics/ counters.
+    Routes are the URL patterns (``api/crm/quotations/<int:pk>/``), so
+    the number of series stays bounded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(stats.record_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        elapsed = time.perf_counter() - start
+
+        size = None if response.streaming else len(response.content)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"',
+            f'cache;desc="{stats.cache_hits} hits, {stats.cache_misses} misses"',
+            f'serialize;dur={stats.serialize_time * 1000:.1f}',
+            f'total;dur={elapsed * 1000:.1f}',
+        ])
+
+        route, method = _route(request), request.method
+        labels = (route, method)
+        registry.add('erp_http_requests_total', (route, method, response.status_code))
+        registry.observe('erp_http_request_duration_seconds', labels, elapsed)
+        registry.add('erp_http_db_queries_total', labels, stats.queries)
+        registry.add('erp_http_db_seconds_total', labels, stats.db_time)
+        registry.add('erp_http_cache_hits_total', labels, stats.cache_hits)
+        registry.add('erp_http_cache_misses_total', labels, stats.cache_misses)
+        registry.add('erp_http_serializer_seconds_total', labels, stats.serialize_time)
+        if size is not None:
+            registry.add('erp_http_response_bytes_total', labels, size)
+        registry.flush()
+        return response
+
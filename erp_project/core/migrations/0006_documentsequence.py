@@ -0,0 +1,28 @@
+# Generated by Django 4.2.23 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_alter_customer_assigned_sales_rep'),
+        ('core', '0005_candidatedocument_alter_candidate_aadhar_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('doc_type', models.CharField(max_length=50)),
+                ('scope', models.CharField(blank=True, default='', max_length=50)),
+                ('next_value', models.BigIntegerField(default=1)),
+            ],
+            options={
+                'verbose_name': 'Document Sequence',
+                'verbose_name_plural': 'Document Sequences',
+                'unique_together': {('doc_type', 'scope')},
+            },
+        ),
+    ]
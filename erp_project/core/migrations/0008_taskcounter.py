@@ -0,0 +1,26 @@
+# Generated by Django 4.2.23 on 2026-10-18 11:00
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0007_outboxemail'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('not_started', models.IntegerField(default=0)),
+                ('in_progress', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('awaiting_feedback', models.IntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    # Dashboards read only the rollups, so past months must be there from the start
+    Attendance = apps.get_model('core', 'Attendance')
+    AttendanceMonthly = apps.get_model('core', 'AttendanceMonthly')
+    months = Attendance.objects.annotate(
+        year=ExtractYear('date'), month=ExtractMonth('date'),
+    ).values('user_id', 'year', 'month').annotate(
+        present_days=Count('id', filter=Q(total_hours__gt=0)),
+        absent_days=Count('id', filter=Q(total_hours=0)),
+        hours=Sum('total_hours'),
+    ).order_by()
+    AttendanceMonthly.objects.bulk_create([
+        AttendanceMonthly(
+            user_id=row['user_id'], year=row['year'], month=row['month'],
+            present=row['present_days'], absent=row['absent_days'], total_hours=row['hours'] or 0,
+        )
+        for row in months.iterator(chunk_size=1000)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0008_taskcounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceMonthly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('present', models.IntegerField(default=0)),
+                ('absent', models.IntegerField(default=0)),
+                ('total_hours', models.DecimalField(decimal_places=2, default=0, max_digits=8)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_months', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'year', 'month')},
+                'indexes': [models.Index(fields=['year', 'month'], name='core_attend_year_0dae18_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:00
+
+from datetime import datetime
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def copy_check_in_times(apps, schema_editor):
+    Attendance = apps.get_model('core', 'Attendance')
+    AttendancePunch = apps.get_model('core', 'AttendancePunch')
+    punches = []
+    for attendance in Attendance.objects.only('id', 'check_in_times').iterator(chunk_size=1000):
+        times = [datetime.fromisoformat(value) for value in attendance.check_in_times or []]
+        for index, punched_at in enumerate(times):
+            punches.append(AttendancePunch(attendance_id=attendance.pk, punched_at=punched_at, is_check_in=index % 2 == 0))
+        if len(times) % 2:
+            Attendance.objects.filter(pk=attendance.pk).update(open_check_in=times[-1])
+        if len(punches) >= 1000:
+            AttendancePunch.objects.bulk_create(punches)
+            punches = []
+    AttendancePunch.objects.bulk_create(punches)
+
+
+def copy_punches_back(apps, schema_editor):
+    Attendance = apps.get_model('core', 'Attendance')
+    AttendancePunch = apps.get_model('core', 'AttendancePunch')
+    times = {}
+    for attendance_id, punched_at in AttendancePunch.objects.order_by('attendance_id', 'punched_at').values_list('attendance_id', 'punched_at'):
+        times.setdefault(attendance_id, []).append(punched_at.isoformat())
+    for attendance_id, values in times.items():
+        Attendance.objects.filter(pk=attendance_id).update(check_in_times=values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_attendancemonthly'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='open_check_in',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AttendancePunch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('punched_at', models.DateTimeField()),
+                ('is_check_in', models.BooleanField()),
+                ('attendance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='punches', to='core.attendance')),
+            ],
+            options={
+                'ordering': ['punched_at'],
+                'indexes': [models.Index(fields=['attendance', 'punched_at'], name='core_attend_attenda_a2f357_idx')],
+            },
+        ),
+        migrations.RunPython(copy_check_in_times, copy_punches_back),
+        migrations.RemoveField(
+            model_name='attendance',
+            name='check_in_times',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_attendancepunch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=30)),
+                ('object_id', models.BigIntegerField()),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField()),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['term', 'kind', 'object_id'], name='core_search_term_b50e13_idx'),
+                    models.Index(fields=['kind', 'object_id'], name='core_search_kind_afb622_idx'),
+                ],
+            },
+        ),
+    ]
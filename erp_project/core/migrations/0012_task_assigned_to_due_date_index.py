@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_searchterm'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assigned_to', 'due_date', 'id'], name='core_task_assigne_6fb9d0_idx'),
+        ),
+    ]
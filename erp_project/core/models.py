@@ -3,6 +3,7 @@ from django.contrib.auth import get_user_model
 from django.db.models import JSONField
 from django.contrib.auth.models import User
 from django.utils import timezone
+from .permissions import invalidate_role_permissions
 
 
 User = get_user_model()
@@ -42,6 +43,12 @@ class Role(models.Model):
 
     def save(self, *args, **kwargs):
         super().save(*args, **kwargs)
+        invalidate_role_permissions()
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate_role_permissions()
+        return result
 
     def __str__(self):
         return self.role
@@ -182,11 +189,10 @@ class Product(models.Model):
         return self.name
 
     def save(self, *args, **kwargs):
-        is_new = self.pk is None
+        if self.pk is None and not self.product_id:
+            from .sequences import next_document_number
+            self.product_id = next_document_number('product')
         super().save(*args, **kwargs)
-        if is_new and not self.product_id:
-            self.product_id = f'CVB{self.id:03d}'
-            Product.objects.filter(pk=self.pk).update(product_id=self.product_id)
 
     
 
@@ -254,13 +260,8 @@ class Candidate(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.employee_code:
-            last_candidate = Candidate.objects.order_by('id').last()
-            if last_candidate:
-                last_num = int(last_candidate.employee_code.replace('STA', ''))
-                new_num = last_num + 1
-            else:
-                new_num = 1
-            self.employee_code = f'STA{new_num:04d}'
+            from .sequences import next_document_number
+            self.employee_code = next_document_number('candidate')
 
         # Validate phone numbers
         phone_regex = r'^[0-9+\-\s]+$'
@@ -307,14 +308,45 @@ class GovernmentHoliday(models.Model):
 class Attendance(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     date = models.DateField()
-    check_in_times = models.JSONField(default=list)  # Array of check-in/check-out timestamps
     total_hours = models.DecimalField(max_digits=5, decimal_places=2, default=0.0)
+    open_check_in = models.DateTimeField(null=True, blank=True)  # Check-in not yet matched by a check-out
 
     class Meta:
         unique_together = ('user', 'date')
 
     def __str__(self):
         return f"{self.user.username} - {self.date} - {self.total_hours} hrs"
+
+
+class AttendancePunch(models.Model):
+    # One check-in or check-out of an Attendance day
+    attendance = models.ForeignKey(Attendance, on_delete=models.CASCADE, related_name='punches')
+    punched_at = models.DateTimeField()
+    is_check_in = models.BooleanField()
+
+    class Meta:
+        ordering = ['punched_at']
+        indexes = [models.Index(fields=['attendance', 'punched_at'])]
+
+    def __str__(self):
+        return f"{self.attendance} - {'in' if self.is_check_in else 'out'} at {self.punched_at}"
+
+
+class AttendanceMonthly(models.Model):
+    # Monthly rollup of Attendance, updated on every punch (CheckInOutView)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='attendance_months')
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    present = models.IntegerField(default=0)
+    absent = models.IntegerField(default=0)
+    total_hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('user', 'year', 'month')
+        indexes = [models.Index(fields=['year', 'month'])]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.year}-{self.month:02d}: {self.present} present, {self.absent} absent"
     
 
 from django.db import models
@@ -338,8 +370,23 @@ class Task(models.Model):
     ])
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['assigned_to', 'due_date', 'id'])]
+
     def __str__(self):
         return self.name
+
+
+class TaskCounter(models.Model):
+    # Per-user task counts by status, kept in step with Task by core.signals
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='task_counter')
+    not_started = models.IntegerField(default=0)
+    in_progress = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    awaiting_feedback = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"Task counts for {self.user}"
     
 
 
@@ -387,3 +434,57 @@ class Customer(models.Model):
     def __str__(self):
         return f"{self.first_name} {self.last_name} ({self.customer_id})"
         
+
+class SearchTerm(models.Model):
+    # Inverted index row: ``term`` occurs in object ``object_id`` of ``kind`` (see core.search)
+    kind = models.CharField(max_length=30)
+    object_id = models.BigIntegerField()
+    term = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['term', 'kind', 'object_id']),
+            models.Index(fields=['kind', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.term} -> {self.kind} {self.object_id}"
+
+
+class DocumentSequence(models.Model):
+    doc_type = models.CharField(max_length=50)
+    scope = models.CharField(max_length=50, blank=True, default='')  # e.g. branch code or financial year
+    next_value = models.BigIntegerField(default=1)
+
+    def __str__(self):
+        return f"{self.doc_type} {self.scope} ({self.next_value})".strip()
+
+    class Meta:
+        unique_together = ('doc_type', 'scope')
+        verbose_name = "Document Sequence"
+        verbose_name_plural = "Document Sequences"
+
+
+class OutboxEmail(models.Model):
+    STATUS_CHOICES = [('Pending', 'Pending'), ('Sending', 'Sending'), ('Sent', 'Sent'), ('Failed', 'Failed')]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=10, default='plain')  # 'plain' or 'html'
+    from_email = models.CharField(max_length=255, blank=True)
+    to = JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='Pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'next_attempt_at'])]
+        verbose_name = "Outbox Email"
+        verbose_name_plural = "Outbox Emails"
@@ -0,0 +1,118 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from .models import OutboxEmail
+
+logger = logging.getLogger(__name__)
+
+# Delivery settings for the outbox worker (manage.py send_outbox)
+OUTBOX_BATCH_SIZE = getattr(settings, 'OUTBOX_BATCH_SIZE', 50)
+OUTBOX_MAX_ATTEMPTS = getattr(settings, 'OUTBOX_MAX_ATTEMPTS', 5)
+OUTBOX_RETRY_BASE_SECONDS = getattr(settings, 'OUTBOX_RETRY_BASE_SECONDS', 60)
+# How long a claimed email waits for its worker before another may send it
+OUTBOX_CLAIM_SECONDS = getattr(settings, 'OUTBOX_CLAIM_SECONDS', 15 * 60)
+
+
+def queue_email(subject, body, to, from_email=None, html=False):
+    """
+    Stores an email in the outbox instead of sending it. The row is part of
+    the caller's transaction, so a rolled-back request sends nothing; the
+    send_outbox command delivers it.
+    """
+    return OutboxEmail.objects.create(
+        subject=subject,
+        body=body,
+        content_subtype='html' if html else 'plain',
+        from_email=from_email or '',
+        to=list(to),
+    )
+
+
+def _retry_delay(attempts):
+    # 1, 2, 4, 8, ... times the base delay
+    return timedelta(seconds=OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def _claim(batch_size):
+    """
+    Marks up to ``batch_size`` due emails as Sending and commits, so other
+    workers skip them while SMTP runs outside any transaction. The claim
+    counts as an attempt and expires after OUTBOX_CLAIM_SECONDS, so rows of
+    a worker that died are picked up again.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # skip_locked lets several workers claim side by side
+        emails = list(
+            OutboxEmail.objects.select_for_update(skip_locked=True)
+            .filter(status__in=['Pending', 'Sending'], next_attempt_at__lte=now)
+            .order_by('next_attempt_at', 'id')[:batch_size]
+        )
+        for email in emails:
+            email.status = 'Sending'
+            email.attempts += 1
+            email.next_attempt_at = now + timedelta(seconds=OUTBOX_CLAIM_SECONDS)
+        OutboxEmail.objects.bulk_update(emails, ['status', 'attempts', 'next_attempt_at'])
+    return emails
+
+
+def _failed(email, error):
+    logger.warning(f"Failed to send outbox email {email.id} to {email.to}: {error}")
+    email.last_error = str(error)
+    if email.attempts >= OUTBOX_MAX_ATTEMPTS:
+        email.status = 'Failed'
+    else:
+        email.status = 'Pending'
+        email.next_attempt_at = timezone.now() + _retry_delay(email.attempts)
+    email.save(update_fields=['status', 'next_attempt_at', 'last_error'])
+
+
+def send_pending(batch_size=OUTBOX_BATCH_SIZE, connection=None):
+    """
+    Sends up to ``batch_size`` due emails over one SMTP connection and
+    returns (sent, failed). Failed emails are retried with exponential
+    backoff until OUTBOX_MAX_ATTEMPTS is reached. When the connection
+    cannot be opened the whole batch is rescheduled that way and the error
+    is raised.
+    """
+    sent = failed = 0
+    emails = _claim(batch_size)
+    if not emails:
+        return sent, failed
+
+    connection = connection or get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        for email in emails:
+            _failed(email, e)
+        raise
+    try:
+        for email in emails:
+            msg = EmailMessage(
+                email.subject, email.body, email.from_email or None, email.to,
+                connection=connection,
+            )
+            msg.content_subtype = email.content_subtype
+            try:
+                msg.send()
+            except Exception as e:
+                _failed(email, e)
+                failed += 1
+            else:
+                email.status = 'Sent'
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                # Bodies may hold credentials (see ManageUsersView);
+                # don't keep them once delivered.
+                email.body = ''
+                email.save(update_fields=['body', 'status', 'sent_at', 'last_error'])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
@@ -0,0 +1,181 @@
+import base64
+import datetime
+import decimal
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Q
+from rest_framework.exceptions import ParseError
+
+# Cursor pagination settings
+TOTAL_CACHE_TIMEOUT = 60  # seconds a cached total_entries stays valid
+MAX_PER_PAGE = 500
+
+
+class InvalidCursor(ParseError):
+    default_detail = 'Invalid cursor'
+
+
+def _encode_value(value):
+    # Keep full precision: DjangoJSONEncoder drops microseconds from datetimes,
+    # which would make the cursor skip or repeat rows sharing a millisecond.
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+    if not isinstance(values, list):
+        raise InvalidCursor()
+    return values
+
+
+def cached_count(queryset, timeout=TOTAL_CACHE_TIMEOUT):
+    """
+    Returns queryset.count(), memoised in the cache for a short while so that
+    paging through a large table does not re-run COUNT(*) on every request.
+    """
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except Exception:
+        return queryset.count()
+    key = 'list_total:%s' % hashlib.md5(
+        ('%s|%s|%r' % (queryset.model._meta.label, sql, params)).encode()
+    ).hexdigest()
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, timeout)
+    return total
+
+
+class ListPagination:
+    """
+    Shared pagination for list endpoints.
+
+    Two modes are supported:
+
+    * page mode (``?page=&per_page=``) keeps the existing response contract
+      (``total_pages``, ``current_page``, ``total_entries``) with an exact
+      count, so rows created a moment ago are reachable on the last page.
+    * cursor mode (``?cursor=``) uses keyset pagination over ``ordering``
+      instead of OFFSET, so every page costs the same regardless of depth.
+      Pass an empty ``cursor`` to get the first page and follow
+      ``next_cursor`` afterwards. ``total_entries`` comes from a short-lived
+      cached count; ``include_total=false`` skips it.
+
+    ``ordering`` must end with a unique column (normally ``id``) so the
+    cursor is unambiguous; the queryset is re-ordered by it in both modes.
+    Pass ``cache_total=False`` when the caller caches the whole response.
+    """
+
+    def __init__(self, ordering=('id',), per_page=10, cache_total=True):
+        self.ordering = tuple(ordering)
+        self.default_per_page = per_page
+        self.cache_total = cache_total
+        self.queryset = None
+        self.meta = {}
+
+    @staticmethod
+    def is_requested(request):
+        params = request.query_params
+        return 'cursor' in params or 'page' in params or 'per_page' in params
+
+    @staticmethod
+    def is_cursor_request(request):
+        return 'cursor' in request.query_params
+
+    def get_per_page(self, request):
+        try:
+            per_page = int(request.query_params.get('per_page', self.default_per_page))
+        except (TypeError, ValueError):
+            per_page = self.default_per_page
+        return max(1, min(per_page, MAX_PER_PAGE))
+
+    def paginate_queryset(self, queryset, request):
+        queryset = queryset.order_by(*self.ordering)
+        self.queryset = queryset
+        if self.is_cursor_request(request):
+            return self.paginate_cursor(queryset, request)
+        return self.paginate_pages(queryset, request)
+
+    def paginate_pages(self, queryset, request):
+        per_page = self.get_per_page(request)
+        try:
+            page = int(request.query_params.get('page', 1))
+        except (TypeError, ValueError):
+            page = 1
+        paginator = Paginator(queryset, per_page)
+        page_obj = paginator.get_page(page)
+        self.meta = {
+            'total_pages': paginator.num_pages,
+            'current_page': page,
+            'total_entries': paginator.count,
+        }
+        return list(page_obj)
+
+    def paginate_cursor(self, queryset, request):
+        per_page = self.get_per_page(request)
+        cursor = request.query_params.get('cursor')
+        if cursor:
+            values = decode_cursor(cursor)
+            if len(values) != len(self.ordering):
+                raise InvalidCursor()
+            queryset = queryset.filter(self._after(values))
+
+        rows = list(queryset[:per_page + 1])
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+
+        next_cursor = None
+        if has_more:
+            next_cursor = encode_cursor([self._value(rows[-1], field) for field in self.ordering])
+
+        self.meta = {
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+            'per_page': per_page,
+        }
+        if request.query_params.get('include_total', 'true').lower() != 'false':
+            # Count over the unfiltered queryset, not the slice after the cursor.
+            self.meta['total_entries'] = self.count(self.queryset)
+        return rows
+
+    def count(self, queryset):
+        return cached_count(queryset) if self.cache_total else queryset.count()
+
+    def get_meta(self):
+        return self.meta
+
+    def _after(self, values):
+        # (a, b, c) > (x, y, z) expanded as
+        # a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z),
+        # honouring the direction of each ordering column.
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            lookup = '%s__lt' % name if field.startswith('-') else '%s__gt' % name
+            condition |= Q(**equal, **{lookup: value})
+            equal[name] = value
+        return condition
+
+    @staticmethod
+    def _value(obj, field):
+        if isinstance(obj, dict):  # values() rows
+            return obj[field.lstrip('-')]
+        return getattr(obj, field.lstrip('-'))
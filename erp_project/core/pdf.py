@@ -0,0 +1,169 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.http import FileResponse, JsonResponse
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Table, TableStyle
+
+logger = logging.getLogger(__name__)
+
+# Bump when render_pdf changes so previously cached files are not served
+RENDERER_VERSION = 1
+PDF_RENDER_TIMEOUT = 60  # seconds
+PDF_RETRY_AFTER = 10  # seconds, suggested to clients when a render times out
+
+_pool = None
+_pool_lock = threading.Lock()
+_in_flight = {}  # path -> Event, so concurrent requests share one render
+_in_flight_lock = threading.Lock()
+
+
+class PdfRenderTimeout(Exception):
+    pass
+
+
+def paragraph(text, font_name='Helvetica', font_size=12):
+    return ('paragraph', text, font_name, font_size)
+
+
+def table(data, style=()):
+    """``style`` is a list of TableStyle commands."""
+    return ('table', [list(row) for row in data], list(style))
+
+
+def render_pdf(blocks):
+    """
+    Lays out ``blocks`` (built with paragraph()/table()) and returns the PDF
+    bytes. Runs in the render pool, so it only gets plain picklable data.
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter)
+    elements = []
+    for block in blocks:
+        if block[0] == 'paragraph':
+            _, text, font_name, font_size = block
+            style = ParagraphStyle(f'{font_name}-{font_size}', fontName=font_name, fontSize=font_size, leading=font_size * 1.2)
+            elements.append(Paragraph(text, style))
+        else:
+            _, data, style = block
+            element = Table(data)
+            element.setStyle(TableStyle(style))
+            elements.append(element)
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=settings.PDF_RENDER_WORKERS)
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        _pool = None
+
+
+def _content_version(blocks):
+    # The blocks carry everything that ends up on the page, so their digest
+    # changes exactly when the rendered document would.
+    return hashlib.sha256(repr((RENDERER_VERSION, blocks)).encode()).hexdigest()[:16]
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _remove_stale(directory, pk, current):
+    prefix = f'{pk}-'
+    for name in os.listdir(directory):
+        if name.startswith(prefix) and name.endswith('.pdf') and name != current:
+            try:
+                os.remove(os.path.join(directory, name))
+            except OSError:
+                pass
+
+
+def _write_result(path, future):
+    if not future.cancelled() and future.exception() is None:
+        _write_atomic(path, future.result())
+
+
+def _render_to_file(path, blocks):
+    try:
+        future = _get_pool().submit(render_pdf, blocks)
+        data = future.result(timeout=PDF_RENDER_TIMEOUT)
+    except BrokenProcessPool:
+        logger.warning("PDF render pool broke, rendering in-process")
+        _reset_pool()
+        data = render_pdf(blocks)
+    except FuturesTimeoutError:
+        # Still queued: drop it. Already rendering: keep the file for the
+        # client's retry rather than throwing the work away.
+        if not future.cancel():
+            future.add_done_callback(lambda done: _write_result(path, done))
+        logger.warning(f"PDF render of {path} timed out after {PDF_RENDER_TIMEOUT}s")
+        raise PdfRenderTimeout(path)
+    _write_atomic(path, data)
+
+
+def get_pdf_path(kind, pk, blocks):
+    """
+    Returns the path of the cached PDF for document ``kind``/``pk`` with the
+    given content, rendering it in the process pool on a miss.
+    """
+    directory = os.path.join(settings.PDF_CACHE_LOCATION, kind)
+    name = f'{pk}-{_content_version(blocks)}.pdf'
+    path = os.path.join(directory, name)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(directory, exist_ok=True)
+    with _in_flight_lock:
+        event = _in_flight.get(path)
+        owner = event is None
+        if owner:
+            event = _in_flight[path] = threading.Event()
+    if not owner:
+        # Another request is already rendering this version
+        event.wait(PDF_RENDER_TIMEOUT)
+        if os.path.exists(path):
+            return path
+
+    try:
+        _render_to_file(path, blocks)
+        _remove_stale(directory, pk, name)
+    finally:
+        if owner:
+            with _in_flight_lock:
+                _in_flight.pop(path, None)
+            event.set()
+    return path
+
+
+def pdf_response(kind, pk, filename, blocks):
+    """
+    FileResponse streaming the (cached) PDF of a document as an attachment,
+    or a 503 with Retry-After when rendering takes too long.
+    """
+    try:
+        path = get_pdf_path(kind, pk, blocks)
+    except PdfRenderTimeout:
+        response = JsonResponse({'error': 'The PDF is still being generated, please retry shortly'}, status=503)
+        response['Retry-After'] = str(PDF_RETRY_AFTER)
+        return response
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type='application/pdf')
@@ -1,5 +1,93 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
 from rest_framework import permissions
 
+# Permission category for each view, by view class name
+VIEW_CATEGORIES = {}
+for _category, _views in {
+    'dashboard': ['DepartmentListView', 'DepartmentDetailView'],
+    'task': ['RoleView', 'RoleDetailView'],
+    'projectTracker': ['BranchListView', 'BranchDetailView'],
+    'onboarding': ['ManageUsersView', 'ManageUserDetailView', 'OnboardingListView', 'OnboardingDetailView'],
+    'inventory': ['ProductListView', 'ProductDetailView', 'ProductImportView', 'CategoryListView', 'CategoryDetailView', 'TaxCodeListView', 'TaxCodeDetailView', 'UOMListView', 'UOMDetailView', 'WarehouseListView', 'WarehouseDetailView', 'SizeListView', 'SizeDetailView', 'ColorListView', 'ColorDetailView', 'SupplierListView', 'SupplierDetailView'],
+    'attendance': ['AttendanceView', 'CheckInOutView'],
+    'profile': ['ProfileView'],
+}.items():
+    for _view in _views:
+        VIEW_CATEGORIES[_view] = _category
+
+# One bit per action stored in Role.permissions
+VIEW, CREATE, EDIT, DELETE = 1, 2, 4, 8
+ACTION_BITS = {'view': VIEW, 'create': CREATE, 'edit': EDIT, 'delete': DELETE}
+METHOD_BITS = {
+    'GET': VIEW, 'HEAD': VIEW, 'OPTIONS': VIEW,
+    'POST': CREATE,
+    'PUT': EDIT, 'PATCH': EDIT,
+    'DELETE': DELETE,
+}
+
+ROLE_PERMISSIONS_VERSION_KEY = 'role_permissions_version'
+ROLE_PERMISSIONS_TIMEOUT = 60 * 60
+
+# Per-process copy of the compiled matrices, valid for one cache version
+_compiled_roles = {'version': None, 'roles': {}}
+
+
+def compile_permissions(role_permissions):
+    """Turns a Role.permissions document into {category: action bitmask}."""
+    matrix = {}
+    if not isinstance(role_permissions, dict):
+        return matrix
+    for category, actions in role_permissions.items():
+        if not isinstance(actions, dict):
+            continue
+        mask = 0
+        for action, bit in ACTION_BITS.items():
+            if actions.get(action, False):
+                mask |= bit
+        matrix[category] = mask
+    return matrix
+
+
+def _current_version():
+    version = cache.get(ROLE_PERMISSIONS_VERSION_KEY)
+    if version is None:
+        # Start from a fresh number so entries written under an evicted
+        # version can never be picked up again.
+        cache.add(ROLE_PERMISSIONS_VERSION_KEY, int(time.time() * 1000), None)
+        version = cache.get(ROLE_PERMISSIONS_VERSION_KEY)
+    return version
+
+
+def get_role_matrix(role_id):
+    version = _current_version()
+    if _compiled_roles['version'] != version:
+        _compiled_roles['version'] = version
+        _compiled_roles['roles'] = {}
+
+    matrix = _compiled_roles['roles'].get(role_id)
+    if matrix is None:
+        cache_key = 'role_permissions:%s:%s' % (version, role_id)
+        matrix = cache.get(cache_key)
+        if matrix is None:
+            from .models import Role
+            role_permissions = Role.objects.filter(pk=role_id).values_list('permissions', flat=True).first()
+            matrix = compile_permissions(role_permissions)
+            cache.set(cache_key, matrix, ROLE_PERMISSIONS_TIMEOUT)
+        _compiled_roles['roles'][role_id] = matrix
+    return matrix
+
+
+def invalidate_role_permissions():
+    try:
+        cache.incr(ROLE_PERMISSIONS_VERSION_KEY)
+    except ValueError:
+        cache.set(ROLE_PERMISSIONS_VERSION_KEY, int(time.time() * 1000), None)
+
+
 class RoleBasedPermission(permissions.BasePermission):
     def has_permission(self, request, view):
         # Superusers have full access
@@ -7,45 +95,28 @@ class RoleBasedPermission(permissions.BasePermission):
             return True
 
         # Non-superusers must have a role
-        if not request.user.profile.role:
+        role_id = request.user.profile.role_id
+        if not role_id:
             return False
 
-        # Get the user's role permissions
-        role_permissions = request.user.profile.role.permissions
-
         # Map the view to a permission category
-        permission_category = None
-        if view.__class__.__name__ in ['DepartmentListView', 'DepartmentDetailView']:
-            permission_category = 'dashboard'
-        elif view.__class__.__name__ in ['RoleView', 'RoleDetailView']:
-            permission_category = 'task'
-        elif view.__class__.__name__ in ['BranchListView', 'BranchDetailView']:
-            permission_category = 'projectTracker'
-        elif view.__class__.__name__ in ['ManageUsersView', 'ManageUserDetailView', 'OnboardingListView', 'OnboardingDetailView']:
-            permission_category = 'onboarding'
-        elif view.__class__.__name__ in ['ProductListView', 'ProductDetailView', 'ProductImportView', 'CategoryListView', 'CategoryDetailView', 'TaxCodeListView', 'TaxCodeDetailView', 'UOMListView', 'UOMDetailView', 'WarehouseListView', 'WarehouseDetailView', 'SizeListView', 'SizeDetailView', 'ColorListView', 'ColorDetailView', 'SupplierListView', 'SupplierDetailView']:
-            permission_category = 'inventory'
-        elif view.__class__.__name__ in ['AttendanceView', 'CheckInOutView']:
-            permission_category = 'attendance'
-        elif view.__class__.__name__ in ['ProfileView']:
-            permission_category = 'profile'
-        else:
+        permission_category = VIEW_CATEGORIES.get(view.__class__.__name__)
+        if permission_category is None:
             return False  # Deny access by default for unmapped views
 
-        # Check if the category exists in permissions
-        if permission_category not in role_permissions:
+        bit = METHOD_BITS.get(request.method)
+        if bit is None:
             return False
 
-        category_permissions = role_permissions[permission_category]
+        return bool(get_role_matrix(role_id).get(permission_category, 0) & bit)
+
 
-        # Check specific permissions based on the request method
-        if request.method in permissions.SAFE_METHODS:  # GET, HEAD, OPTIONS
-            return category_permissions.get('view', False)
-        elif request.method == 'POST':
-            return category_permissions.get('create', False)
-        elif request.method in ['PUT', 'PATCH']:
-            return category_permissions.get('edit', False)
-        elif request.method == 'DELETE':
-            return category_permissions.get('delete', False)
+class MetricsPermission(permissions.BasePermission):
+    """Staff users, or a scraper presenting settings.METRICS_TOKEN as a bearer token."""
 
-        return False
\ No newline at end of file
+    def has_permission(self, request, view):
+        token = getattr(settings, 'METRICS_TOKEN', '')
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        if token and constant_time_compare(header, f'Bearer {token}'):
+            return True
+        return bool(request.user and request.user.is_staff)
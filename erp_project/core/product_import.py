@@ -0,0 +1,200 @@
+from decimal import Decimal
+
+import pandas as pd
+from django.db import connection, transaction
+from django.db.models import Max
+
+from .master_cache import get_master_objects
+from .models import Category, Color, Product, Size, Supplier, TaxCode, UOM, Warehouse
+from .search import reindex
+from .sequences import next_document_numbers
+
+REQUIRED_COLUMNS = ['name', 'product_type', 'category', 'status', 'stock_level', 'unit_price']
+
+# Dropdown columns: the sheet holds the name (or id) of the master row
+LOOKUP_COLUMNS = {
+    'category': Category,
+    'tax_code': TaxCode,
+    'uom': UOM,
+    'warehouse': Warehouse,
+    'size': Size,
+    'color': Color,
+    'supplier': Supplier,
+}
+
+CHOICE_COLUMNS = ['product_type', 'status', 'product_usage']
+
+# column -> (max absolute value, whole numbers only)
+NUMERIC_COLUMNS = {
+    'unit_price': (Decimal('99999999.99'), False),
+    'discount': (Decimal('999.99'), False),
+    'quantity': (2147483647, True),
+    'stock_level': (2147483647, True),
+    'reorder_level': (2147483647, True),
+}
+
+TEXT_COLUMNS = ['description', 'weight', 'specifications', 'related_products', 'sub_category']
+
+IMPORT_CHUNK_SIZE = 1000
+
+
+def read_sheet(file):
+    """Reads an uploaded .xlsx/.csv with every cell as text (or NaN when empty)."""
+    if file.name.endswith('.xlsx'):
+        df = pd.read_excel(file, dtype=str)
+    else:
+        df = pd.read_csv(file, dtype=str)
+    df.columns = [str(column).strip() for column in df.columns]
+    return df
+
+
+def _lookup_map(model):
+    """{lowercased name or str(id): id} for a master table, from the shared cache."""
+    lookup = {}
+    for pk, obj in get_master_objects(model).items():
+        lookup[str(pk)] = pk
+        lookup[obj.name.strip().lower()] = pk
+    return lookup
+
+
+class _Report:
+    def __init__(self, index):
+        self.index = index
+        self.errors = {}
+
+    def add(self, mask, message):
+        for index in self.index[mask.to_numpy()]:
+            self.errors.setdefault(index, []).append(message)
+
+    def failed(self):
+        return pd.Series(self.index.isin(list(self.errors)), index=self.index)
+
+
+def _field_choices(field_name):
+    return [value for value, _ in Product._meta.get_field(field_name).choices]
+
+
+def validate_products(df):
+    """
+    Validates the sheet column by column and returns (clean, errors, skipped):
+    ``clean`` holds the valid rows with lookups resolved to ids and numbers
+    parsed, ``errors`` maps row index -> messages, ``skipped`` lists the
+    indexes of duplicate rows.
+    """
+    report = _Report(df.index)
+    text = df.apply(lambda column: column.str.strip())
+    blank = text.isna() | (text == '')
+    clean = pd.DataFrame(index=df.index)
+
+    for column in REQUIRED_COLUMNS:
+        report.add(blank[column], f'{column} is required')
+
+    # Over-long text would make the INSERT fail for the whole sheet
+    for column in ['name', *CHOICE_COLUMNS, *TEXT_COLUMNS]:
+        max_length = Product._meta.get_field(column).max_length
+        if column in text and max_length is not None:
+            report.add(text[column].str.len() > max_length, f'{column} must be at most {max_length} characters')
+
+    for column in CHOICE_COLUMNS:
+        if column not in text:
+            continue
+        choices = _field_choices(column)
+        report.add(~blank[column] & ~text[column].isin(choices), f'{column} must be one of {choices}')
+        clean[column] = text[column].fillna('')
+
+    for column, (limit, whole) in NUMERIC_COLUMNS.items():
+        if column not in text:
+            continue
+        values = pd.to_numeric(text[column], errors='coerce')
+        invalid = ~blank[column] & values.isna()
+        report.add(invalid, f'{column} must be a number')
+        report.add(values.abs() > float(limit), f'{column} is too large')
+        if whole:
+            report.add(~invalid & ~blank[column] & (values % 1 != 0), f'{column} must be a whole number')
+        clean[column] = values
+
+    for column, model in LOOKUP_COLUMNS.items():
+        if column not in text:
+            continue
+        ids = text[column].str.lower().map(_lookup_map(model))
+        report.add(~blank[column] & ids.isna(), f'Unknown {column}')
+        clean[column] = ids
+
+    for column in TEXT_COLUMNS:
+        if column in text:
+            clean[column] = text[column].fillna('')
+    clean['name'] = text['name']
+
+    # Later occurrences of a name (or of a product_id given in the sheet) are
+    # skipped, as before.
+    duplicate = text['name'].str.lower().duplicated() & ~blank['name']
+    if 'product_id' in text:
+        duplicate |= text['product_id'].duplicated() & ~blank['product_id']
+    failed = report.failed()
+    skipped = duplicate & ~failed
+
+    clean = clean[~failed & ~skipped]
+    return clean, report.errors, list(df.index[skipped])
+
+
+def _insert_rows(clean, product_ids, chunk_size):
+    """
+    Writes the validated rows with one multi-row INSERT per chunk. Columns
+    missing from the sheet get the model field default.
+    """
+    fields = [field for field in Product._meta.concrete_fields if not field.primary_key]
+    data = {}
+    for field in fields:
+        column = field.name
+        if field.attname == 'product_id':
+            values = pd.Series(product_ids, index=clean.index, dtype=object)
+        elif column in clean:
+            values = clean[column]
+            if column in LOOKUP_COLUMNS:
+                values = values.astype('Int64')
+            elif column in NUMERIC_COLUMNS:
+                whole = NUMERIC_COLUMNS[column][1]
+                values = values.astype('Int64') if whole else values.map(lambda v: Decimal(f'{v:.2f}'), na_action='ignore')
+            if field.has_default():
+                values = values.astype(object).where(values.notna(), field.get_default())
+        else:
+            values = pd.Series([field.get_default()] * len(clean), index=clean.index, dtype=object)
+        data[field.column] = values.astype(object).where(values.notna(), None)
+
+    rows = list(pd.DataFrame(data).itertuples(index=False, name=None))
+    table = connection.ops.quote_name(Product._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(column) for column in data)
+    placeholders = ', '.join(['%s'] * len(data))
+    sql = f'INSERT INTO {table} ({columns}) VALUES ({placeholders})'
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), chunk_size):
+            cursor.executemany(sql, rows[start:start + chunk_size])
+    return len(rows)
+
+
+def import_products(df, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Validates ``df`` and inserts the valid rows in chunks of ``chunk_size``
+    inside one transaction. Returns the import report.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f'Missing required fields: {missing}')
+
+    clean, errors, skipped = validate_products(df)
+
+    created = 0
+    if len(clean):
+        last_pk = Product.objects.aggregate(last=Max('id'))['last'] or 0
+        created = _insert_rows(clean, next_document_numbers('product', len(clean)), chunk_size)
+        # The raw INSERT skips the save signals that keep search current
+        reindex('product', Product.objects.filter(pk__gt=last_pk))
+
+    return {
+        'valid_rows': created,
+        'invalid_rows': len(errors),
+        'skipped_rows': len(skipped),
+        # Row numbers as shown in the spreadsheet (header is row 1)
+        'errors': [{'row': index + 2, 'errors': messages} for index, messages in sorted(errors.items())],
+        'skipped': [index + 2 for index in skipped],
+    }
@@ -0,0 +1,152 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from rest_framework import serializers
+
+from .metrics import serializing
+from .query_planner import _relation
+
+# DRF fields whose to_representation() returns database values unchanged
+_PASS_THROUGH = {
+    serializers.CharField.to_representation,
+    serializers.IntegerField.to_representation,
+    serializers.BooleanField.to_representation,
+    serializers.ChoiceField.to_representation,
+}
+
+
+def _converter(field, model_field):
+    """
+    Function turning a non-null column value into the serializer's output,
+    or None when the value is output as is.
+    """
+    if isinstance(field, serializers.PrimaryKeyRelatedField):
+        return field.pk_field.to_representation if field.pk_field is not None else None
+    if isinstance(field, serializers.FileField):
+        # values() gives the file name; DRF renders the FieldFile's url
+        return lambda name: field.to_representation(model_field.attr_class(None, model_field, name))
+    if type(field).to_representation in _PASS_THROUGH:
+        return None
+    return field.to_representation
+
+
+class Projection:
+    """
+    Read-only fast path for a ModelSerializer on list endpoints: rows come
+    from QuerySet.values() and are turned into the serializer's JSON shape
+    by converters compiled once per serializer, without model instances or
+    per-field get_attribute() calls.
+
+    Takes a serializer class, or an instance whose fields have been pruned.
+    Supported fields: model columns, primary-key related fields, nested
+    serializers on a foreign key, and nested serializers on a reverse
+    foreign key / one-to-one (loaded with one values() query per relation
+    and page). Anything else (SerializerMethodField, dotted sources, ...)
+    raises ImproperlyConfigured; use the serializer for those.
+    """
+
+    def __init__(self, serializer):
+        if isinstance(serializer, type):
+            serializer = serializer()
+        serializer_class = type(serializer)
+        self.model = serializer.Meta.model
+        self.columns = []
+        # (kind, key, column or relation, converter or child projection)
+        self.entries = []
+        for key, field in serializer.fields.items():
+            if not field.write_only:
+                self._compile(serializer_class, key, field)
+        if any(kind.startswith('reverse') for kind, *_ in self.entries):
+            self._column('id')  # to match the nested rows
+
+    def _compile(self, serializer_class, key, field):
+        attrs = field.source_attrs
+        relation = _relation(self.model, attrs[0]) if len(attrs) == 1 else None
+        if relation is None and len(attrs) == 1:
+            try:
+                model_field = self.model._meta.get_field(attrs[0])
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is not None and model_field.concrete:
+                self._column(model_field.attname)
+                self.entries.append(('column', key, model_field.attname, _converter(field, model_field)))
+                return
+        elif relation is not None:
+            child = getattr(field, 'child', None)
+            forward = relation.concrete and (relation.many_to_one or relation.one_to_one)
+            if forward and isinstance(field, serializers.PrimaryKeyRelatedField):
+                self._column(relation.attname)
+                self.entries.append(('column', key, relation.attname, _converter(field, relation)))
+                return
+            if forward and isinstance(field, serializers.Serializer):
+                self._column(relation.attname)
+                self.entries.append(('forward', key, relation.attname, projection_for(field.__class__)))
+                return
+            if relation.one_to_many and isinstance(child, serializers.Serializer):
+                self.entries.append(('reverse_many', key, relation, projection_for(child.__class__)))
+                return
+            if relation.one_to_one and not relation.concrete and isinstance(field, serializers.Serializer):
+                self.entries.append(('reverse_one', key, relation, projection_for(field.__class__)))
+                return
+        raise ImproperlyConfigured(f'{serializer_class.__name__}.{key} cannot be rendered from values()')
+
+    def _column(self, name):
+        if name not in self.columns:
+            self.columns.append(name)
+
+    def values(self, queryset, *extra):
+        """``queryset`` as dicts holding the columns the projection reads (plus ``extra``)."""
+        return queryset.values(*self.columns, *[name for name in extra if name not in self.columns])
+
+    def _load(self, rows):
+        """{key: {parent value: rendered}} for the nested entries of ``rows``."""
+        loaded = {}
+        for kind, key, target, child in self.entries:
+            if kind == 'forward':
+                ids = {row[target] for row in rows if row[target] is not None}
+                children = child.values(child.model._default_manager.filter(pk__in=ids), 'pk') if ids else []
+                loaded[key] = dict(zip([row['pk'] for row in children], child.render(children)))
+            elif kind in ('reverse_many', 'reverse_one'):
+                parent = target.field.attname
+                ids = {row['id'] for row in rows}
+                children = child.values(
+                    target.related_model._default_manager.filter(**{f'{parent}__in': ids}).order_by('pk'), parent,
+                ) if ids else []
+                grouped = {}
+                for row, rendered in zip(children, child.render(children)):
+                    if kind == 'reverse_many':
+                        grouped.setdefault(row[parent], []).append(rendered)
+                    else:
+                        grouped[row[parent]] = rendered
+                loaded[key] = grouped
+        return loaded
+
+    def render(self, rows):
+        """List of dicts shaped like the serializer's ``many=True`` data."""
+        rows = list(rows)
+        loaded = self._load(rows)
+        with serializing():
+            return [self._render_row(row, loaded) for row in rows]
+
+    def _render_row(self, row, loaded):
+        item = {}
+        for kind, key, target, convert in self.entries:
+            if kind == 'column':
+                value = row[target]
+                item[key] = value if value is None or convert is None else convert(value)
+            elif kind == 'forward':
+                item[key] = loaded[key].get(row[target])
+            elif kind == 'reverse_many':
+                item[key] = loaded[key].get(row['id'], [])
+            else:
+                item[key] = loaded[key].get(row['id'])
+        return item
+
+    def data(self, queryset):
+        return self.render(self.values(queryset))
+
+
+@lru_cache(maxsize=None)
+def projection_for(serializer_class):
+    """The (cached) Projection of ``serializer_class``."""
+    return Projection(serializer_class)
@@ -0,0 +1,97 @@
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LIST = re.compile(r'\((?:\s*(?:%s|\?)\s*,)*\s*(?:%s|\?)\s*\)')
+
+
+def query_shape(sql):
+    """
+    ``sql`` with literals and parameter lists collapsed, so the queries a
+    loop runs once per row (``... WHERE id = 1``, ``... WHERE id = 2``)
+    share one shape.
+    """
+    sql = _NUMBER.sub('?', _STRING.sub('?', sql))
+    return _LIST.sub('(...)', sql)
+
+
+class RepeatedQueryError(AssertionError):
+    pass
+
+
+class QueryLog:
+    """
+    Context manager recording the SQL run on every connection, e.g.
+    ``with QueryLog() as log: ...`` then ``log.count`` / ``log.repeated()``.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self._record))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def _record(self, execute, sql, params, many, context):
+        self.queries.append(sql)
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated(self, threshold=None):
+        """[(shape, times)] of the SELECTs run ``threshold`` or more times."""
+        if threshold is None:
+            threshold = getattr(settings, 'REPEATED_QUERY_THRESHOLD', 3)
+        shapes = Counter(query_shape(sql) for sql in self.queries if sql.lstrip().upper().startswith('SELECT'))
+        return [(shape, times) for shape, times in shapes.most_common() if times >= threshold]
+
+    def report(self):
+        return '\n'.join(f'{i}. {sql}' for i, sql in enumerate(self.queries, 1))
+
+
+def describe_repeats(repeats, label):
+    return '\n'.join(f'N+1 in {label}: {times} x {shape}' for shape, times in repeats)
+
+
+class RepeatedQueryMiddleware:
+    """
+    Flags requests that run the same SELECT shape REPEATED_QUERY_THRESHOLD
+    or more times, the signature of a per-row query (N+1).
+    REPEATED_QUERY_CHECK = 'warn' logs them, 'raise' raises
+    RepeatedQueryError (the query budget tests run this way); anything
+    else disables the check.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = getattr(settings, 'REPEATED_QUERY_CHECK', '')
+        if mode not in ('warn', 'raise'):
+            return self.get_response(request)
+
+        with QueryLog() as log:
+            response = self.get_response(request)
+        repeats = log.repeated()
+        if repeats:
+            message = describe_repeats(repeats, f'{request.method} {request.path}')
+            if mode == 'raise':
+                raise RepeatedQueryError(message)
+            logger.warning(message)
+        return response
@@ -0,0 +1,150 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+class QueryPlan:
+    """
+    select_related / prefetch_related lookups needed to serialize a model
+    without issuing queries per row. ``prefetch`` holds (lookup, child plan)
+    pairs; the child plan is applied to the prefetch queryset.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.select = []
+        self.prefetch = []
+        self.extra_prefetch = []
+
+    def add_select(self, path):
+        if path not in self.select:
+            self.select.append(path)
+
+    def add_prefetch(self, path, child_plan=None):
+        if all(existing != path for existing, _ in self.prefetch):
+            self.prefetch.append((path, child_plan))
+
+    def add_extra_prefetch(self, path):
+        if path not in self.extra_prefetch:
+            self.extra_prefetch.append(path)
+
+    def apply(self, queryset):
+        if self.select:
+            queryset = queryset.select_related(*self.select)
+        lookups = []
+        for path, child_plan in self.prefetch:
+            if child_plan is not None:
+                child_queryset = child_plan.apply(child_plan.model._default_manager.all())
+                lookups.append(Prefetch(path, queryset=child_queryset))
+            else:
+                lookups.append(path)
+        # Plain string hints go last so they extend, rather than clash with,
+        # the Prefetch objects above.
+        lookups.extend(self.extra_prefetch)
+        if lookups:
+            queryset = queryset.prefetch_related(*lookups)
+        return queryset
+
+
+def _relation(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # Reverse relations without a related_name are reached through
+        # their accessor (``foo_set``), which get_field() does not know.
+        for rel in model._meta.related_objects:
+            if rel.get_accessor_name() == name:
+                return rel
+        return None
+    return field if field.is_relation else None
+
+
+def _is_many(relation):
+    return relation.many_to_many or relation.one_to_many
+
+
+def _walk(serializer, model, prefix, plan):
+    try:
+        fields = serializer.fields
+    except ImproperlyConfigured:
+        # Leave the error to surface where the serializer is actually used.
+        return
+
+    # Meta hints for a declared field that has been removed from this
+    # instance (e.g. by ?fields=) are not needed.
+    removed = set(getattr(serializer, '_declared_fields', {})) - set(fields)
+    meta = getattr(serializer, 'Meta', None)
+    for path in getattr(meta, 'select_related_fields', []):
+        if path.split('__')[0] not in removed:
+            plan.add_select(prefix + path)
+    for path in getattr(meta, 'prefetch_related_fields', []):
+        if path.split('__')[0] not in removed:
+            plan.add_extra_prefetch(prefix + path)
+
+    for field in fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            if isinstance(field, serializers.BaseSerializer):
+                _walk(field, model, prefix, plan)
+            continue
+
+        current_model = model
+        path = prefix
+        attrs = field.source_attrs
+        for index, attr in enumerate(attrs):
+            relation = _relation(current_model, attr)
+            if relation is None:
+                break
+            lookup = path + attr
+            is_last = index == len(attrs) - 1
+
+            if _is_many(relation):
+                child = getattr(field, 'child', None)
+                if is_last and isinstance(child, serializers.Serializer):
+                    plan.add_prefetch(lookup, build_plan(child.__class__))
+                else:
+                    plan.add_prefetch(lookup)
+                break
+
+            if is_last:
+                if isinstance(field, serializers.Serializer):
+                    plan.add_select(lookup)
+                    _walk(field, relation.related_model, lookup + '__', plan)
+                elif (isinstance(field, serializers.RelatedField)
+                      and field.use_pk_only_optimization()
+                      and relation.concrete):
+                    # The primary key is read from the local ``<fk>_id``
+                    # column, no join needed.
+                    pass
+                else:
+                    plan.add_select(lookup)
+                break
+
+            plan.add_select(lookup)
+            current_model = relation.related_model
+            path = lookup + '__'
+
+
+@lru_cache(maxsize=None)
+def build_plan(serializer_class):
+    """
+    Derives the query plan for ``serializer_class`` from its declared fields
+    and their sources. Fields the planner cannot see through (e.g.
+    SerializerMethodField) can be declared on the serializer's Meta via
+    ``select_related_fields`` / ``prefetch_related_fields``.
+    """
+    return plan_for_serializer(serializer_class())
+
+
+def plan_for_serializer(serializer):
+    """Uncached plan for a serializer instance, e.g. one with fields removed."""
+    plan = QueryPlan(serializer.Meta.model)
+    _walk(serializer, plan.model, '', plan)
+    return plan
+
+
+def optimize_queryset(queryset, serializer_class):
+    return build_plan(serializer_class).apply(queryset)
@@ -0,0 +1,247 @@
+import re
+from functools import reduce
+from operator import or_
+
+from django.apps import apps
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Value, When
+
+from .models import SearchTerm
+
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TOKENS = 5
+# Shorter last words only match whole terms; a one- or two-letter prefix
+# matches too much of the index to rank quickly.
+MIN_PREFIX_LENGTH = 3
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+REINDEX_CHUNK_SIZE = 1000
+
+
+class SearchSource:
+    """
+    A model in the search index. ``fields`` maps field name -> weight; the
+    ``title``/``subtitle`` fields are joined for display in the results.
+    ``owner`` names the user foreign key of models whose list endpoint only
+    shows the user's own rows; search is limited the same way.
+    """
+
+    def __init__(self, model_label, fields, title, subtitle=(), owner=None):
+        self.model_label = model_label
+        self.fields = fields
+        self.title = title
+        self.subtitle = subtitle
+        self.owner = owner
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def display(self, obj):
+        def join(names):
+            return ' '.join(str(getattr(obj, name)) for name in names if getattr(obj, name, None) not in (None, ''))
+        return join(self.title), join(self.subtitle)
+
+
+# Document ids weigh most, so typing a number ranks its document first
+SEARCH_SOURCES = {
+    'customer': SearchSource(
+        'core.Customer',
+        {'customer_id': 10, 'first_name': 6, 'last_name': 6, 'company_name': 5, 'email': 4, 'phone_number': 4, 'gst_tax_id': 8},
+        title=('first_name', 'last_name'), subtitle=('customer_id', 'company_name'),
+    ),
+    'product': SearchSource('core.Product', {'product_id': 10, 'name': 6}, title=('name',), subtitle=('product_id',)),
+    'supplier': SearchSource(
+        'core.Supplier', {'name': 6, 'contact_person': 4, 'email': 4, 'phone_number': 4},
+        title=('name',), subtitle=('contact_person',),
+    ),
+    'enquiry': SearchSource(
+        'crm.Enquiry', {'enquiry_id': 10, 'first_name': 5, 'last_name': 5, 'email': 4, 'phone_number': 4},
+        title=('enquiry_id',), subtitle=('first_name', 'last_name'), owner='user',
+    ),
+    'quotation': SearchSource(
+        'crm.Quotation', {'quotation_id': 10, 'customer_po_referance': 5}, title=('quotation_id',), owner='user',
+    ),
+    'sales_order': SearchSource(
+        'crm.SalesOrder', {'sales_order_id': 10, 'tracking_number': 5}, title=('sales_order_id',), owner='sales_rep',
+    ),
+    'delivery_note': SearchSource('crm.DeliveryNote', {'DN_ID': 10, 'customer_name': 4}, title=('DN_ID',), subtitle=('customer_name',)),
+    'invoice': SearchSource('crm.Invoice', {'INVOICE_ID': 10, 'customer_ref_no': 5}, title=('INVOICE_ID',)),
+    'invoice_return': SearchSource('crm.InvoiceReturn', {'INVOICE_RETURN_ID': 10, 'customer_reference_no': 5}, title=('INVOICE_RETURN_ID',)),
+    'delivery_note_return': SearchSource('crm.DeliveryNoteReturn', {'DNR_ID': 10, 'customer_reference_no': 5}, title=('DNR_ID',)),
+    'purchase_order': SearchSource('purchase.PurchaseOrder', {'PO_ID': 10}, title=('PO_ID',)),
+    'stock_receipt': SearchSource('purchase.StockReceipt', {'GRN_ID': 10, 'supplier_invoice_no': 5}, title=('GRN_ID',)),
+    'stock_return': SearchSource('purchase.StockReturn', {'SRN_ID': 10}, title=('SRN_ID',)),
+    'credit_note': SearchSource('finance.CreditNote', {'CREDIT_NOTE_ID': 10}, title=('CREDIT_NOTE_ID',)),
+    'debit_note': SearchSource('finance.DebitNote', {'DEBIT_NOTE_ID': 10}, title=('DEBIT_NOTE_ID',)),
+}
+
+
+def source_for_model(model):
+    for kind, source in SEARCH_SOURCES.items():
+        if source.model_label == model._meta.label:
+            return kind, source
+    return None, None
+
+
+def tokenize(text, compact=True):
+    """
+    Lowercase alphanumeric tokens of ``text``. With ``compact``, values with
+    separators also yield the joined whole, so 'INV-0042' is found by
+    'inv', '0042' and 'inv0042'.
+    """
+    tokens = re.findall(r'[a-z0-9]+', str(text or '').lower())
+    joined = ''.join(tokens)
+    if compact and len(tokens) > 1 and len(joined) <= MAX_TERM_LENGTH:
+        tokens.append(joined)
+    return [token[:MAX_TERM_LENGTH] for token in tokens]
+
+
+def terms_for(source, obj):
+    """{term: weight} for one object, keeping the highest weight per term."""
+    terms = {}
+    for field, weight in source.fields.items():
+        for token in tokenize(getattr(obj, field, None)):
+            terms[token] = max(weight, terms.get(token, 0))
+    return terms
+
+
+def index_object(obj):
+    """Brings the index entries of one saved object up to date."""
+    kind, source = source_for_model(type(obj))
+    terms = terms_for(source, obj)
+    existing = dict(SearchTerm.objects.filter(kind=kind, object_id=obj.pk).values_list('term', 'weight'))
+    if existing == terms:
+        return
+    with transaction.atomic():
+        SearchTerm.objects.filter(kind=kind, object_id=obj.pk).delete()
+        SearchTerm.objects.bulk_create([
+            SearchTerm(kind=kind, object_id=obj.pk, term=term, weight=weight) for term, weight in terms.items()
+        ])
+
+
+def unindex_object(obj):
+    kind, _ = source_for_model(type(obj))
+    SearchTerm.objects.filter(kind=kind, object_id=obj.pk).delete()
+
+
+def reindex(kind, queryset=None):
+    """
+    Rebuilds the index entries of ``kind`` (or just of ``queryset``) in
+    chunks; used for bulk writes that bypass signals. Returns the number of
+    objects indexed.
+    """
+    source = SEARCH_SOURCES[kind]
+    if queryset is None:
+        # Full rebuild: also drops entries of objects deleted meanwhile
+        SearchTerm.objects.filter(kind=kind).delete()
+        queryset = source.model._default_manager.all()
+    queryset = queryset.only('pk', *source.fields).order_by('pk')
+
+    count = 0
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        objects = list(chunk[:REINDEX_CHUNK_SIZE])
+        if not objects:
+            return count
+        with transaction.atomic():
+            SearchTerm.objects.filter(kind=kind, object_id__in=[obj.pk for obj in objects]).delete()
+            SearchTerm.objects.bulk_create([
+                SearchTerm(kind=kind, object_id=obj.pk, term=term, weight=weight)
+                for obj in objects for term, weight in terms_for(source, obj).items()
+            ], batch_size=REINDEX_CHUNK_SIZE)
+        count += len(objects)
+        last_pk = objects[-1].pk
+
+
+def _prefix(token):
+    """
+    Lookup for terms starting with ``token`` as a range, which every
+    backend and collation can answer from the term index. Terms only hold
+    [a-z0-9] and '9' < 'a' < 'z', so token + 'zzz...' is the largest match.
+    """
+    return Q(term__range=(token, token + 'z' * (MAX_TERM_LENGTH - len(token))))
+
+
+def _visible_to(user, kinds=None):
+    """Condition limiting the owned kinds (SearchSource.owner) to ``user``'s objects."""
+    condition = Q()
+    for kind, source in SEARCH_SOURCES.items():
+        if source.owner is None or kinds and kind not in kinds:
+            continue
+        owned = source.model._default_manager.filter(**{source.owner: user}).values('pk')
+        condition &= ~Q(kind=kind) | Q(object_id__in=owned)
+    return condition
+
+
+def _ranked(tokens, kinds=None, user=None):
+    """
+    (kind, object_id, score) rows matching every token, best first. The
+    last token is matched as a prefix (the word being typed), the others
+    as whole terms. Each token scores the weight of its best term, doubled
+    for a whole-term match. With ``user``, owned kinds only match that
+    user's objects. One grouped query over the (term, kind, object_id)
+    index.
+    """
+    lookups = []
+    for i, token in enumerate(tokens):
+        exact = Q(term=token)
+        if i == len(tokens) - 1 and len(token) >= MIN_PREFIX_LENGTH:
+            lookups.append((exact, _prefix(token)))
+        else:
+            lookups.append((exact, None))
+
+    terms = SearchTerm.objects.filter(reduce(or_, [prefix or exact for exact, prefix in lookups]))
+    if kinds:
+        terms = terms.filter(kind__in=kinds)
+    if user is not None:
+        terms = terms.filter(_visible_to(user, kinds))
+    per_token = {}
+    for i, (exact, prefix) in enumerate(lookups):
+        cases = [When(exact, then=F('weight') * 2)]
+        if prefix is not None:
+            cases.append(When(prefix, then=F('weight')))
+        per_token[f'token_{i}'] = Max(Case(*cases, default=Value(0), output_field=IntegerField()))
+    rows = terms.values('kind', 'object_id').annotate(**per_token)
+    rows = rows.filter(**{f'{name}__gt': 0 for name in per_token})
+    return rows.annotate(score=sum(F(name) for name in per_token))
+
+
+def matching_ids(kind, query):
+    """Subquery of the ids of ``kind`` objects matching ``query``."""
+    tokens = tokenize(query, compact=False)[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return SearchTerm.objects.none().values('object_id')
+    return _ranked(tokens, [kind]).values('object_id')
+
+
+def search(query, kinds=None, limit=DEFAULT_LIMIT, user=None):
+    """
+    Ranked results for ``query`` across SEARCH_SOURCES (or just ``kinds``);
+    the last word is matched as a prefix, so partial input autocompletes.
+    Pass the requesting ``user`` to hide other users' owned documents.
+    """
+    tokens = tokenize(query, compact=False)[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return []
+    rows = list(_ranked(tokens, kinds, user).order_by('-score', 'kind', 'object_id')[:limit])
+
+    # One query per kind present in the results for the display fields
+    ids_by_kind = {}
+    for row in rows:
+        ids_by_kind.setdefault(row['kind'], []).append(row['object_id'])
+    objects = {}
+    for kind, ids in ids_by_kind.items():
+        source = SEARCH_SOURCES[kind]
+        for obj in source.model._default_manager.filter(pk__in=ids).only('pk', *source.title, *source.subtitle):
+            objects[kind, obj.pk] = obj
+
+    results = []
+    for row in rows:
+        obj = objects.get((row['kind'], row['object_id']))
+        if obj is None:
+            continue  # deleted without its index entries
+        title, subtitle = SEARCH_SOURCES[row['kind']].display(obj)
+        results.append({'type': row['kind'], 'id': obj.pk, 'title': title, 'subtitle': subtitle, 'score': row['score']})
+    return results
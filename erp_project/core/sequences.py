@@ -0,0 +1,159 @@
+import re
+import threading
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, connection, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import DocumentSequence
+
+# Numbers reserved per round trip to the sequence table. Unused numbers of a
+# block are lost when the process exits, so numbering can have gaps.
+DEFAULT_BLOCK_SIZE = getattr(settings, 'DOCUMENT_SEQUENCE_BLOCK_SIZE', 10)
+
+
+def _seed_from_max_id(model_label):
+    def seed():
+        model = apps.get_model(model_label)
+        return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    return seed
+
+
+def _seed_from_last_code(model_label, field):
+    def seed():
+        model = apps.get_model(model_label)
+        last = model.objects.order_by('-id').values_list(field, flat=True).first()
+        digits = re.findall(r'\d+', last or '')
+        return int(digits[-1]) + 1 if digits else 1
+    return seed
+
+
+# doc_type -> (format, seed). The format gets ``number``, ``date``
+# (YYYYMMDD) and ``scope``; the seed gives the first number when a sequence
+# row is created, continuing from documents that already exist.
+DOCUMENT_TYPES = {
+    'enquiry': ('ENQ{number:03d}', _seed_from_last_code('crm.Enquiry', 'enquiry_id')),
+    'quotation': ('QUO{number:03d}', _seed_from_last_code('crm.Quotation', 'quotation_id')),
+    'sales_order': ('SO{number:04d}', _seed_from_max_id('crm.SalesOrder')),
+    'delivery_note': ('DN-{number:04d}', _seed_from_max_id('crm.DeliveryNote')),
+    'invoice': ('INV-{number:04d}', _seed_from_max_id('crm.Invoice')),
+    'invoice_return': ('INVR-{number:04d}', _seed_from_max_id('crm.InvoiceReturn')),
+    'delivery_note_return': ('DNR-{number:04d}', _seed_from_max_id('crm.DeliveryNoteReturn')),
+    'purchase_order': ('PO-{date}-{number:03d}', _seed_from_max_id('purchase.PurchaseOrder')),
+    'stock_receipt': ('GRN-{date}-{number:04d}', _seed_from_max_id('purchase.StockReceipt')),
+    'stock_return': ('SRN-{date}-{number:04d}', _seed_from_max_id('purchase.StockReturn')),
+    'credit_note': ('CRN-{number:04d}', _seed_from_max_id('finance.CreditNote')),
+    'debit_note': ('DBN-{number:04d}', _seed_from_max_id('finance.DebitNote')),
+    'product': ('CVB{number:03d}', _seed_from_max_id('core.Product')),
+    'candidate': ('STA{number:04d}', _seed_from_last_code('core.Candidate', 'employee_code')),
+    'customer': ('CUS{number:04d}', _seed_from_last_code('core.Customer', 'customer_id')),
+}
+
+_blocks = {}
+_lock = threading.Lock()
+
+
+def financial_year(date=None):
+    """Financial year (April to March) of ``date`` as a scope, e.g. '2025-26'."""
+    date = date or timezone.localdate()
+    start = date.year if date.month >= 4 else date.year - 1
+    return f'{start}-{str(start + 1)[-2:]}'
+
+
+def _reserve(conn, doc_type, scope, size):
+    """
+    Moves the sequence row forward by ``size`` and returns the first number
+    of the reserved range. The UPDATE takes the row lock, so concurrent
+    reservations from other processes queue behind it instead of colliding.
+    """
+    table = conn.ops.quote_name(DocumentSequence._meta.db_table)
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET next_value = next_value + %s WHERE doc_type = %s AND scope = %s',
+            [size, doc_type, scope],
+        )
+        if cursor.rowcount:
+            cursor.execute(
+                f'SELECT next_value FROM {table} WHERE doc_type = %s AND scope = %s',
+                [doc_type, scope],
+            )
+            return cursor.fetchone()[0] - size
+
+        start = DOCUMENT_TYPES[doc_type][1]()
+        cursor.execute(
+            f'INSERT INTO {table} (doc_type, scope, next_value) VALUES (%s, %s, %s)',
+            [doc_type, scope, start + size],
+        )
+        return start
+
+
+def _side_alias():
+    """
+    The DOCUMENT_SEQUENCE_DATABASE alias: a second connection to the same
+    database, kept per thread like any other, on which reservations made
+    inside a caller's transaction commit on their own. None when unset.
+    """
+    alias = getattr(settings, 'DOCUMENT_SEQUENCE_DATABASE', None)
+    return alias if alias in settings.DATABASES else None
+
+
+def _commits_separately():
+    """Whether a reservation made now commits independently of the caller."""
+    return not connection.in_atomic_block or _side_alias() is not None
+
+
+def _reserve_block(doc_type, scope, size):
+    # Inside a caller's transaction the reservation has to commit on its
+    # own: if the caller rolled back, the numbers still held by this
+    # process would be handed out again by the database. Without a side
+    # connection it runs in the caller's transaction and rolls back with it.
+    alias = _side_alias() if connection.in_atomic_block else None
+    conn = connections[alias] if alias else connection
+    for attempt in range(3):
+        try:
+            with transaction.atomic(using=conn.alias):
+                return _reserve(conn, doc_type, scope, size)
+        except IntegrityError:
+            # Another process created the sequence row first; retry the UPDATE.
+            if attempt == 2:
+                raise
+
+
+def allocate_numbers(doc_type, count=1, scope=''):
+    """Returns ``count`` consecutive unused numbers for ``doc_type``."""
+    if doc_type not in DOCUMENT_TYPES:
+        raise ValueError(f"Unknown document type: {doc_type}")
+    key = (doc_type, scope)
+    with _lock:
+        block = _blocks.get(key)
+        if block is not None and block[1] - block[0] >= count:
+            start = block[0]
+            block[0] += count
+        elif count >= DEFAULT_BLOCK_SIZE or not _commits_separately():
+            # Bulk requests get a range of their own and leave the current
+            # block in place for single allocations. A reservation that rolls
+            # back with the caller is never kept as a block either: the
+            # database would hand its numbers out again.
+            start = _reserve_block(doc_type, scope, count)
+        else:
+            start = _reserve_block(doc_type, scope, DEFAULT_BLOCK_SIZE)
+            _blocks[key] = [start + count, start + DEFAULT_BLOCK_SIZE]
+    return list(range(start, start + count))
+
+
+def format_document_number(doc_type, number, scope=''):
+    fmt = DOCUMENT_TYPES[doc_type][0]
+    return fmt.format(number=number, scope=scope, date=timezone.now().strftime('%Y%m%d'))
+
+
+def next_document_number(doc_type, scope=''):
+    """Formatted next number for ``doc_type``, e.g. next_document_number('invoice') -> 'INV-0042'."""
+    number = allocate_numbers(doc_type, 1, scope)[0]
+    return format_document_number(doc_type, number, scope)
+
+
+def next_document_numbers(doc_type, count, scope=''):
+    """Formatted numbers for bulk creation, reserved in a single round trip."""
+    return [format_document_number(doc_type, number, scope) for number in allocate_numbers(doc_type, count, scope)]
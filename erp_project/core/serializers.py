@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import Profile, Department, Branch, Role, Candidate
+from .master_cache import MasterPrimaryKeyRelatedField
 
 class BranchSerializer(serializers.ModelSerializer):
     class Meta:
@@ -19,6 +20,7 @@ class DepartmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Department
         fields = ['id', 'code', 'department_name', 'branch', 'description', 'roles']
+        prefetch_related_fields = ['roles__department', 'roles__branch']
 
     def get_roles(self, obj):
         if self.context.get('include_roles', True):
@@ -26,7 +28,7 @@ class DepartmentSerializer(serializers.ModelSerializer):
         return []
 
 class DepartmentCreateSerializer(serializers.ModelSerializer):
-    branch = serializers.PrimaryKeyRelatedField(queryset=Branch.objects.all())  # Mandatory
+    branch = MasterPrimaryKeyRelatedField(queryset=Branch.objects.all())  # Mandatory
 
     class Meta:
         model = Department
@@ -41,8 +43,8 @@ class RoleSerializer(serializers.ModelSerializer):
         fields = ['id', 'role', 'description', 'permissions', 'department_name', 'branch_name']
 
 class RoleUpdateSerializer(serializers.ModelSerializer):
-    department = serializers.PrimaryKeyRelatedField(queryset=Department.objects.all())  # Mandatory
-    branch = serializers.PrimaryKeyRelatedField(queryset=Branch.objects.all())  # Mandatory
+    department = MasterPrimaryKeyRelatedField(queryset=Department.objects.all())  # Mandatory
+    branch = MasterPrimaryKeyRelatedField(queryset=Branch.objects.all())  # Mandatory
     department_name = serializers.CharField(source='department.department_name', read_only=True)
     branch_name = serializers.CharField(source='branch.name', read_only=True)
     description = serializers.CharField(required=False, allow_blank=True)
@@ -76,11 +78,11 @@ class ProfileDetailSerializer(serializers.ModelSerializer):
         ]
 
 class ProfileUpdateSerializer(serializers.ModelSerializer):
-    department = serializers.PrimaryKeyRelatedField(queryset=Department.objects.all(), allow_null=True)
-    branch = serializers.PrimaryKeyRelatedField(queryset=Branch.objects.all(), allow_null=True)
+    department = MasterPrimaryKeyRelatedField(queryset=Department.objects.all(), allow_null=True)
+    branch = MasterPrimaryKeyRelatedField(queryset=Branch.objects.all(), allow_null=True)
     available_branches = serializers.ListField(child=serializers.CharField(), required=False)
     reporting_to = serializers.CharField(allow_null=True, read_only=True)
-    role = serializers.PrimaryKeyRelatedField(queryset=Role.objects.all(), allow_null=True)
+    role = MasterPrimaryKeyRelatedField(queryset=Role.objects.all(), allow_null=True)
     profilePic = serializers.ImageField(allow_empty_file=True, required=False)
     contact_number = serializers.CharField(max_length=15, allow_blank=True, allow_null=True)
 
@@ -293,13 +295,13 @@ class SupplierSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'contact_person', 'phone_number', 'email', 'address']
 
 class ProductSerializer(serializers.ModelSerializer):
-    category = serializers.PrimaryKeyRelatedField(queryset=Category.objects.all(), required=False, allow_null=True)
-    tax_code = serializers.PrimaryKeyRelatedField(queryset=TaxCode.objects.all(), required=False, allow_null=True)
-    uom = serializers.PrimaryKeyRelatedField(queryset=UOM.objects.all(), required=False, allow_null=True)
-    warehouse = serializers.PrimaryKeyRelatedField(queryset=Warehouse.objects.all(), required=False, allow_null=True)
-    size = serializers.PrimaryKeyRelatedField(queryset=Size.objects.all(), required=False, allow_null=True)
-    color = serializers.PrimaryKeyRelatedField(queryset=Color.objects.all(), required=False, allow_null=True)
-    supplier = serializers.PrimaryKeyRelatedField(queryset=Supplier.objects.all(), required=False, allow_null=True)
+    category = MasterPrimaryKeyRelatedField(queryset=Category.objects.all(), required=False, allow_null=True)
+    tax_code = MasterPrimaryKeyRelatedField(queryset=TaxCode.objects.all(), required=False, allow_null=True)
+    uom = MasterPrimaryKeyRelatedField(queryset=UOM.objects.all(), required=False, allow_null=True)
+    warehouse = MasterPrimaryKeyRelatedField(queryset=Warehouse.objects.all(), required=False, allow_null=True)
+    size = MasterPrimaryKeyRelatedField(queryset=Size.objects.all(), required=False, allow_null=True)
+    color = MasterPrimaryKeyRelatedField(queryset=Color.objects.all(), required=False, allow_null=True)
+    supplier = MasterPrimaryKeyRelatedField(queryset=Supplier.objects.all(), required=False, allow_null=True)
     related_products = serializers.CharField(max_length=1000, required=False, allow_blank=True)
 
     # Custom fields for each dropdown
@@ -436,9 +438,9 @@ class CandidateDocumentSerializer(serializers.ModelSerializer):
         fields = ['id', 'file', 'uploaded_at']
 
 class CandidateSerializer(serializers.ModelSerializer):
-    department = serializers.PrimaryKeyRelatedField(queryset=Department.objects.all(), required=False)
-    branch = serializers.PrimaryKeyRelatedField(queryset=Branch.objects.all(), required=False)
-    designation = serializers.PrimaryKeyRelatedField(queryset=Role.objects.all(), required=False)
+    department = MasterPrimaryKeyRelatedField(queryset=Department.objects.all(), required=False)
+    branch = MasterPrimaryKeyRelatedField(queryset=Branch.objects.all(), required=False)
+    designation = MasterPrimaryKeyRelatedField(queryset=Role.objects.all(), required=False)
     upload_documents = CandidateDocumentSerializer(many=True, required=False)
 
     class Meta:
@@ -525,14 +527,31 @@ from rest_framework import serializers
 from .models import Attendance, GovernmentHoliday
 
 class AttendanceSerializer(serializers.ModelSerializer):
+    check_in_times = serializers.SerializerMethodField()
+
     class Meta:
         model = Attendance
         fields = ['id', 'date', 'check_in_times', 'total_hours']
 
+    def get_check_in_times(self, obj):
+        # Prefetch 'punches' when serializing many days
+        return [punch.punched_at.isoformat() for punch in obj.punches.all()]
+
 class CheckInOutSerializer(serializers.Serializer):
     date = serializers.DateField()
     is_check_in = serializers.BooleanField()
 
+class AttendanceReportQuerySerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+
+    def validate(self, data):
+        if data['end_date'] < data['start_date']:
+            raise serializers.ValidationError("end_date must not be before start_date")
+        if (data['end_date'] - data['start_date']).days > 366:
+            raise serializers.ValidationError("The report covers at most one year")
+        return data
+
 class GovernmentHolidaySerializer(serializers.ModelSerializer):
     class Meta:
         model = GovernmentHoliday
@@ -553,6 +572,7 @@ class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ['id', 'name', 'status', 'start_date', 'due_date', 'assigned_to', 'priority']
+        select_related_fields = ['assigned_to']
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
@@ -586,6 +606,7 @@ from .models import Customer
 
 from rest_framework import serializers
 from .models import Customer, Candidate
+from .sequences import next_document_number
 
 class CustomerSerializer(serializers.ModelSerializer):
     assigned_sales_rep = serializers.PrimaryKeyRelatedField(
@@ -614,10 +635,5 @@ class CustomerSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
     def _generate_customer_id(self):
-        last_customer = Customer.objects.order_by('-id').first()
-        if last_customer:
-            last_id = int(last_customer.customer_id.replace('CUS', '')) + 1
-        else:
-            last_id = 1
-        return f'CUS{last_id:04d}'
+        return next_document_number('customer')
 
@@ -0,0 +1,117 @@
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import revoke_token, revoke_user_tokens
+from .document_totals import LINE_TOTALS, deleted_directly, line_totals_for, record_line_change
+from .master_cache import MASTER_MODELS, bump_version
+from .search import SEARCH_SOURCES, index_object, unindex_object
+from .models import Profile, Task
+from .task_counters import rebuild_task_counter, record_task_change
+
+
+@receiver([post_save, post_delete], sender=User)
+def revoke_tokens_on_user_change(sender, instance, **kwargs):
+    revoke_user_tokens(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Profile)
+def revoke_tokens_on_profile_change(sender, instance, **kwargs):
+    revoke_user_tokens(instance.user_id)
+
+
+@receiver(post_delete, sender=Token)
+def revoke_deleted_token(sender, instance, **kwargs):
+    revoke_token(instance.key)
+
+
+def bump_master_version(sender, **kwargs):
+    bump_version(sender)
+
+
+for _model in MASTER_MODELS:
+    post_save.connect(bump_master_version, sender=_model, dispatch_uid='master_version_save_%s' % _model._meta.label_lower)
+    post_delete.connect(bump_master_version, sender=_model, dispatch_uid='master_version_delete_%s' % _model._meta.label_lower)
+
+
+@receiver(post_init, sender=Task)
+def remember_task_counter_state(sender, instance, **kwargs):
+    if instance.pk is None:
+        instance._counted_state = None
+    elif {'assigned_to_id', 'status'} & instance.get_deferred_fields():
+        instance._counted_state = 'unknown'  # don't query deferred fields per row
+    else:
+        instance._counted_state = (instance.assigned_to_id, instance.status)
+
+
+@receiver(post_save, sender=Task)
+def update_task_counters_on_save(sender, instance, **kwargs):
+    state = (instance.assigned_to_id, instance.status)
+    if instance._counted_state == 'unknown':
+        rebuild_task_counter(instance.assigned_to_id)
+    elif instance._counted_state != state:
+        record_task_change(instance._counted_state, state)
+    instance._counted_state = state
+
+
+@receiver(post_delete, sender=Task)
+def update_task_counters_on_delete(sender, instance, **kwargs):
+    if instance._counted_state != 'unknown':
+        record_task_change(instance._counted_state, None)
+
+
+def update_search_index(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(instance)
+
+
+def remove_from_search_index(sender, instance, **kwargs):
+    unindex_object(instance)
+
+
+for _kind, _source in SEARCH_SOURCES.items():
+    post_save.connect(update_search_index, sender=_source.model, dispatch_uid='search_index_save_%s' % _kind)
+    post_delete.connect(remove_from_search_index, sender=_source.model, dispatch_uid='search_index_delete_%s' % _kind)
+
+
+def remember_line_amounts(sender, instance, **kwargs):
+    totals = line_totals_for(sender)
+    if instance.pk is None:
+        instance._line_state = None
+    elif {totals.parent_field, 'total', 'tax'} & instance.get_deferred_fields():
+        instance._line_state = 'unknown'  # read in pre_save only if the line is saved
+    else:
+        instance._line_state = totals.state(instance)
+
+
+def load_line_amounts(sender, instance, raw=False, **kwargs):
+    if raw or instance._line_state != 'unknown':
+        return
+    stored = sender._base_manager.filter(pk=instance.pk).first()
+    instance._line_state = line_totals_for(sender).state(stored) if stored else None
+
+
+def update_document_totals_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    totals = line_totals_for(sender)
+    state = totals.state(instance)
+    record_line_change(totals, instance._line_state, state)
+    instance._line_state = state
+
+
+def update_document_totals_on_delete(sender, instance, origin=None, **kwargs):
+    if instance._line_state == 'unknown':
+        load_line_amounts(sender, instance)
+    if deleted_directly(sender, origin):
+        record_line_change(line_totals_for(sender), instance._line_state, None)
+
+
+for _label in LINE_TOTALS:
+    _model = apps.get_model(_label)
+    post_init.connect(remember_line_amounts, sender=_model, dispatch_uid='line_totals_init_%s' % _label.lower())
+    pre_save.connect(load_line_amounts, sender=_model, dispatch_uid='line_totals_pre_save_%s' % _label.lower())
+    post_save.connect(update_document_totals_on_save, sender=_model, dispatch_uid='line_totals_save_%s' % _label.lower())
+    post_delete.connect(update_document_totals_on_delete, sender=_model, dispatch_uid='line_totals_delete_%s' % _label.lower())
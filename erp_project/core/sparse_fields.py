@@ -0,0 +1,132 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+
+from .projections import Projection, projection_for
+from .query_planner import _relation, optimize_queryset, plan_for_serializer
+
+
+def _names(request, param):
+    value = request.query_params.get(param)
+    if value is None:
+        return None
+    return [name.strip() for name in value.split(',') if name.strip()]
+
+
+class SparseFieldset:
+    """
+    ``?fields=`` and ``?expand=`` for a list endpoint.
+
+    Without either parameter the serializer is used unchanged. Otherwise
+    ``fields`` (comma-separated) limits the top-level fields, and relations
+    are only rendered in full when named in ``expand``: a foreign key that
+    is not expanded renders as its primary key, other relations (items,
+    comments, ...) are left out. The queryset is pruned to match: only the
+    needed columns are loaded and only expanded relations are joined or
+    prefetched.
+
+    SerializerMethodFields disable only() unless the serializer's Meta lists
+    the columns they read in ``method_field_sources``.
+    """
+
+    def __init__(self, request, serializer_class):
+        self.serializer_class = serializer_class
+        meta = serializer_class.Meta
+        self.hints = getattr(meta, 'prefetch_related_fields', [])
+        self.method_sources = getattr(meta, 'method_field_sources', {})
+        self.fields = _names(request, 'fields')
+        self.expand = _names(request, 'expand')
+        self.active = self.fields is not None or self.expand is not None
+        if not self.active:
+            return
+
+        declared = serializer_class().fields
+        relations = {name for name, field in declared.items() if self._is_relation(name, field)}
+        unknown = set(self.fields or ()) - set(declared)
+        if unknown:
+            raise ParseError(f'Unknown fields: {sorted(unknown)}')
+        not_relations = set(self.expand or ()) - relations
+        if not_relations:
+            raise ParseError(f'Only relations can be expanded, not {sorted(not_relations)}; relations: {sorted(relations)}')
+        self.expand = set(self.expand or ())
+
+    def _is_relation(self, name, field):
+        if isinstance(field, serializers.BaseSerializer):
+            return True
+        # Method fields backed by a prefetch hint (e.g. comments__user)
+        return isinstance(field, serializers.SerializerMethodField) and any(
+            hint.split('__')[0] == name for hint in self.hints
+        )
+
+    def prune(self, serializer):
+        """Removes or collapses the fields of a (non-many) serializer instance."""
+        if not self.active:
+            return serializer
+        fields = serializer.fields
+        model = serializer.Meta.model
+        for name, field in list(fields.items()):
+            if self.fields is not None and name not in self.fields and name not in self.expand:
+                del fields[name]
+            elif name in self.expand or not self._is_relation(name, field):
+                continue
+            elif isinstance(field, serializers.Serializer) and self._is_foreign_key(model, field):
+                source = {} if field.source == name else {'source': field.source}
+                fields[name] = serializers.PrimaryKeyRelatedField(read_only=True, **source)
+            else:
+                del fields[name]
+        return serializer
+
+    @staticmethod
+    def _is_foreign_key(model, field):
+        attrs = field.source_attrs
+        relation = _relation(model, attrs[0]) if len(attrs) == 1 else None
+        return relation is not None and relation.concrete and (relation.many_to_one or relation.one_to_one)
+
+    def serializer(self, *args, **kwargs):
+        serializer = self.serializer_class(*args, **kwargs)
+        self.prune(serializer.child if kwargs.get('many') else serializer)
+        return serializer
+
+    def optimize(self, queryset, ordering=()):
+        """
+        optimize_queryset() for the pruned serializer, plus only() for its
+        columns when every kept field reads a column or a joined relation.
+        ``ordering`` fields are always loaded (cursor pagination reads them).
+        """
+        if not self.active:
+            return optimize_queryset(queryset, self.serializer_class)
+        serializer = self.prune(self.serializer_class())
+        queryset = plan_for_serializer(serializer).apply(queryset)
+        columns = self._columns(serializer)
+        if columns is None:
+            return queryset
+        model = serializer.Meta.model
+        return queryset.only(model._meta.pk.name, *columns, *[field.lstrip('-') for field in ordering])
+
+    def _columns(self, serializer):
+        model = serializer.Meta.model
+        columns = []
+        for name, field in serializer.fields.items():
+            if field.write_only or self._is_relation(name, field) and not isinstance(field, serializers.Serializer):
+                continue  # prefetched
+            if isinstance(field, serializers.SerializerMethodField):
+                if name not in self.method_sources:
+                    return None
+                columns.extend(self.method_sources[name])
+                continue
+            if field.source == '*':
+                return None
+            relation = _relation(model, field.source_attrs[0])
+            if relation is not None and not relation.concrete:
+                continue  # reverse relations are prefetched
+            try:
+                model._meta.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                return None  # property or method on the model
+            columns.append(field.source_attrs[0])
+        return columns
+
+    def projection(self):
+        if not self.active:
+            return projection_for(self.serializer_class)
+        return Projection(self.prune(self.serializer_class()))
@@ -0,0 +1,68 @@
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+
+from .models import Task, TaskCounter
+
+# Task.status -> TaskCounter field
+STATUS_FIELDS = {
+    'Not Started': 'not_started',
+    'In Progress': 'in_progress',
+    'Completed': 'completed',
+    'Awaiting Feedback': 'awaiting_feedback',
+}
+
+
+def count_tasks(user_id):
+    """Counts a user's tasks by status with a single conditional aggregation."""
+    return Task.objects.filter(assigned_to_id=user_id).aggregate(**{
+        field: Count('id', filter=Q(status=status)) for status, field in STATUS_FIELDS.items()
+    })
+
+
+def rebuild_task_counter(user_id):
+    counts = count_tasks(user_id)
+    counter, _ = TaskCounter.objects.update_or_create(user_id=user_id, defaults=counts)
+    return counter
+
+
+def get_task_summary(user_id):
+    """{'not_started': n, ...} for the user, read from the maintained counters."""
+    counter = TaskCounter.objects.filter(user_id=user_id).values(*STATUS_FIELDS.values()).first()
+    if counter is None:
+        counter = count_tasks(user_id)
+        try:
+            with transaction.atomic():
+                TaskCounter.objects.create(user_id=user_id, **counter)
+        except IntegrityError:
+            pass  # created concurrently by record_task_change()
+    return counter
+
+
+def _adjust(user_id, field, delta):
+    return TaskCounter.objects.filter(user_id=user_id).update(**{field: F(field) + delta})
+
+
+def record_task_change(old_state, new_state):
+    """
+    Moves a task between counters. States are (assigned_to_id, status), or
+    None for a task that did not exist before / does not exist any more.
+    """
+    rebuilt = set()
+    for state, delta in ((old_state, -1), (new_state, 1)):
+        if state is None:
+            continue
+        user_id, status = state
+        field = STATUS_FIELDS.get(status)
+        if field is None or user_id is None or user_id in rebuilt:
+            continue
+        if _adjust(user_id, field, delta) or new_state is None:
+            # Deletes never create counters: the user may be going away too
+            continue
+        # First change for this user: count from the table, which already
+        # includes the change being recorded.
+        try:
+            with transaction.atomic():
+                TaskCounter.objects.create(user_id=user_id, **count_tasks(user_id))
+            rebuilt.add(user_id)
+        except IntegrityError:
+            _adjust(user_id, field, delta)  # created concurrently
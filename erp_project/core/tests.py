@@ -1,3 +1,126 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from rest_framework.test import APITestCase
+
+from .models import Candidate, CandidateDocument, Category, Customer, Department, Product, Task
+from .query_budget import QueryLog, describe_repeats
+from .sequences import next_document_numbers
+
+# Rows seeded per list: more than REPEATED_QUERY_THRESHOLD, so a query
+# run once per row is caught as a repeated shape.
+ROWS = 5
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    DOCUMENT_SEQUENCE_DATABASE=None,
+    REPEATED_QUERY_CHECK='raise',
+)
+class QueryBudgetTestCase(APITestCase):
+    """
+    Base for the query budget tests: ``assertQueryBudget(budget, url)``
+    requests ``url`` as a superuser and fails when it runs more than
+    ``budget`` queries or repeats a query shape. RepeatedQueryMiddleware
+    runs in 'raise' mode as well, so every request made by these tests is
+    checked. The cache starts empty, so budgets are for cold requests;
+    seed more rows than REPEATED_QUERY_THRESHOLD so a per-row query shows
+    up.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_superuser('budget', 'budget@example.com', 'budget')
+        self.client.force_authenticate(self.user)
+
+    def assertQueryBudget(self, budget, url, method='get', status_code=200, **kwargs):
+        with QueryLog() as log:
+            response = getattr(self.client, method)(url, **kwargs)
+        label = f'{method.upper()} {url}'
+        self.assertEqual(response.status_code, status_code, f'{label}: {getattr(response, "data", response.content)!r}')
+        repeats = log.repeated()
+        if repeats:
+            self.fail(f'{describe_repeats(repeats, label)}\n{log.report()}')
+        if log.count > budget:
+            self.fail(f'{label} ran {log.count} queries, budget {budget}:\n{log.report()}')
+        return response
+
+
+class CoreQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        today = datetime.date.today()
+        for i in range(ROWS):
+            Category.objects.create(name=f'Category {i}')
+            Department.objects.create(code=f'D{i}', department_name=f'Department {i}')
+            Product.objects.create(name=f'Product {i}', unit_price=Decimal('10.00'), status='Active')
+            Customer.objects.create(customer_id=f'C{i}', first_name=f'Customer {i}', email=f'customer{i}@example.com', status='Active')
+            Task.objects.create(name=f'Task {i}', status='Not Started', start_date=today, due_date=today, assigned_to=self.user, priority='Low')
+            candidate = Candidate.objects.create(
+                first_name=f'Candidate {i}', email=f'candidate{i}@example.com',
+                aadhar_number=f'1234 5678 000{i}', pan_number=f'ABCDE000{i}F',
+            )
+            candidate.upload_documents.set([
+                CandidateDocument.objects.create(file=f'candidate_documents/{i}-{j}.pdf') for j in range(2)
+            ])
+
+    def test_product_list(self):
+        self.assertQueryBudget(2, '/api/products/')
+
+    def test_customer_list(self):
+        self.assertQueryBudget(2, '/api/customers/')
+
+    def test_task_list(self):
+        self.assertQueryBudget(2, '/api/tasks/')
+
+    def test_task_summary(self):
+        self.assertQueryBudget(1, '/api/task-summary/')
+
+    def test_onboarding_list(self):
+        self.assertQueryBudget(2, '/api/onboarding/')
+
+    def test_category_list(self):
+        self.assertQueryBudget(2, '/api/categories/')
+
+    def test_department_list(self):
+        self.assertQueryBudget(2, '/api/departments/')
+
+
+class QueryLogTests(APITestCase):
+    def test_per_row_queries_share_a_shape(self):
+        for i in range(ROWS):
+            Category.objects.create(name=f'Category {i}')
+        with QueryLog() as log:
+            for category in Category.objects.all():
+                Category.objects.filter(pk=category.pk).exists()
+        self.assertEqual(log.count, ROWS + 1)
+        [(shape, times)] = log.repeated(threshold=ROWS)
+        self.assertEqual(times, ROWS)
+        self.assertIn('N+1 in loop', describe_repeats(log.repeated(threshold=ROWS), 'loop'))
+
+
+# Test cases roll back the default connection only, so numbers are drawn
+# in the test's transaction rather than on the sequence connection.
+@override_settings(DOCUMENT_SEQUENCE_DATABASE=None)
+class DocumentSequenceTests(TestCase):
+    def test_numbers_inside_a_transaction_that_has_written(self):
+        with transaction.atomic():
+            Category.objects.create(name='Category')
+            first = Product.objects.create(name='First', unit_price=Decimal('10.00'), status='Active')
+            second = Product.objects.create(name='Second', unit_price=Decimal('10.00'), status='Active')
+            bulk = next_document_numbers('product', 3)
+        numbers = [first.product_id, second.product_id, *bulk]
+        self.assertEqual(len(set(numbers)), 5)
+        self.assertTrue(all(number.startswith('CVB') for number in numbers))
+
+    def test_rolled_back_numbers_are_reissued_once(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            rolled_back = Product.objects.create(name='Rolled back', unit_price=Decimal('10.00'), status='Active')
+            raise RuntimeError
+        kept = Product.objects.create(name='Kept', unit_price=Decimal('10.00'), status='Active')
+        self.assertEqual(kept.product_id, rolled_back.product_id)
+        self.assertEqual(Product.objects.filter(product_id=kept.product_id).count(), 1)
@@ -6,6 +6,7 @@ from django.conf.urls.static import static
 urlpatterns = [
     path('register/', views.RegisterView.as_view(), name='register'),
     path('login/', views.LoginView.as_view(), name='login'),
+    path('logout/', views.LogoutView.as_view(), name='logout'),
     path('profile/', views.ProfileView.as_view(), name='profile'),
     path('departments/', views.DepartmentListView.as_view(), name='department-list'),
     path('departments/<int:pk>/', views.DepartmentDetailView.as_view(), name='department-detail'),
@@ -18,6 +19,7 @@ urlpatterns = [
     path('products/', views.ProductListView.as_view(), name='product-list'),
     path('products/<int:pk>/', views.ProductDetailView.as_view(), name='product-detail'),
     path('products/import/', views.ProductImportView.as_view(), name='product-import'),
+    path('products/export/', views.ProductExportView.as_view(), name='product-export'),
     path('categories/', views.CategoryListView.as_view(), name='category-list'),
     path('categories/<int:pk>/', views.CategoryDetailView.as_view(), name='category-detail'),
     path('tax-codes/', views.TaxCodeListView.as_view(), name='tax-code-list'),
@@ -36,6 +38,7 @@ urlpatterns = [
     path('onboarding/<int:pk>/', views.OnboardingDetailView.as_view(), name='onboarding-detail'),
     path('attendance/', views.AttendanceView.as_view(), name='attendance'),
     path('attendance/check-in-out/', views.CheckInOutView.as_view(), name='check-in-out'),
+    path('attendance/report/', views.AttendanceReportView.as_view(), name='attendance-report'),
     path('attendance/holidays/', views.GovernmentHolidayView.as_view(), name='holidays'),
     path('tasks/', views.TaskListView.as_view(), name='task-list'),
     path('tasks/<int:pk>/', views.TaskDetailView.as_view(), name='task-detail'),
@@ -43,13 +46,17 @@ urlpatterns = [
     path('user-list/',views.UserListView.as_view(), name = 'user-list'),
     path('dashboard/tasks/', views.DashboardTaskView.as_view(), name='dashboard-tasks'),
     path('dashboard/attendance/', views.DashboardAttendanceView.as_view(), name='dashboard-attendance'),
+    path('dashboard/attendance/department/', views.DepartmentAttendanceView.as_view(), name='dashboard-attendance-department'),
     path('forgot-password/', views.ForgotPasswordView.as_view(), name='forgot-password'),
     path('reset-password/<str:token>/', views.ResetPasswordView.as_view(), name='reset-password'),
     path('customers/', views.CustomerListView.as_view(), name='customer_list'),
     path('customers/<int:pk>/', views.CustomerDetailView.as_view(), name='customer_detail'),
+    path('customers/export/', views.CustomerExportView.as_view(), name='customer_export'),
     path('customers/summary/', views.CustomerSummaryView.as_view(), name='customer_summary'),
     path('customers/duplicates/', views.CustomerDuplicatesView.as_view(), name='customer_duplicates'),
     path('customers/merge/', views.CustomerMergeView.as_view(), name='customer_merge'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('metrics/', views.MetricsView.as_view(), name='metrics'),
    
 
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from rest_framework.authtoken.models import Token
 from django.contrib.auth import authenticate
-from django.core.paginator import Paginator
+from .pagination import ListPagination
 from .serializers import (
     UserSerializer, LoginSerializer, ProfileDetailSerializer,
     ProfileUpdateSerializer, DepartmentSerializer, DepartmentCreateSerializer,
@@ -11,7 +11,14 @@ from .serializers import (
 )
 from .models import Department, Role, User, Branch
 from .permissions import RoleBasedPermission  # Import the custom permission
-from django.core.mail import send_mail
+from .query_planner import optimize_queryset
+from .projections import projection_for
+from .list_filters import IndexedFilter
+from .authentication import revoke_user_tokens
+from .conditional import conditional_list_response
+from .outbox import queue_email
+from .task_counters import get_task_summary
+from .attendance_rollup import monthly_summary, record_attendance_change
 from django.conf import settings
 from django.utils.crypto import get_random_string
 import logging
@@ -42,7 +49,6 @@ class RegisterView(APIView):
 
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.core.mail import send_mail
 from django.conf import settings
 from django.utils.crypto import get_random_string
 from .models import Profile
@@ -98,7 +104,7 @@ class ForgotPasswordView(APIView):
                 subject = 'Password Reset Request'
                 message = f'Click the link to reset your password: {reset_link}'
                 from_email = settings.EMAIL_HOST_USER
-                send_mail(subject, message, from_email, [email], fail_silently=False)
+                queue_email(subject, message, [email], from_email=from_email)
 
                 return Response({'redirect': '/check-email', 'email': email}, status=status.HTTP_200_OK)
             except (User.DoesNotExist, Profile.DoesNotExist):
@@ -119,14 +125,23 @@ class ResetPasswordView(APIView):
                 profile.reset_token = None
                 profile.reset_token_expiry = None
                 profile.save()
+                # Sign out every session that used the old password
+                Token.objects.filter(user=user).delete()
                 return Response({'message': 'Password reset successful. Please log in.', 'redirect': '/login'}, status=status.HTTP_200_OK)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Profile.DoesNotExist:
             return Response({'error': 'Invalid or expired token'}, status=status.HTTP_400_BAD_REQUEST)
 
+class LogoutView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        Token.objects.filter(user=request.user).delete()
+        return Response({'message': 'Logged out successfully', 'redirect': '/login'}, status=status.HTTP_200_OK)
+
 
 
-from rest_framework.pagination import PageNumberPagination
+from .pagination import ListPagination
 from rest_framework import permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -147,8 +162,7 @@ class BranchListView(APIView):
 
     def get(self, request):
         branches = Branch.objects.all()
-        serializer = BranchSerializer(branches, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return conditional_list_response(request, [Branch], lambda: BranchSerializer(branches, many=True).data)
 
     def post(self, request):
         serializer = BranchSerializer(data=request.data)
@@ -191,34 +205,36 @@ class DepartmentListView(APIView):
     permission_classes = [permissions.IsAuthenticated, RoleBasedPermission]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 5))
         branch_id = request.query_params.get('branch')
         dropdown = request.query_params.get('dropdown', 'false').lower() == 'true'
         include_roles = request.query_params.get('include_roles', 'false').lower() == 'true'
 
-        departments = Department.objects.all()
+        if dropdown:
+            departments = Department.objects.all()
+        elif include_roles:
+            departments = optimize_queryset(Department.objects.all(), DepartmentSerializer)
+        else:
+            departments = Department.objects.select_related('branch')
         if branch_id:
             try:
                 departments = departments.filter(branch_id=branch_id)
             except ValueError:
                 return Response({'error': 'Invalid branch ID'}, status=status.HTTP_400_BAD_REQUEST)
 
-        paginator = PageNumberPagination()
-        paginator.page_size = per_page
-        page_obj = paginator.paginate_queryset(departments, request)
+        paginator = ListPagination(ordering=('id',), per_page=5, cache_total=False)
 
-        if dropdown:
-            serializer = DepartmentDropdownSerializer(page_obj, many=True)
-        else:
-            serializer = DepartmentSerializer(page_obj, many=True, context={'include_roles': include_roles})
+        def build():
+            page_obj = paginator.paginate_queryset(departments, request)
+            if dropdown:
+                serializer = DepartmentDropdownSerializer(page_obj, many=True)
+            else:
+                serializer = DepartmentSerializer(page_obj, many=True, context={'include_roles': include_roles})
+            return {
+                'departments': serializer.data,
+                **paginator.get_meta(),
+            }
 
-        return Response({
-            'departments': serializer.data,
-            'total_pages': paginator.page.paginator.num_pages,
-            'current_page': page,
-            'total_entries': departments.count(),
-        }, status=status.HTTP_200_OK)
+        return conditional_list_response(request, [Department, Branch, Role], build)
 
     def post(self, request):
         serializer = DepartmentCreateSerializer(data=request.data)
@@ -232,7 +248,7 @@ class DepartmentDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            department = Department.objects.get(pk=pk)
+            department = optimize_queryset(Department.objects.all(), DepartmentSerializer).get(pk=pk)
             serializer = DepartmentSerializer(department)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Department.DoesNotExist:
@@ -261,28 +277,26 @@ class RoleView(APIView):
     permission_classes = [permissions.IsAuthenticated, RoleBasedPermission]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
         department_id = request.query_params.get('department')
 
-        roles = Role.objects.all().order_by('id')
+        roles = optimize_queryset(Role.objects.all().order_by('id'), RoleSerializer)
         if department_id:
             try:
                 roles = roles.filter(department_id=department_id)
             except ValueError:
                 return Response({'error': 'Invalid department ID'}, status=status.HTTP_400_BAD_REQUEST)
 
-        paginator = PageNumberPagination()
-        paginator.page_size = per_page
-        page_obj = paginator.paginate_queryset(roles, request)
-        serializer = RoleSerializer(page_obj, many=True)
+        paginator = ListPagination(ordering=('id',), cache_total=False)
 
-        return Response({
-            'roles': serializer.data,
-            'total_pages': paginator.page.paginator.num_pages,
-            'current_page': page,
-            'total_entries': roles.count(),
-        }, status=status.HTTP_200_OK)
+        def build():
+            page_obj = paginator.paginate_queryset(roles, request)
+            serializer = RoleSerializer(page_obj, many=True)
+            return {
+                'roles': serializer.data,
+                **paginator.get_meta(),
+            }
+
+        return conditional_list_response(request, [Role, Department, Branch], build)
 
     def post(self, request):
         serializer = RoleUpdateSerializer(data=request.data)
@@ -297,33 +311,28 @@ class RoleDetailView(APIView):
     def get(self, request, pk=None):
         if pk:
             try:
-                role = Role.objects.get(pk=pk)
+                role = optimize_queryset(Role.objects.all(), RoleSerializer).get(pk=pk)
                 serializer = RoleSerializer(role)
                 return Response(serializer.data, status=status.HTTP_200_OK)
             except Role.DoesNotExist:
                 return Response({'error': 'Role not found'}, status=status.HTTP_404_NOT_FOUND)
         else:
-            page = int(request.query_params.get('page', 1))
-            per_page = int(request.query_params.get('per_page', 10))
             department_id = request.query_params.get('department')
 
-            roles = Role.objects.all().order_by('id')
+            roles = optimize_queryset(Role.objects.all().order_by('id'), RoleSerializer)
             if department_id:
                 try:
                     roles = roles.filter(department_id=department_id)
                 except ValueError:
                     return Response({'error': 'Invalid department ID'}, status=status.HTTP_400_BAD_REQUEST)
 
-            paginator = PageNumberPagination()
-            paginator.page_size = per_page
+            paginator = ListPagination(ordering=('id',))
             page_obj = paginator.paginate_queryset(roles, request)
             serializer = RoleSerializer(page_obj, many=True)
 
             return Response({
                 'roles': serializer.data,
-                'total_pages': paginator.page.paginator.num_pages,
-                'current_page': page,
-                'total_entries': roles.count(),
+                **paginator.get_meta(),
             }, status=status.HTTP_200_OK)
 
     def put(self, request, pk):
@@ -376,6 +385,7 @@ class ProfileView(APIView):
                     else:
                         return Response(password_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+                revoke_user_tokens(request.user.id)
                 return Response(ProfileDetailSerializer(profile).data, status=status.HTTP_200_OK)
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         except Profile.DoesNotExist:
@@ -385,17 +395,13 @@ class ManageUsersView(APIView):
     permission_classes = [permissions.IsAuthenticated, RoleBasedPermission]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
-        users = User.objects.all().order_by('id')
-        paginator = Paginator(users, per_page)
-        page_obj = paginator.get_page(page)
+        users = optimize_queryset(User.objects.all().order_by('id'), ManageUserSerializer)
+        paginator = ListPagination(ordering=('id',))
+        page_obj = paginator.paginate_queryset(users, request)
         serializer = ManageUserSerializer(page_obj, many=True)
         return Response({
             'users': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': users.count(),
+            **paginator.get_meta(),
         }, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -438,18 +444,8 @@ class ManageUsersView(APIView):
             Your Admin Team
             """
             from_email = settings.DEFAULT_FROM_EMAIL
-            try:
-                send_mail(
-                    subject,
-                    message,
-                    from_email,
-                    [user.email],
-                    fail_silently=False,
-                )
-                logger.info(f"Email sent to {user.email}")
-            except Exception as e:
-                logger.error(f"Failed to send email to {user.email}: {str(e)}")
-                return Response({'error': 'User created but email failed to send'}, status=status.HTTP_201_CREATED)
+            queue_email(subject, message, [user.email], from_email=from_email)
+            logger.info(f"Credentials email queued for {user.email}")
 
             return Response(ManageUserSerializer(user).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -459,7 +455,7 @@ class ManageUserDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            user = User.objects.get(pk=pk)
+            user = optimize_queryset(User.objects.all(), ManageUserSerializer).get(pk=pk)
             serializer = ManageUserSerializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except User.DoesNotExist:
@@ -492,8 +488,9 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from .models import Product, Category, TaxCode, UOM, Warehouse, Size, Color, Supplier
 from .serializers import ProductSerializer, CategorySerializer, TaxCodeSerializer, UOMSerializer, WarehouseSerializer, SizeSerializer, ColorSerializer, SupplierSerializer
-from django.core.paginator import Paginator
-import pandas as pd
+from .pagination import ListPagination
+from .product_import import import_products, read_sheet
+from .export import export_response
 from django.core.files.storage import default_storage
 from .permissions import RoleBasedPermission  # Assuming this exists
 
@@ -501,17 +498,12 @@ class ProductListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
-        products = Product.objects.all()
-        paginator = Paginator(products, per_page)
-        page_obj = paginator.get_page(page)
-        serializer = ProductSerializer(page_obj, many=True)
+        projection = projection_for(ProductSerializer)
+        paginator = ListPagination(ordering=('id',))
+        page_obj = paginator.paginate_queryset(projection.values(Product.objects.all()), request)
         return Response({
-            'products': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': products.count(),
+            'products': projection.render(page_obj),
+            **paginator.get_meta(),
         }, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -557,6 +549,21 @@ class ProductDetailView(APIView):
         except Product.DoesNotExist:
             return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
 
+class ProductExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    export_columns = [
+        ('Product ID', 'product_id'), ('Name', 'name'), ('Product Type', 'product_type'),
+        ('Category', 'category__name'), ('Tax Code', 'tax_code__name'), ('UOM', 'uom__name'),
+        ('Warehouse', 'warehouse__name'), ('Size', 'size__name'), ('Color', 'color__name'),
+        ('Supplier', 'supplier__name'), ('Unit Price', 'unit_price'), ('Discount', 'discount'),
+        ('Quantity', 'quantity'), ('Stock Level', 'stock_level'), ('Reorder Level', 'reorder_level'),
+        ('Status', 'status'), ('Product Usage', 'product_usage'), ('Sub Category', 'sub_category'),
+    ]
+
+    def get(self, request):
+        return export_response(request, Product.objects.all(), self.export_columns, 'products')
+
 class ProductImportView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -567,63 +574,29 @@ class ProductImportView(APIView):
         if not file:
             return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
 
-        df = pd.read_excel(file) if file.name.endswith('.xlsx') else pd.read_csv(file)
-        required_fields = ['product_id', 'name', 'product_type', 'category', 'status', 'stock_level', 'unit_price']
-        missing_fields = [field for field in required_fields if field not in df.columns]
-        if missing_fields:
-            return Response({'error': f'Missing required fields: {missing_fields}'}, status=status.HTTP_400_BAD_REQUEST)
-
-        valid_rows = []
-        invalid_rows = []
-        skipped_rows = []
-
-        seen_product_ids = set()
-        seen_product_names = set()
-
-        for index, row in df.iterrows():
-            if not all(row[field] for field in required_fields):
-                invalid_rows.append(index)
-                continue
-
-            product_id = str(row['product_id'])
-            product_name = str(row['name'])
-            if product_id in seen_product_ids or product_name in seen_product_names:
-                skipped_rows.append(index)
-                continue
-
-            seen_product_ids.add(product_id)
-            seen_product_names.add(product_name)
-            valid_rows.append(row.to_dict())
-
-        for row in valid_rows:
-            serializer = ProductSerializer(data=row)
-            if serializer.is_valid():
-                serializer.save()
-            else:
-                invalid_rows.append(row)
-
-        return Response({
-            'valid_rows': len(valid_rows),
-            'invalid_rows': len(invalid_rows),
-            'skipped_rows': len(skipped_rows)
-        }, status=status.HTTP_201_CREATED)
+        df = read_sheet(file)
+        try:
+            report = import_products(df)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report, status=status.HTTP_201_CREATED)
 
 class CategoryListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
         categories = Category.objects.all()
-        paginator = Paginator(categories, per_page)
-        page_obj = paginator.get_page(page)
-        serializer = CategorySerializer(page_obj, many=True)
-        return Response({
-            'categories': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': categories.count(),
-        }, status=status.HTTP_200_OK)
+        paginator = ListPagination(ordering=('id',), cache_total=False)
+
+        def build():
+            page_obj = paginator.paginate_queryset(categories, request)
+            serializer = CategorySerializer(page_obj, many=True)
+            return {
+                'categories': serializer.data,
+                **paginator.get_meta(),
+            }
+
+        return conditional_list_response(request, [Category], build)
 
     def post(self, request):
         if not request.user.is_superuser:
@@ -672,18 +645,18 @@ class TaxCodeListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
         tax_codes = TaxCode.objects.all()
-        paginator = Paginator(tax_codes, per_page)
-        page_obj = paginator.get_page(page)
-        serializer = TaxCodeSerializer(page_obj, many=True)
-        return Response({
-            'tax_codes': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': tax_codes.count(),
-        }, status=status.HTTP_200_OK)
+        paginator = ListPagination(ordering=('id',), cache_total=False)
+
+        def build():
+            page_obj = paginator.paginate_queryset(tax_codes, request)
+            serializer = TaxCodeSerializer(page_obj, many=True)
+            return {
+                'tax_codes': serializer.data,
+                **paginator.get_meta(),
+            }
+
+        return conditional_list_response(request, [TaxCode], build)
 
     def post(self, request):
         if not request.user.is_superuser:
@@ -732,18 +705,18 @@ class UOMListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
         uoms = UOM.objects.all()
-        paginator = Paginator(uoms, per_page)
-        page_obj = paginator.get_page(page)
-        serializer = UOMSerializer(page_obj, many=True)
-        return Response({
-            'uoms': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': uoms.count(),
-        }, status=status.HTTP_200_OK)
+        paginator = ListPagination(ordering=('id',), cache_total=False)
+
+        def build():
+            page_obj = paginator.paginate_queryset(uoms, request)
+            serializer = UOMSerializer(page_obj, many=True)
+            return {
+                'uoms': serializer.data,
+                **paginator.get_meta(),
+            }
+
+        return conditional_list_response(request, [UOM], build)
 
     def post(self, request):
         if not request.user.is_superuser:
@@ -792,18 +765,18 @@ class WarehouseListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
         warehouses = Warehouse.objects.all()
-        paginator = Paginator(warehouses, per_page)
-        page_obj = paginator.get_page(page)
-        serializer = WarehouseSerializer(page_obj, many=True)
-        return Response({
-            'warehouses': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': warehouses.count(),
-        }, status=status.HTTP_200_OK)
+        paginator = ListPagination(ordering=('id',), cache_total=False)
+
+        def build():
+            page_obj = paginator.paginate_queryset(warehouses, request)
+            serializer = WarehouseSerializer(page_obj, many=True)
+            return {
+                'warehouses': serializer.data,
+                **paginator.get_meta(),
+            }
+
+        return conditional_list_response(request, [Warehouse], build)
 
     def post(self, request):
         if not request.user.is_superuser:
@@ -852,18 +825,18 @@ class SizeListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
         sizes = Size.objects.all()
-        paginator = Paginator(sizes, per_page)
-        page_obj = paginator.get_page(page)
-        serializer = SizeSerializer(page_obj, many=True)
-        return Response({
-            'sizes': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': sizes.count(),
-        }, status=status.HTTP_200_OK)
+        paginator = ListPagination(ordering=('id',), cache_total=False)
+
+        def build():
+            page_obj = paginator.paginate_queryset(sizes, request)
+            serializer = SizeSerializer(page_obj, many=True)
+            return {
+                'sizes': serializer.data,
+                **paginator.get_meta(),
+            }
+
+        return conditional_list_response(request, [Size], build)
 
     def post(self, request):
         if not request.user.is_superuser:
@@ -912,18 +885,18 @@ class ColorListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
         colors = Color.objects.all()
-        paginator = Paginator(colors, per_page)
-        page_obj = paginator.get_page(page)
-        serializer = ColorSerializer(page_obj, many=True)
-        return Response({
-            'colors': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': colors.count(),
-        }, status=status.HTTP_200_OK)
+        paginator = ListPagination(ordering=('id',), cache_total=False)
+
+        def build():
+            page_obj = paginator.paginate_queryset(colors, request)
+            serializer = ColorSerializer(page_obj, many=True)
+            return {
+                'colors': serializer.data,
+                **paginator.get_meta(),
+            }
+
+        return conditional_list_response(request, [Color], build)
 
     def post(self, request):
         if not request.user.is_superuser:
@@ -972,18 +945,18 @@ class SupplierListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
         suppliers = Supplier.objects.all()
-        paginator = Paginator(suppliers, per_page)
-        page_obj = paginator.get_page(page)
-        serializer = SupplierSerializer(page_obj, many=True)
-        return Response({
-            'suppliers': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': suppliers.count(),
-        }, status=status.HTTP_200_OK)
+        paginator = ListPagination(ordering=('id',), cache_total=False)
+
+        def build():
+            page_obj = paginator.paginate_queryset(suppliers, request)
+            serializer = SupplierSerializer(page_obj, many=True)
+            return {
+                'suppliers': serializer.data,
+                **paginator.get_meta(),
+            }
+
+        return conditional_list_response(request, [Supplier], build)
 
     def post(self, request):
         if not request.user.is_superuser:
@@ -1034,7 +1007,7 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from .models import Candidate, Department, Branch, Role
 from .serializers import CandidateSerializer, DepartmentSerializer, BranchSerializer, RoleSerializer
-from django.core.paginator import Paginator
+from .pagination import ListPagination
 from rest_framework.parsers import MultiPartParser, FormParser
 import os, uuid
 from django.conf import settings
@@ -1105,10 +1078,10 @@ class OnboardingListView(APIView):
 
     def get(self, request, format=None):
         try:
-            candidates = Candidate.objects.select_related('department', 'branch', 'designation').all()
-            serializer = CandidateSerializer(candidates, many=True)
-            logger.info("Fetched %d candidates", candidates.count())
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            candidates = optimize_queryset(Candidate.objects.all(), CandidateSerializer)
+            data = CandidateSerializer(candidates, many=True).data
+            logger.info("Fetched %d candidates", len(data))
+            return Response(data, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error("Error fetching candidates: %s", str(e))
             return Response(
@@ -1197,9 +1170,12 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework import permissions
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Count, Q, Sum
 from django.utils import timezone
-from .models import Attendance, GovernmentHoliday
-from .serializers import AttendanceSerializer, CheckInOutSerializer, GovernmentHolidaySerializer
+from .models import Attendance, AttendancePunch, GovernmentHoliday
+from .serializers import AttendanceSerializer, AttendanceReportQuerySerializer, CheckInOutSerializer, GovernmentHolidaySerializer
 from django.contrib.auth.models import User
 
 class AttendanceView(APIView):
@@ -1207,7 +1183,7 @@ class AttendanceView(APIView):
 
     def get(self, request):
         user = request.user
-        attendance_data = Attendance.objects.filter(user=user).order_by('date')
+        attendance_data = Attendance.objects.filter(user=user).prefetch_related('punches').order_by('date')
         serializer = AttendanceSerializer(attendance_data, many=True)
         return Response(serializer.data)
 
@@ -1228,55 +1204,84 @@ class CheckInOutView(APIView):
             if date > current_date:
                 return Response({"error": "Cannot check-in/out for future dates"}, status=status.HTTP_400_BAD_REQUEST)
 
-            attendance, created = Attendance.objects.get_or_create(
-                user=user,
-                date=date,
-                defaults={'check_in_times': [], 'total_hours': 0.0}
-            )
-
-            check_in_times = attendance.check_in_times
-            now = timezone.now().isoformat()
-
-            if is_check_in:
-                if len(check_in_times) % 2 == 0:  # Even: Allow check-in
-                    check_in_times.append(now)
-                else:
-                    return Response({"error": "Already checked in. Check out first."}, status=status.HTTP_400_BAD_REQUEST)
-            else:
-                if len(check_in_times) % 2 == 1:  # Odd: Allow check-out
-                    check_in_times.append(now)
+            with transaction.atomic():
+                # The row lock serializes concurrent punches of the same user
+                attendance, created = Attendance.objects.select_for_update().get_or_create(
+                    user=user,
+                    date=date,
+                    defaults={'total_hours': Decimal('0.00')}
+                )
+                if created:
+                    # Counted as an absent day until hours are logged
+                    record_attendance_change(user.id, date, None, 0)
+
+                now = timezone.now()
+                if is_check_in:
+                    if attendance.open_check_in is not None:
+                        return Response({"error": "Already checked in. Check out first."}, status=status.HTTP_400_BAD_REQUEST)
+                    attendance.open_check_in = now
+                    attendance.save(update_fields=['open_check_in'])
                 else:
-                    return Response({"error": "Not checked in yet."}, status=status.HTTP_400_BAD_REQUEST)
-
-            # Calculate total hours
-            total_hours = 0.0
-            times = [timezone.datetime.fromisoformat(t) for t in check_in_times]
-            for i in range(0, len(times) - 1, 2):
-                if i + 1 < len(times):
-                    total_hours += (times[i + 1] - times[i]).total_seconds() / 3600
-
-            attendance.check_in_times = check_in_times
-            attendance.total_hours = round(total_hours, 2)
-            attendance.save()
+                    if attendance.open_check_in is None:
+                        return Response({"error": "Not checked in yet."}, status=status.HTTP_400_BAD_REQUEST)
+                    # Only the pair closed by this punch is added to the total
+                    hours = Decimal(str(round((now - attendance.open_check_in).total_seconds() / 3600, 2)))
+                    old_hours = attendance.total_hours
+                    attendance.total_hours = old_hours + hours
+                    attendance.open_check_in = None
+                    attendance.save(update_fields=['total_hours', 'open_check_in'])
+                    record_attendance_change(user.id, date, old_hours, attendance.total_hours)
+
+                AttendancePunch.objects.create(attendance=attendance, punched_at=now, is_check_in=is_check_in)
 
             serializer = AttendanceSerializer(attendance)
             return Response(serializer.data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class AttendanceReportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({'error': 'Only super admins can view the attendance report'}, status=status.HTTP_403_FORBIDDEN)
+        query = AttendanceReportQuerySerializer(data=request.query_params)
+        if not query.is_valid():
+            return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+        start_date = query.validated_data['start_date']
+        end_date = query.validated_data['end_date']
+
+        # One grouped query over the (user, date) index for every user
+        rows = Attendance.objects.filter(date__range=(start_date, end_date)).values(
+            'user_id', 'user__username', 'user__first_name', 'user__last_name',
+        ).annotate(
+            present=Count('id', filter=Q(total_hours__gt=0)),
+            absent=Count('id', filter=Q(total_hours=0)),
+            total_hours=Sum('total_hours'),
+        ).order_by('user__username')
+
+        report = [{
+            'user_id': row['user_id'],
+            'username': row['user__username'],
+            'name': f"{row['user__first_name']} {row['user__last_name']}".strip(),
+            'present': row['present'],
+            'absent': row['absent'],
+            'total_hours': float(row['total_hours'] or 0),
+        } for row in rows]
+        return Response({'start_date': start_date, 'end_date': end_date, 'report': report}, status=status.HTTP_200_OK)
+
 class GovernmentHolidayView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
         holidays = GovernmentHoliday.objects.all()
-        serializer = GovernmentHolidaySerializer(holidays, many=True)
-        return Response(serializer.data)
+        return conditional_list_response(request, [GovernmentHoliday], lambda: GovernmentHolidaySerializer(holidays, many=True).data)
     
 
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from django.core.paginator import Paginator
+from .pagination import ListPagination
 from .models import Task
 from .serializers import TaskSerializer, UserSerializer
 from django.contrib.auth.models import User
@@ -1284,18 +1289,17 @@ from django.contrib.auth.models import User
 class TaskListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    list_filter = IndexedFilter(Task, {}, orderings=('due_date', '-due_date'), fixed=('assigned_to',))
+
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
-        tasks = Task.objects.filter(assigned_to=request.user).order_by('due_date')
-        paginator = Paginator(tasks, per_page)
-        page_obj = paginator.get_page(page)
+        tasks, ordering = self.list_filter.apply(Task.objects.all(), request, assigned_to=request.user)
+        tasks = optimize_queryset(tasks, TaskSerializer)
+        paginator = ListPagination(ordering=ordering)
+        page_obj = paginator.paginate_queryset(tasks, request)
         serializer = TaskSerializer(page_obj, many=True)
         return Response({
             'tasks': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': tasks.count(),
+            **paginator.get_meta(),
         }, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -1310,7 +1314,7 @@ class TaskDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            task = Task.objects.get(pk=pk, assigned_to=request.user)
+            task = optimize_queryset(Task.objects.all(), TaskSerializer).get(pk=pk, assigned_to=request.user)
             serializer = TaskSerializer(task)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Task.DoesNotExist:
@@ -1339,13 +1343,7 @@ class TaskSummaryView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        tasks = Task.objects.filter(assigned_to=request.user)
-        summary = {
-            'not_started': tasks.filter(status='Not Started').count(),
-            'in_progress': tasks.filter(status='In Progress').count(),
-            'completed': tasks.filter(status='Completed').count(),
-            'awaiting_feedback': tasks.filter(status='Awaiting Feedback').count(),
-        }
+        summary = get_task_summary(request.user.id)
         return Response(summary, status=status.HTTP_200_OK)
 
 class UserListView(APIView):
@@ -1363,99 +1361,88 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .serializers import TaskDataSerializer, DashboardAttendanceSerializer, TaskSerializer, AttendanceSerializer
-from .models import Task, Attendance
+from .models import Task, Attendance, AttendanceMonthly
 from django.db.models import Count, Q
 from django.utils import timezone
-from django.db.models.functions import ExtractMonth
 
 class DashboardTaskView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        # Fetch all tasks for the authenticated user
-        tasks = Task.objects.filter(assigned_to=request.user).order_by('id')
-        
-        # Aggregate task summary
-        task_summary = {
-            'not_started': tasks.filter(status='Not Started').count(),
-            'in_progress': tasks.filter(status='In Progress').count(),
-            'completed': tasks.filter(status='Completed').count(),
-            'awaiting_feedback': tasks.filter(status='Awaiting Feedback').count(),
-        }
+        # One page of the user's tasks; the summary comes from the counters
+        tasks = optimize_queryset(Task.objects.filter(assigned_to=request.user), TaskSerializer)
+        paginator = ListPagination(ordering=('id',))
+        page_obj = paginator.paginate_queryset(tasks, request)
 
-        # Prepare task data
         task_data = {
-            'taskData': TaskSerializer(tasks, many=True).data,
-            'taskSummary': task_summary,
+            'taskData': page_obj,
+            'taskSummary': get_task_summary(request.user.id),
         }
 
         serializer = TaskDataSerializer(task_data)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response({**serializer.data, **paginator.get_meta()}, status=status.HTTP_200_OK)
 
 class DashboardAttendanceView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        # Aggregate attendance data by month for the authenticated user
-        today = timezone.now()
-        attendance_data = Attendance.objects.filter(user=request.user, date__year=today.year).values('date').annotate(
-            month=ExtractMonth('date')
-        ).values(
-            'month'
-        ).annotate(
-            present=Count('id', filter=Q(total_hours__gt=0)),  # Present if hours worked
-            absent=Count('id', filter=Q(total_hours=0))  # Absent if no hours
-        ).order_by('month')
-
-        # Map month numbers to names and format data
-        month_names = {
-            1: 'Jan', 2: 'Feb', 3: 'Mar', 4: 'Apr', 5: 'May', 6: 'Jun',
-            7: 'Jul', 8: 'Aug', 9: 'Sep', 10: 'Oct', 11: 'Nov', 12: 'Dec'
-        }
-        date_data = [
-            {
-                'month': month_names.get(row['month'], 'Unknown'),
-                'present': row['present'],
-                'absent': row['absent']
-            } for row in attendance_data
-        ]
-
-        # Fill in missing months with 0s
-        for month in range(1, 13):
-            month_name = month_names[month]
-            if not any(d['month'] == month_name for d in date_data):
-                date_data.append({'month': month_name, 'present': 0, 'absent': 0})
-
-        date_data.sort(key=lambda x: list(month_names.values()).index(x['month']))
+        # Monthly totals for the authenticated user, from the rollup table
+        year = timezone.now().year
+        date_data = monthly_summary(AttendanceMonthly.objects.filter(user=request.user, year=year))
 
         serializer = DashboardAttendanceSerializer({'dateData': date_data})
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class DepartmentAttendanceView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        # Department-wide monthly totals; super admins may pick any
+        # department, or leave it out for the whole organisation.
+        try:
+            year = int(request.query_params.get('year', timezone.now().year))
+        except ValueError:
+            return Response({'error': 'Invalid year'}, status=status.HTTP_400_BAD_REQUEST)
+
+        rollups = AttendanceMonthly.objects.filter(year=year)
+        department_id = request.query_params.get('department')
+        if not request.user.is_superuser:
+            profile = getattr(request.user, 'profile', None)
+            if profile is None or profile.department_id is None:
+                return Response({'error': 'No department assigned'}, status=status.HTTP_403_FORBIDDEN)
+            department_id = profile.department_id
+        if department_id:
+            rollups = rollups.filter(user__profile__department_id=department_id)
+
+        serializer = DashboardAttendanceSerializer({'dateData': monthly_summary(rollups)})
+        return Response({'year': year, 'department': department_id, **serializer.data}, status=status.HTTP_200_OK)
     
 # views.py
 # views.py
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from django.core.paginator import Paginator
+from .pagination import ListPagination
 from django.db.models import Count
 from .models import Customer, Candidate
 from .serializers import CustomerSerializer
+from .customer_dedup import DUPLICATES_LIST_LIMIT, get_duplicates
+from .customer_merge import merge_customers
+from django.core.paginator import Paginator
+import datetime
+from .export import export_response
 
 class CustomerListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        page = int(request.query_params.get('page', 1))
-        per_page = int(request.query_params.get('per_page', 10))
-        customers = Customer.objects.all().order_by('last_edit_date')
-        paginator = Paginator(customers, per_page)
-        page_obj = paginator.get_page(page)
-        serializer = CustomerSerializer(page_obj, many=True)
+        projection = projection_for(CustomerSerializer)
+        paginator = ListPagination(ordering=('last_edit_date', 'id'))
+        page_obj = paginator.paginate_queryset(projection.values(Customer.objects.all()), request)
         return Response({
-            'customers': serializer.data,
-            'total_pages': paginator.num_pages,
-            'current_page': page,
-            'total_entries': customers.count(),
+            'customers': projection.render(page_obj),
+            **paginator.get_meta(),
         }, status=status.HTTP_200_OK)
 
     def post(self, request):
@@ -1465,6 +1452,22 @@ class CustomerListView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class CustomerExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    export_columns = [
+        ('Customer ID', 'customer_id'), ('First Name', 'first_name'), ('Last Name', 'last_name'),
+        ('Customer Type', 'customer_type'), ('Status', 'status'), ('Email', 'email'),
+        ('Phone Number', 'phone_number'), ('Company Name', 'company_name'), ('Industry', 'industry'),
+        ('Street', 'street'), ('City', 'city'), ('State', 'state'), ('Zip Code', 'zip_code'),
+        ('Country', 'country'), ('GST Tax ID', 'gst_tax_id'), ('Credit Limit', 'credit_limit'),
+        ('Available Limit', 'available_limit'), ('Payment Terms', 'payment_terms'),
+        ('Last Edited', 'last_edit_date'),
+    ]
+
+    def get(self, request):
+        return export_response(request, Customer.objects.all(), self.export_columns, 'customers')
+
 class CustomerDetailView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -1514,70 +1517,123 @@ class CustomerDuplicatesView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        # Identify duplicates based on first_name and last_name
-        duplicates = (
-            Customer.objects.values('first_name', 'last_name')
-            .annotate(count=Count('id'))
-            .filter(count__gt=1)
-        )
+        # Groups come from the cached dedup result; the customers shown are
+        # loaded in one query. Without page/per_page the response is the
+        # plain list of the first DUPLICATES_LIST_LIMIT groups, as before.
+        result = get_duplicates()
+        paginated = ListPagination.is_requested(request)
+        if result is None:
+            # First run: the result set is being built in the background
+            response = Response({'groups': [], 'building': True} if paginated else [], status=status.HTTP_202_ACCEPTED)
+            response['Retry-After'] = '30'
+            return response
+        groups = result['groups']
+        if paginated:
+            paginator = Paginator(groups, ListPagination().get_per_page(request))
+            try:
+                page = int(request.query_params.get('page', 1))
+            except (TypeError, ValueError):
+                page = 1
+            groups = list(paginator.get_page(page))
+        else:
+            groups = groups[:DUPLICATES_LIST_LIMIT]
 
+        ids = [pk for group in groups for pk in group['ids']]
+        customers = {customer.id: customer for customer in Customer.objects.filter(id__in=ids)}
         duplicate_groups = []
-        for item in duplicates:
-            first_name = item['first_name']
-            last_name = item['last_name']
-            matching_customers = Customer.objects.filter(first_name=first_name, last_name=last_name)
-            if matching_customers.count() > 1:
-                primary = matching_customers.order_by('last_edit_date').first()  # Use earliest last_edit_date as primary
-                duplicates = matching_customers.exclude(id=primary.id)
-                serializer = CustomerSerializer(primary)
-                duplicates_serializer = CustomerSerializer(duplicates, many=True)
-                group = {
-                    'primary': serializer.data,
-                    'duplicates': duplicates_serializer.data
-                }
-                duplicate_groups.append(group)
-
-        return Response(duplicate_groups, status=status.HTTP_200_OK)
+        for group in groups:
+            members = [customers[pk] for pk in group['ids'] if pk in customers]
+            if len(members) < 2:
+                continue  # merged or deleted since the last refresh
+            data = CustomerSerializer(members, many=True).data
+            duplicate_groups.append({
+                'primary': data[0],
+                'duplicates': data[1:],
+                'score': group['score'],
+            })
+
+        if not paginated:
+            return Response(duplicate_groups, status=status.HTTP_200_OK)
+        return Response({
+            'groups': duplicate_groups,
+            'total_pages': paginator.num_pages,
+            'current_page': page,
+            'total_entries': paginator.count,
+            'refreshed_at': datetime.datetime.fromtimestamp(result['built_at'], tz=datetime.timezone.utc),
+        }, status=status.HTTP_200_OK)
 
 class CustomerMergeView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        primary_id = request.data.get('primary_id')
-        duplicate_ids = request.data.get('duplicate_ids', [])
+        # Either one group ({primary_id, duplicate_ids}) or many
+        # ({groups: [{primary_id, duplicate_ids}, ...]}) in one call
+        single = 'groups' not in request.data
+        raw_groups = [request.data] if single else request.data.get('groups') or []
+
+        groups = []
+        for group in raw_groups:
+            primary_id = group.get('primary_id')
+            duplicate_ids = group.get('duplicate_ids', [])
+            if not primary_id or not duplicate_ids:
+                return Response(
+                    {'error': 'Primary ID and duplicate IDs are required'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                groups.append((int(primary_id), [int(pk) for pk in duplicate_ids]))
+            except (TypeError, ValueError):
+                return Response({'error': 'Customer IDs must be integers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not groups:
+            return Response({'error': 'No groups provided'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if not primary_id or not duplicate_ids:
-            return Response(
-                {'error': 'Primary ID and duplicate IDs are required'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        try:
+            result = merge_customers(groups)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Customer.DoesNotExist as e:
+            return Response({'error': str(e)}, status=status.HTTP_404_NOT_FOUND)
+
+        response = {
+            'merged_groups': len(groups),
+            'merged_customers': result['merged'],
+            'updated_documents': result['updated'],
+        }
+        if single:
+            response['merged_record'] = CustomerSerializer(Customer.objects.get(id=groups[0][0])).data
+        return Response(response, status=status.HTTP_200_OK)
+
+
+from .search import DEFAULT_LIMIT, MAX_LIMIT, SEARCH_SOURCES, search
 
+class SearchView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        # ?q= matches the last word as a prefix (autocomplete), the others as
+        # whole words; ?types=customer,invoice narrows it. Enquiries,
+        # quotations and sales orders are limited to the user's own, as in
+        # their list endpoints.
+        query = request.query_params.get('q', '').strip()
+        types = [kind for kind in request.query_params.get('types', '').split(',') if kind]
+        unknown = [kind for kind in types if kind not in SEARCH_SOURCES]
+        if unknown:
+            return Response({'error': f'Unknown types: {unknown}'}, status=status.HTTP_400_BAD_REQUEST)
         try:
-            primary = Customer.objects.get(id=primary_id)
-            duplicates = Customer.objects.filter(id__in=duplicate_ids)
+            limit = max(1, min(int(request.query_params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT))
+        except ValueError:
+            limit = DEFAULT_LIMIT
 
-            if not duplicates.exists():
-                return Response(
-                    {'error': 'No valid duplicates provided'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        return Response({'query': query, 'results': search(query, types or None, limit, request.user)}, status=status.HTTP_200_OK)
 
-            # Merge logic: Keep primary record, delete duplicates
-            serializer = CustomerSerializer(primary)
-            duplicates.delete()
 
-            return Response(
-                {'merged_record': serializer.data},
-                status=status.HTTP_200_OK
-            )
-        except Customer.DoesNotExist:
-            return Response(
-                {'error': 'Primary record or duplicates not found'},
-                status=status.HTTP_404_NOT_FOUND
-            )
-        except Exception as e:
-            return Response(
-                {'error': str(e)},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
-    
+from django.http import HttpResponse
+from .metrics import render_prometheus
+from .permissions import MetricsPermission
+
+class MetricsView(APIView):
+    permission_classes = [MetricsPermission]
+
+    def get(self, request):
+        # Prometheus text format, summed over every worker process
+        return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
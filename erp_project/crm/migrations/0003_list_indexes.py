@@ -0,0 +1,54 @@
+# Generated by Django 4.2.23 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+# InvoiceReturn and DeliveryNoteReturn are missing from this app's
+# migration state, so AddIndex cannot be used for them; their indexes are
+# created directly on the tables. Fields are column names.
+RETURN_INDEXES = {
+    'crm_invoicereturn': [
+        models.Index(fields=['invoice_return_date', 'id'], name='crm_invoice_invoice_c42bb7_idx'),
+        models.Index(fields=['status', 'invoice_return_date', 'id'], name='crm_invoice_status_d9e620_idx'),
+        models.Index(fields=['customer_id', 'invoice_return_date', 'id'], name='crm_invoice_custome_b91f6b_idx'),
+    ],
+    'crm_deliverynotereturn': [
+        models.Index(fields=['dnr_date', 'id'], name='crm_deliver_dnr_dat_ad6fe4_idx'),
+        models.Index(fields=['status', 'dnr_date', 'id'], name='crm_deliver_status_f13fe0_idx'),
+        models.Index(fields=['customer_id', 'dnr_date', 'id'], name='crm_deliver_custome_37817e_idx'),
+    ],
+}
+
+
+def add_return_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for table, indexes in RETURN_INDEXES.items():
+        for index in indexes:
+            schema_editor.execute('CREATE INDEX %s ON %s (%s)' % (
+                quote(index.name), quote(table), ', '.join(quote(column) for column in index.fields),
+            ))
+
+
+def remove_return_indexes(apps, schema_editor):
+    quote = schema_editor.quote_name
+    for table, indexes in RETURN_INDEXES.items():
+        for index in indexes:
+            schema_editor.execute(schema_editor.sql_delete_index % {'name': quote(index.name), 'table': quote(table)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0002_deliverynote_invoice_remove_salesorderitem_tax_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quotation',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='crm_quotati_user_id_b6d6ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesorder',
+            index=models.Index(fields=['sales_rep', 'created_at', 'id'], name='crm_salesor_sales_r_6733cc_idx'),
+        ),
+        migrations.RunPython(add_return_indexes, remove_return_indexes),
+    ]
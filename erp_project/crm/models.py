@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import User
+from core.document_totals import PERCENT, sum_lines
+from core.sequences import next_document_number
 
 class Enquiry(models.Model):
     enquiry_id = models.CharField(max_length=10, unique=True)  # e.g., ENQ001
@@ -83,6 +86,9 @@ class Quotation(models.Model):
     shippingCharges = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['user', 'created_at', 'id'])]
+
     def __str__(self):
         return f"{self.quotation_id} - {self.customer_name}"
 
@@ -177,11 +183,12 @@ class SalesOrder(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['sales_rep', 'created_at', 'id'])]
+
     def save(self, *args, **kwargs):
         if not self.sales_order_id:
-            last_order = SalesOrder.objects.order_by('id').last()
-            new_num = last_order.id + 1 if last_order else 1
-            self.sales_order_id = f'SO{new_num:04d}'
+            self.sales_order_id = next_document_number('sales_order')
         super().save(*args, **kwargs)
 
 class SalesOrderItem(models.Model):
@@ -212,9 +219,7 @@ class SalesOrderHistory(models.Model):
     timestamp = models.DateTimeField(default=timezone.now)
 
 def generate_dn_id():
-    last_dn = DeliveryNote.objects.order_by('-id').first()
-    new_id = f'DN-{str(last_dn.id + 1).zfill(4) if last_dn else "0001"}' if last_dn else "DN-0001"
-    return new_id
+    return next_document_number('delivery_note')
 
 class DeliveryNoteAttachment(models.Model):
     delivery_note = models.ForeignKey('DeliveryNote', on_delete=models.CASCADE, related_name='attachments')
@@ -258,9 +263,7 @@ class DeliveryNoteCustomerAcknowledgement(models.Model):
 
 # New Invoice models
 def generate_invoice_id():
-    last_invoice = Invoice.objects.order_by('-id').first()
-    new_id = f'INV-{str(last_invoice.id + 1).zfill(4) if last_invoice else "0001"}' if last_invoice else "INV-0001"
-    return new_id
+    return next_document_number('invoice')
 
 class InvoiceAttachment(models.Model):
     invoice = models.ForeignKey('Invoice', on_delete=models.CASCADE, related_name='attachments')
@@ -296,8 +299,10 @@ class Invoice(models.Model):
     invoice_total = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
     def save(self, *args, **kwargs):
-        if not self.invoice_total:
-            self.invoice_total = sum(item.total for item in self.items.all()) or 0
+        if self.pk:
+            # Line changes move the stored total in the database; re-read it
+            # so a stale instance doesn't write an old value back.
+            self.invoice_total = sum_lines(self.items.all(), total='total')['total']
         super().save(*args, **kwargs)
 
 class InvoiceItem(models.Model):
@@ -335,9 +340,9 @@ class OrderSummary(models.Model):
     balance_due = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
 
     def save(self, *args, **kwargs):
-        invoice = self.invoice
-        self.subtotal = sum(item.total for item in invoice.items.all())
-        self.tax_summary = sum(item.tax * item.total / 100 for item in invoice.items.all())
+        totals = sum_lines(self.invoice.items.all(), subtotal='total', tax_summary=F('tax') * F('total') * PERCENT)
+        self.subtotal = totals['subtotal']
+        self.tax_summary = totals['tax_summary']
         self.grand_total = self.subtotal - (self.subtotal * self.global_discount / 100) + self.tax_summary + self.shipping_charges + self.rounding_adjustment - self.credit_note_applied
         self.balance_due = self.grand_total - self.amount_paid
         super().save(*args, **kwargs)
@@ -354,8 +359,7 @@ from .models import Invoice, SalesOrder
 User = get_user_model()
 
 def generate_invoice_return_id():
-    last_return = InvoiceReturn.objects.order_by('-id').first()
-    return f'INVR-{str(last_return.id + 1).zfill(4) if last_return else "0001"}' if last_return else "INVR-0001"
+    return next_document_number('invoice_return')
 
 class InvoiceReturnAttachment(models.Model):
     invoice_return = models.ForeignKey('InvoiceReturn', on_delete=models.CASCADE, related_name='attachments')
@@ -399,8 +403,7 @@ class InvoiceReturnSummary(models.Model):
     amount_to_refund = models.DecimalField(max_digits=10, decimal_places=2, default=0.00, editable=False)
 
     def save(self, *args, **kwargs):
-        invoice_return = self.invoice_return
-        self.return_subtotal = sum(item.total for item in invoice_return.items.all())
+        self.return_subtotal = sum_lines(self.invoice_return.items.all(), total='total')['total']
         self.global_discount_amount = self.return_subtotal * (self.global_discount / 100)
         self.amount_to_refund = self.return_subtotal - self.global_discount_amount + self.rounding_adjustment
         super().save(*args, **kwargs)
@@ -430,6 +433,13 @@ class InvoiceReturn(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['invoice_return_date', 'id']),
+            models.Index(fields=['status', 'invoice_return_date', 'id']),
+            models.Index(fields=['customer', 'invoice_return_date', 'id']),
+        ]
+
 
 
 from django.db import models
@@ -442,8 +452,7 @@ from .models import InvoiceReturn, SalesOrder
 User = get_user_model()
 
 def generate_delivery_note_return_id():
-    last_return = DeliveryNoteReturn.objects.order_by('-id').first()
-    return f'DNR-{str(last_return.id + 1).zfill(4) if last_return else "0001"}' if last_return else "DNR-0001"
+    return next_document_number('delivery_note_return')
 
 class DeliveryNoteReturnAttachment(models.Model):
     delivery_note_return = models.ForeignKey('DeliveryNoteReturn', on_delete=models.CASCADE, related_name='attachments')
@@ -492,4 +501,11 @@ class DeliveryNoteReturn(models.Model):
     contact_person = models.CharField(max_length=100, blank=True)
     status = models.CharField(max_length=20, choices=[('Draft', 'Draft'), ('Submitted', 'Submitted'), ('Cancelled', 'Cancelled')], default='Draft')
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
\ No newline at end of file
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['dnr_date', 'id']),
+            models.Index(fields=['status', 'dnr_date', 'id']),
+            models.Index(fields=['customer', 'dnr_date', 'id']),
+        ]
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 from .models import Enquiry, EnquiryItem
 from core.models import Candidate
+from core.document_totals import sum_lines
+from core.sequences import next_document_number
 
 class EnquiryItemSerializer(serializers.ModelSerializer):
     class Meta:
@@ -22,7 +24,9 @@ class EnquirySerializer(serializers.ModelSerializer):
         ]
 
     def get_grand_total(self, obj):
-        return sum(item.total_amount for item in obj.items.all()) if obj.items.exists() else 0
+        if hasattr(obj, 'grand_total'):  # annotated by with_enquiry_totals()
+            return obj.grand_total
+        return sum_lines(obj.items.all(), total='total_amount')['total']
 
 class EnquiryCreateSerializer(serializers.ModelSerializer):
     items = EnquiryItemSerializer(many=True, required=False)
@@ -44,25 +48,21 @@ class EnquiryCreateSerializer(serializers.ModelSerializer):
         return enquiry
 
     def _generate_enquiry_id(self):
-        last_enquiry = Enquiry.objects.order_by('-id').first()
-        if last_enquiry:
-            last_id = int(last_enquiry.enquiry_id.replace('ENQ', '')) + 1
-        else:
-            last_id = 1
-        return f'ENQ{last_id:03d}'  # e.g., ENQ001, ENQ002
+        return next_document_number('enquiry')  # e.g., ENQ001, ENQ002
     
 
 from rest_framework import serializers
 from .models import Quotation, QuotationItem, QuotationAttachment, QuotationComment, QuotationHistory, QuotationRevision
 from core.models import Customer, Role
 from core.models import Product, UOM
+from core.master_cache import MasterPrimaryKeyRelatedField
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 class QuotationItemSerializer(serializers.ModelSerializer):
     product_id = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
-    uom = serializers.PrimaryKeyRelatedField(queryset=UOM.objects.all())
+    uom = MasterPrimaryKeyRelatedField(queryset=UOM.objects.all())
     product_name = serializers.CharField(source='product_id.name', read_only=True)
 
     class Meta:
@@ -116,9 +116,13 @@ class QuotationSerializer(serializers.ModelSerializer):
             'status', 'revise_count', 'globalDiscount', 'shippingCharges', 'created_at', 'items',
             'attachments', 'comments', 'history', 'revisions', 'grand_total'
         ]
+        # Columns read by method fields, for ?fields= lists (core.sparse_fields)
+        method_field_sources = {'grand_total': ['globalDiscount', 'shippingCharges']}
 
     def get_grand_total(self, obj):
-        subtotal = sum(item.total for item in obj.items.all())
+        if hasattr(obj, 'grand_total'):  # annotated by with_quotation_totals()
+            return round(obj.grand_total, 2)
+        subtotal = sum_lines(obj.items.all(), total='total')['total']
         discount_amount = subtotal * (obj.globalDiscount / 100)
         return round(subtotal - discount_amount + obj.shippingCharges, 2)
 
@@ -159,12 +163,7 @@ class QuotationCreateSerializer(serializers.ModelSerializer):
         return quotation
 
     def _generate_quotation_id(self):
-        last_quotation = Quotation.objects.order_by('-id').first()
-        if last_quotation:
-            last_id = int(last_quotation.quotation_id.replace('QUO', '')) + 1
-        else:
-            last_id = 1
-        return f'QUO{last_id:03d}'
+        return next_document_number('quotation')
     
 
 from rest_framework import serializers
@@ -199,6 +198,7 @@ class SalesOrderSerializer(serializers.ModelSerializer):
     class Meta:
         model = SalesOrder
         fields = ['id', 'sales_order_id', 'order_date', 'sales_rep', 'order_type', 'customer', 'payment_method', 'currency', 'due_date', 'terms_conditions', 'shipping_method', 'expected_delivery', 'tracking_number', 'internal_notes', 'customer_notes', 'global_discount', 'shipping_charges', 'status', 'items', 'comments', 'history']
+        prefetch_related_fields = ['comments__user', 'history__user']
 
     def get_comments(self, obj):
         return [{'id': c.id, 'user': c.user.username, 'comment': c.comment, 'timestamp': c.timestamp} for c in obj.comments.all()]
@@ -318,6 +318,8 @@ class InvoiceSerializer(serializers.ModelSerializer):
     class Meta:
         model = Invoice
         fields = ['id', 'INVOICE_ID', 'invoice_date', 'due_date', 'sales_order_reference', 'customer', 'customer_ref_no', 'invoice_tags', 'terms_conditions', 'invoice_status', 'payment_terms', 'billing_address', 'shipping_address', 'email_id', 'phone_number', 'contact_person', 'payment_method', 'currency', 'payment_ref_number', 'transaction_date', 'payment_status', 'invoice_total', 'items', 'attachments', 'remarks', 'summary']
+        # Kept in step with the items by the model; a client value would be dropped
+        read_only_fields = ['invoice_total']
 
     def create(self, validated_data):
         items_data = validated_data.pop('items', [])
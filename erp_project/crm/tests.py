@@ -1,3 +1,174 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection, models
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.models import Customer, Product, UOM
+from core.document_totals import sum_lines
+from core.tests import ROWS, QueryBudgetTestCase
+
+from .models import (
+    Enquiry, EnquiryItem, Invoice, InvoiceItem, InvoiceReturn, InvoiceReturnItem, InvoiceReturnSummary, OrderSummary,
+    Quotation, QuotationComment, QuotationHistory, QuotationItem, SalesOrder, SalesOrderComment, SalesOrderHistory,
+    SalesOrderItem,
+)
+
+
+def _zero_amounts(model):
+    # Summary defaults are floats, which their save() can't mix with Decimals
+    return {field.name: Decimal('0') for field in model._meta.fields if isinstance(field, models.DecimalField)}
+
+
+class CrmQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        today = datetime.date.today()
+        uom = UOM.objects.create(name='Nos', items=1)
+        customer = Customer.objects.create(customer_id='C1', first_name='Customer', email='customer@example.com')
+        product = Product.objects.create(name='Product', unit_price=Decimal('10.00'), status='Active')
+        for i in range(ROWS):
+            enquiry = Enquiry.objects.create(enquiry_id=f'ENQ{i}', user=self.user, first_name='Enquirer', phone_number=0)
+            quotation = Quotation.objects.create(
+                quotation_id=f'QUO{i}', user=self.user, customer_name=customer, quotation_date=today, expiry_date=today,
+                expected_delivery=today, status='Draft',
+            )
+            sales_order = SalesOrder.objects.create(sales_rep=self.user, customer=customer)
+            invoice = Invoice.objects.create(customer=customer, sales_order_reference=sales_order)
+            OrderSummary.objects.create(invoice=invoice, **_zero_amounts(OrderSummary))
+            invoice_return = InvoiceReturn.objects.create(customer=customer, sales_order_reference=sales_order)
+            InvoiceReturnSummary.objects.create(invoice_return=invoice_return, **_zero_amounts(InvoiceReturnSummary))
+            for j in range(2):
+                EnquiryItem.objects.create(
+                    enquiry=enquiry, item_code=f'I{j}', cost_price=Decimal('5.00'), selling_price=Decimal('10.00'),
+                    quantity=1, total_amount=Decimal('10.00'),
+                )
+                QuotationItem.objects.create(
+                    quotation=quotation, product_id=product, uom=uom, unit_price=Decimal('10.00'), discount=Decimal('0'),
+                    tax=Decimal('18.00'), quantity=1,
+                )
+                QuotationComment.objects.create(quotation=quotation, person_name=self.user, comment='Comment')
+                QuotationHistory.objects.create(quotation=quotation, status='Draft', action_by=self.user)
+                SalesOrderItem.objects.create(sales_order=sales_order, product=product, quantity=1, unit_price=Decimal('10.00'), discount=Decimal('0'))
+                SalesOrderComment.objects.create(sales_order=sales_order, user=self.user, comment='Comment')
+                SalesOrderHistory.objects.create(sales_order=sales_order, user=self.user, action='Created')
+                InvoiceItem.objects.create(invoice=invoice, quantity=1, unit_price=Decimal('10.00'), tax=Decimal('18.00'), discount=Decimal('0'))
+                InvoiceReturnItem.objects.create(
+                    invoice_return=invoice_return, returned_qty=1, unit_price=Decimal('10.00'), tax=Decimal('18.00'), discount=Decimal('0'),
+                )
+        self.quotation, self.sales_order, self.invoice, self.invoice_return = quotation, sales_order, invoice, invoice_return
+
+    def test_enquiry_list(self):
+        self.assertQueryBudget(2, '/api/crm/enquiries/')
+
+    def test_quotation_list(self):
+        self.assertQueryBudget(6, '/api/crm/quotations/')
+
+    def test_quotation_list_sparse(self):
+        self.assertQueryBudget(1, '/api/crm/quotations/?fields=id,quotation_id,status,grand_total')
+
+    def test_quotation_detail(self):
+        self.assertQueryBudget(6, f'/api/crm/quotations/{self.quotation.pk}/')
+
+    def test_sales_order_list(self):
+        self.assertQueryBudget(6, '/api/crm/sales-orders/')
+
+    def test_sales_order_detail(self):
+        self.assertQueryBudget(6, f'/api/crm/sales-orders/{self.sales_order.pk}/')
+
+    def test_invoice_list(self):
+        self.assertQueryBudget(5, '/api/crm/invoices/')
+
+    def test_invoice_list_sparse_cursor(self):
+        seen = []
+        url = '/api/crm/invoices/?fields=INVOICE_ID&per_page=2&cursor='
+        while url:
+            response = self.assertQueryBudget(2, url)
+            self.assertTrue(all(list(invoice) == ['INVOICE_ID'] for invoice in response.data['invoices']))
+            seen += [invoice['INVOICE_ID'] for invoice in response.data['invoices']]
+            cursor = response.data['next_cursor']
+            url = cursor and f'/api/crm/invoices/?fields=INVOICE_ID&per_page=2&cursor={cursor}'
+        self.assertEqual(sorted(seen), sorted(Invoice.objects.values_list('INVOICE_ID', flat=True)))
+
+    def test_invoice_detail(self):
+        self.assertQueryBudget(4, f'/api/crm/invoices/{self.invoice.pk}/')
+
+    def test_invoice_return_list(self):
+        self.assertQueryBudget(12, '/api/crm/invoice-returns/')
+
+    def test_invoice_return_detail(self):
+        self.assertQueryBudget(12, f'/api/crm/invoice-returns/{self.invoice_return.pk}/')
+
+
+@override_settings(DOCUMENT_SEQUENCE_DATABASE=None)
+class InvoiceTotalsTests(TestCase):
+    """Line saves and deletes move the stored totals by F() deltas."""
+
+    def setUp(self):
+        customer = Customer.objects.create(customer_id='C1', first_name='Customer', email='customer@example.com')
+        self.invoice = Invoice.objects.create(customer=customer)
+        summary = _zero_amounts(OrderSummary)
+        summary['global_discount'] = Decimal('10.00')
+        OrderSummary.objects.create(invoice=self.invoice, **summary)
+
+    def add_item(self, quantity, unit_price, tax='18.00', discount='0'):
+        return InvoiceItem.objects.create(
+            invoice=self.invoice, quantity=quantity, unit_price=Decimal(unit_price), tax=Decimal(tax), discount=Decimal(discount),
+        )
+
+    def stored(self):
+        invoice = Invoice.objects.get(pk=self.invoice.pk)
+        return invoice, OrderSummary.objects.get(invoice=invoice)
+
+    def assertMatchesRecompute(self):
+        invoice, summary = self.stored()
+        self.assertEqual(invoice.invoice_total, sum_lines(invoice.items.all(), total='total')['total'])
+        incremental = {field: getattr(summary, field) for field in ['subtotal', 'tax_summary', 'grand_total', 'balance_due']}
+        summary.save()  # recomputes every total from the lines
+        summary.refresh_from_db()
+        self.assertEqual(incremental, {field: getattr(summary, field) for field in incremental})
+
+    def test_line_changes_update_totals(self):
+        first = self.add_item(2, '50.00')
+        second = self.add_item(1, '20.00', tax='5.00', discount='10.00')
+        invoice, summary = self.stored()
+        self.assertEqual(invoice.invoice_total, Decimal('136.90'))
+        self.assertEqual(summary.subtotal, Decimal('136.90'))
+        self.assertMatchesRecompute()
+
+        first.quantity = 3
+        first.save()
+        second.delete()
+        invoice, summary = self.stored()
+        self.assertEqual(invoice.invoice_total, Decimal('177.00'))
+        self.assertEqual(summary.tax_summary, Decimal('31.86'))
+        self.assertMatchesRecompute()
+
+        InvoiceItem.objects.filter(pk=first.pk).delete()
+        invoice, summary = self.stored()
+        self.assertEqual((invoice.invoice_total, summary.grand_total), (Decimal('0'), Decimal('0')))
+
+    def test_line_moved_between_invoices(self):
+        item = self.add_item(1, '100.00', tax='0')
+        other = Invoice.objects.create(customer=self.invoice.customer)
+        item.invoice = other
+        item.save()
+        self.assertEqual(Invoice.objects.get(pk=self.invoice.pk).invoice_total, Decimal('0'))
+        self.assertEqual(Invoice.objects.get(pk=other.pk).invoice_total, Decimal('100.00'))
+
+    def test_deleting_invoice_skips_line_updates(self):
+        self.add_item(1, '10.00')
+        self.add_item(2, '10.00')
+        with CaptureQueriesContext(connection) as queries:
+            self.invoice.delete()
+        totals_updates = [query for query in queries if query['sql'].startswith(('UPDATE "crm_invoice"', 'UPDATE "crm_ordersummary"'))]
+        self.assertEqual(totals_updates, [])
+        self.assertFalse(InvoiceItem.objects.exists())
+
+    def test_stale_instance_keeps_line_total(self):
+        stale = Invoice.objects.get(pk=self.invoice.pk)
+        self.add_item(1, '100.00', tax='0')
+        stale.payment_status = 'Paid'
+        stale.save()
+        self.assertEqual(Invoice.objects.get(pk=self.invoice.pk).invoice_total, Decimal('100.00'))
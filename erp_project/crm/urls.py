@@ -17,6 +17,7 @@ urlpatterns = [
 
 # SalesOrder URLs
     path('sales-orders/', views.SalesOrderListView.as_view(), name='sales-order-list'),
+    path('sales-orders/export/', views.SalesOrderExportView.as_view(), name='sales-order-export'),
     path('sales-orders/<int:pk>/', views.SalesOrderDetailView.as_view(), name='sales-order-detail'),
     path('sales-orders/<int:pk>/comments/', views.SalesOrderCommentView.as_view(), name='sales-order-comments'),
     path('sales-orders/<int:pk>/history/', views.SalesOrderHistoryView.as_view(), name='sales-order-history'),
@@ -31,6 +32,7 @@ urlpatterns = [
     path('delivery-notes/<int:pk>/email/', views.DeliveryNoteEmailView.as_view(), name='delivery-note-email'),
     # Invoice URLs
     path('invoices/', views.InvoiceListView.as_view(), name='invoice-list'),
+    path('invoices/export/', views.InvoiceExportView.as_view(), name='invoice-export'),
     path('invoices/<int:pk>/', views.InvoiceDetailView.as_view(), name='invoice-detail'),
     path('invoices/<int:pk>/items/', views.InvoiceItemView.as_view(), name='invoice-items'),
     path('invoices/<int:pk>/pdf/', views.InvoicePDFView.as_view(), name='invoice-pdf'),
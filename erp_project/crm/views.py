@@ -4,12 +4,22 @@ from rest_framework import status, permissions
 from .models import Enquiry, EnquiryItem
 from .serializers import EnquirySerializer, EnquiryCreateSerializer
 from django.core.exceptions import ObjectDoesNotExist
+from core.pagination import ListPagination
+from core.query_planner import optimize_queryset
+from core.list_filters import IndexedFilter, date_param
+from core.document_totals import with_enquiry_totals, with_quotation_totals
+from core.sparse_fields import SparseFieldset
 
 class EnquiryListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        enquiries = Enquiry.objects.filter(user=request.user).order_by('-created_at')
+        enquiries = optimize_queryset(with_enquiry_totals(Enquiry.objects.filter(user=request.user).order_by('-created_at')), EnquirySerializer)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=('-created_at', '-id'))
+            page_obj = paginator.paginate_queryset(enquiries, request)
+            serializer = EnquirySerializer(page_obj, many=True)
+            return Response({'enquiries': serializer.data, **paginator.get_meta()})
         serializer = EnquirySerializer(enquiries, many=True)
         return Response(serializer.data)
 
@@ -27,7 +37,7 @@ class NewEnquiryView(APIView):
     def get(self, request, pk=None):
         if pk:
             try:
-                enquiry = Enquiry.objects.get(id=pk, user=request.user)
+                enquiry = optimize_queryset(with_enquiry_totals(Enquiry.objects.all()), EnquirySerializer).get(id=pk, user=request.user)
                 serializer = EnquirySerializer(enquiry)
                 return Response(serializer.data)
             except ObjectDoesNotExist:
@@ -60,20 +70,27 @@ from rest_framework import status, permissions
 from .models import Quotation, QuotationItem, QuotationAttachment, QuotationComment, QuotationHistory, QuotationRevision
 from .serializers import QuotationSerializer, QuotationCreateSerializer, QuotationAttachmentSerializer, QuotationCommentSerializer, QuotationHistorySerializer, QuotationItemSerializer, QuotationRevisionSerializer
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from django.core.mail import EmailMessage
+from core.outbox import queue_email
+from core.search import matching_ids
+from core.pdf import paragraph, pdf_response
+from core.export import export_response
 from django.template.loader import render_to_string
-import io
 
 class QuotationListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    list_filter = IndexedFilter(Quotation, {}, orderings=('-created_at', 'created_at'), fixed=('user',))
+
     def get(self, request):
-        quotations = Quotation.objects.filter(user=request.user).order_by('-created_at')
-        serializer = QuotationSerializer(quotations, many=True)
+        quotations, ordering = self.list_filter.apply(Quotation.objects.all(), request, user=request.user)
+        fieldset = SparseFieldset(request, QuotationSerializer)
+        quotations = fieldset.optimize(with_quotation_totals(quotations), ordering)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=ordering)
+            page_obj = paginator.paginate_queryset(quotations, request)
+            serializer = fieldset.serializer(page_obj, many=True)
+            return Response({'quotations': serializer.data, **paginator.get_meta()})
+        serializer = fieldset.serializer(quotations, many=True)
         return Response(serializer.data)
 
     def post(self, request):
@@ -96,7 +113,7 @@ class QuotationDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            quotation = Quotation.objects.get(id=pk, user=request.user)
+            quotation = optimize_queryset(with_quotation_totals(Quotation.objects.all()), QuotationSerializer).get(id=pk, user=request.user)
             serializer = QuotationSerializer(quotation)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -258,7 +275,7 @@ class QuotationPDFView(APIView):
 
     def get(self, request, pk):
         try:
-            quotation = Quotation.objects.get(id=pk, user=request.user)
+            quotation = optimize_queryset(with_quotation_totals(Quotation.objects.all()), QuotationSerializer).get(id=pk, user=request.user)
             serializer = QuotationSerializer(quotation)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
@@ -271,7 +288,7 @@ class QuotationEmailView(APIView):
 
       def post(self, request, pk):
           try:
-              quotation = Quotation.objects.get(id=pk, user=request.user)
+              quotation = with_quotation_totals(Quotation.objects.select_related('customer_name')).get(id=pk, user=request.user)
               email = request.data.get('email')
               html_content = request.data.get('html_content', """
                   <html>
@@ -284,15 +301,13 @@ class QuotationEmailView(APIView):
                           <p>Thank you for your business!</p>
                       </body>
                   </html>
-                  """.format(quotation=quotation, grand_total=QuotationSerializer(quotation).data.get('grand_total', 0)))
+                  """.format(quotation=quotation, grand_total=round(quotation.grand_total, 2)))
 
               if not email:
                   return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
 
               subject = f'Quotation {quotation.quotation_id}'
-              msg = EmailMessage(subject, html_content, to=[email])
-              msg.content_subtype = 'html'
-              msg.send()
+              queue_email(subject, html_content, [email], html=True)
               return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
           except ObjectDoesNotExist:
               return Response({'error': 'Quotation not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -308,22 +323,42 @@ from rest_framework import status, permissions
 from .models import SalesOrder, SalesOrderItem, SalesOrderComment, SalesOrderHistory, DeliveryNote, DeliveryNoteItem, DeliveryNoteCustomerAcknowledgement, DeliveryNoteAttachment, DeliveryNoteRemark, Invoice, InvoiceItem, InvoiceAttachment, InvoiceRemark, OrderSummary
 from .serializers import SalesOrderSerializer, SalesOrderCreateSerializer, SalesOrderCommentSerializer, SalesOrderHistorySerializer, DeliveryNoteSerializer, DeliveryNoteItemSerializer, DeliveryNoteCustomerAcknowledgementSerializer, DeliveryNoteAttachmentSerializer, DeliveryNoteRemarkSerializer, InvoiceSerializer, InvoiceItemSerializer, OrderSummarySerializer
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from django.core.mail import EmailMessage
+from core.outbox import queue_email
 from django.template.loader import render_to_string
-import io
 from django.utils import timezone
 
 # Existing SalesOrder views
+class SalesOrderExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    # One row per order line
+    export_columns = [
+        ('Sales Order ID', 'sales_order__sales_order_id'), ('Order Date', 'sales_order__order_date'),
+        ('Customer ID', 'sales_order__customer__customer_id'), ('Customer', 'sales_order__customer__first_name'),
+        ('Status', 'sales_order__status'), ('Currency', 'sales_order__currency'),
+        ('Product ID', 'product__product_id'), ('Product', 'product__name'), ('UOM', 'uom'),
+        ('Quantity', 'quantity'), ('Unit Price', 'unit_price'), ('Discount (%)', 'discount'), ('Total', 'total'),
+    ]
+
+    def get(self, request):
+        items = SalesOrderItem.objects.filter(sales_order__sales_rep=request.user)
+        return export_response(request, items, self.export_columns, 'sales_orders')
+
 class SalesOrderListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    list_filter = IndexedFilter(SalesOrder, {}, orderings=('-created_at', 'created_at'), fixed=('sales_rep',))
+
     def get(self, request):
-        sales_orders = SalesOrder.objects.filter(sales_rep=request.user).order_by('-created_at')
-        serializer = SalesOrderSerializer(sales_orders, many=True)
+        sales_orders, ordering = self.list_filter.apply(SalesOrder.objects.all(), request, sales_rep=request.user)
+        fieldset = SparseFieldset(request, SalesOrderSerializer)
+        sales_orders = fieldset.optimize(sales_orders, ordering)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=ordering)
+            page_obj = paginator.paginate_queryset(sales_orders, request)
+            serializer = fieldset.serializer(page_obj, many=True)
+            return Response({'sales_orders': serializer.data, **paginator.get_meta()})
+        serializer = fieldset.serializer(sales_orders, many=True)
         return Response(serializer.data)
 
     def post(self, request):
@@ -346,7 +381,7 @@ class SalesOrderDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            sales_order = SalesOrder.objects.get(id=pk, sales_rep=request.user)
+            sales_order = optimize_queryset(SalesOrder.objects.all(), SalesOrderSerializer).get(id=pk, sales_rep=request.user)
             serializer = SalesOrderSerializer(sales_order)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -476,18 +511,11 @@ class SalesOrderPDFView(APIView):
     def get(self, request, pk):
         try:
             sales_order = SalesOrder.objects.get(id=pk, sales_rep=request.user)
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = [
-                Paragraph(f"Sales Order ID: {sales_order.sales_order_id}", style={'fontName': 'Helvetica-Bold', 'fontSize': 14}),
-                Paragraph(f"Date: {sales_order.order_date}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-                Paragraph(f"Customer: {sales_order.customer.name}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-            ]
-            doc.build(elements)
-            buffer.seek(0)
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="sales_order_{sales_order.sales_order_id}.pdf"'
-            return response
+            return pdf_response('sales_order', sales_order.pk, f'sales_order_{sales_order.sales_order_id}.pdf', [
+                paragraph(f"Sales Order ID: {sales_order.sales_order_id}", 'Helvetica-Bold', 14),
+                paragraph(f"Date: {sales_order.order_date}"),
+                paragraph(f"Customer: {sales_order.customer or 'N/A'}"),
+            ])
         except ObjectDoesNotExist:
             return Response({'error': 'Sales Order not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -502,9 +530,7 @@ class SalesOrderEmailView(APIView):
                 return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
             subject = f'Sales Order {sales_order.sales_order_id}'
             html_message = render_to_string('sales_order_email_template.html', {'sales_order': sales_order})
-            msg = EmailMessage(subject, html_message, to=[email])
-            msg.content_subtype = 'html'
-            msg.send()
+            queue_email(subject, html_message, [email], html=True)
             return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return Response({'error': 'Sales Order not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -514,7 +540,12 @@ class DeliveryNoteListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        delivery_notes = DeliveryNote.objects.all().order_by('-delivery_date')
+        delivery_notes = optimize_queryset(DeliveryNote.objects.all().order_by('-delivery_date'), DeliveryNoteSerializer)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=('-delivery_date', '-id'))
+            page_obj = paginator.paginate_queryset(delivery_notes, request)
+            serializer = DeliveryNoteSerializer(page_obj, many=True)
+            return Response({'delivery_notes': serializer.data, **paginator.get_meta()})
         serializer = DeliveryNoteSerializer(delivery_notes, many=True)
         return Response(serializer.data)
 
@@ -530,7 +561,7 @@ class DeliveryNoteDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            delivery_note = DeliveryNote.objects.get(id=pk)
+            delivery_note = optimize_queryset(DeliveryNote.objects.all(), DeliveryNoteSerializer).get(id=pk)
             serializer = DeliveryNoteSerializer(delivery_note)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -641,18 +672,11 @@ class DeliveryNotePDFView(APIView):
     def get(self, request, pk):
         try:
             delivery_note = DeliveryNote.objects.get(id=pk)
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = [
-                Paragraph(f"DN ID: {delivery_note.DN_ID}", style={'fontName': 'Helvetica-Bold', 'fontSize': 14}),
-                Paragraph(f"Date: {delivery_note.delivery_date}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-                Paragraph(f"Customer: {delivery_note.customer_name}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-            ]
-            doc.build(elements)
-            buffer.seek(0)
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="delivery_note_{delivery_note.DN_ID}.pdf"'
-            return response
+            return pdf_response('delivery_note', delivery_note.pk, f'delivery_note_{delivery_note.DN_ID}.pdf', [
+                paragraph(f"DN ID: {delivery_note.DN_ID}", 'Helvetica-Bold', 14),
+                paragraph(f"Date: {delivery_note.delivery_date}"),
+                paragraph(f"Customer: {delivery_note.customer_name}"),
+            ])
         except ObjectDoesNotExist:
             return Response({'error': 'Delivery Note not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -667,21 +691,43 @@ class DeliveryNoteEmailView(APIView):
                 return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
             subject = f'Delivery Note {delivery_note.DN_ID}'
             html_message = render_to_string('delivery_note_email_template.html', {'delivery_note': delivery_note})
-            msg = EmailMessage(subject, html_message, to=[email])
-            msg.content_subtype = 'html'
-            msg.send()
+            queue_email(subject, html_message, [email], html=True)
             return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return Response({'error': 'Delivery Note not found'}, status=status.HTTP_404_NOT_FOUND)
 
 # New Invoice views
+class InvoiceExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    # One row per invoice line
+    export_columns = [
+        ('Invoice ID', 'invoice__INVOICE_ID'), ('Invoice Date', 'invoice__invoice_date'),
+        ('Due Date', 'invoice__due_date'), ('Customer ID', 'invoice__customer__customer_id'),
+        ('Customer', 'invoice__customer__first_name'), ('Invoice Status', 'invoice__invoice_status'),
+        ('Payment Status', 'invoice__payment_status'), ('Currency', 'invoice__currency'),
+        ('Product ID', 'product__product_id'), ('Product', 'product__name'), ('UOM', 'uom'),
+        ('Quantity', 'quantity'), ('Returned Qty', 'returned_qty'), ('Unit Price', 'unit_price'),
+        ('Tax (%)', 'tax'), ('Discount (%)', 'discount'), ('Total', 'total'),
+        ('Invoice Total', 'invoice__invoice_total'),
+    ]
+
+    def get(self, request):
+        return export_response(request, InvoiceItem.objects.all(), self.export_columns, 'invoices')
+
 class InvoiceListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        invoices = Invoice.objects.all().order_by('-invoice_date')
-        serializer = InvoiceSerializer(invoices, many=True)
-        return Response(serializer.data)
+        # Read-only projection: same JSON as InvoiceSerializer without model instances
+        projection = SparseFieldset(request, InvoiceSerializer).projection()
+        # The cursor reads the ordering columns, which ?fields= may leave out
+        invoices = projection.values(Invoice.objects.all().order_by('-invoice_date'), 'invoice_date', 'id')
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=('-invoice_date', '-id'))
+            page_obj = paginator.paginate_queryset(invoices, request)
+            return Response({'invoices': projection.render(page_obj), **paginator.get_meta()})
+        return Response(projection.render(invoices))
 
     def post(self, request):
         serializer = InvoiceSerializer(data=request.data)
@@ -695,7 +741,7 @@ class InvoiceDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            invoice = Invoice.objects.get(id=pk)
+            invoice = optimize_queryset(Invoice.objects.all(), InvoiceSerializer).get(id=pk)
             serializer = InvoiceSerializer(invoice)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -751,18 +797,11 @@ class InvoicePDFView(APIView):
     def get(self, request, pk):
         try:
             invoice = Invoice.objects.get(id=pk)
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = [
-                Paragraph(f"Invoice ID: {invoice.INVOICE_ID}", style={'fontName': 'Helvetica-Bold', 'fontSize': 14}),
-                Paragraph(f"Date: {invoice.invoice_date}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-                Paragraph(f"Customer: {invoice.customer.name}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-            ]
-            doc.build(elements)
-            buffer.seek(0)
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="invoice_{invoice.INVOICE_ID}.pdf"'
-            return response
+            return pdf_response('invoice', invoice.pk, f'invoice_{invoice.INVOICE_ID}.pdf', [
+                paragraph(f"Invoice ID: {invoice.INVOICE_ID}", 'Helvetica-Bold', 14),
+                paragraph(f"Date: {invoice.invoice_date}"),
+                paragraph(f"Customer: {invoice.customer or 'N/A'}"),
+            ])
         except ObjectDoesNotExist:
             return Response({'error': 'Invoice not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -777,9 +816,7 @@ class InvoiceEmailView(APIView):
                 return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
             subject = f'Invoice {invoice.INVOICE_ID}'
             html_message = render_to_string('invoice_email_template.html', {'invoice': invoice})
-            msg = EmailMessage(subject, html_message, to=[email])
-            msg.content_subtype = 'html'
-            msg.send()
+            queue_email(subject, html_message, [email], html=True)
             return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return Response({'error': 'Invoice not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -790,34 +827,31 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from django.core.mail import EmailMessage
+from core.outbox import queue_email
 from django.template.loader import render_to_string
-import io
 from .models import InvoiceReturn, InvoiceReturnItem, InvoiceReturnAttachment, InvoiceReturnRemark, InvoiceReturnSummary, InvoiceReturnHistory, InvoiceReturnComment
 from .serializers import InvoiceReturnSerializer, InvoiceReturnItemSerializer, InvoiceReturnAttachmentSerializer, InvoiceReturnRemarkSerializer, InvoiceReturnSummarySerializer, InvoiceReturnHistorySerializer, InvoiceReturnCommentSerializer
 
 class InvoiceReturnListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    list_filter = IndexedFilter(InvoiceReturn, {
+        'status': ('status', 'exact'),
+        'customer': ('customer', 'in', lambda value: matching_ids('customer', value)),
+        'date_from': ('invoice_return_date', 'gte', date_param),
+        'date_to': ('invoice_return_date', 'lte', date_param),
+    }, orderings=('-invoice_return_date', 'invoice_return_date'))
+
     def get(self, request):
-        invoice_returns = InvoiceReturn.objects.all().order_by('-invoice_return_date')
-        status_filter = request.query_params.get('status', 'All')
-        customer_filter = request.query_params.get('customer', 'All')
-        date_from = request.query_params.get('date_from')
-        date_to = request.query_params.get('date_to')
-        if status_filter != 'All':
-            invoice_returns = invoice_returns.filter(status=status_filter)
-        if customer_filter != 'All':
-            invoice_returns = invoice_returns.filter(customer__name__icontains=customer_filter)
-        if date_from:
-            invoice_returns = invoice_returns.filter(invoice_return_date__gte=date_from)
-        if date_to:
-            invoice_returns = invoice_returns.filter(invoice_return_date__lte=date_to)
-        serializer = InvoiceReturnSerializer(invoice_returns, many=True)
+        invoice_returns, ordering = self.list_filter.apply(InvoiceReturn.objects.all(), request)
+        fieldset = SparseFieldset(request, InvoiceReturnSerializer)
+        invoice_returns = fieldset.optimize(invoice_returns, ordering)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=ordering)
+            page_obj = paginator.paginate_queryset(invoice_returns, request)
+            serializer = fieldset.serializer(page_obj, many=True)
+            return Response({'invoice_returns': serializer.data, **paginator.get_meta()})
+        serializer = fieldset.serializer(invoice_returns, many=True)
         return Response(serializer.data)
 
     def post(self, request):
@@ -832,7 +866,7 @@ class InvoiceReturnDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            invoice_return = InvoiceReturn.objects.get(id=pk)
+            invoice_return = optimize_queryset(InvoiceReturn.objects.all(), InvoiceReturnSerializer).get(id=pk)
             serializer = InvoiceReturnSerializer(invoice_return)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -899,18 +933,11 @@ class InvoiceReturnPDFView(APIView):
     def get(self, request, pk):
         try:
             invoice_return = InvoiceReturn.objects.get(id=pk)
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = [
-                Paragraph(f"Invoice Return ID: {invoice_return.INVOICE_RETURN_ID}", style={'fontName': 'Helvetica-Bold', 'fontSize': 14}),
-                Paragraph(f"Date: {invoice_return.invoice_return_date}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-                Paragraph(f"Customer: {invoice_return.customer.name}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-            ]
-            doc.build(elements)
-            buffer.seek(0)
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="invoice_return_{invoice_return.INVOICE_RETURN_ID}.pdf"'
-            return response
+            return pdf_response('invoice_return', invoice_return.pk, f'invoice_return_{invoice_return.INVOICE_RETURN_ID}.pdf', [
+                paragraph(f"Invoice Return ID: {invoice_return.INVOICE_RETURN_ID}", 'Helvetica-Bold', 14),
+                paragraph(f"Date: {invoice_return.invoice_return_date}"),
+                paragraph(f"Customer: {invoice_return.customer or 'N/A'}"),
+            ])
         except ObjectDoesNotExist:
             return Response({'error': 'Invoice Return not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -925,9 +952,7 @@ class InvoiceReturnEmailView(APIView):
                 return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
             subject = f'Invoice Return {invoice_return.INVOICE_RETURN_ID}'
             html_message = render_to_string('invoice_return_email.html', {'invoice_return': invoice_return})
-            msg = EmailMessage(subject, html_message, to=[email])
-            msg.content_subtype = 'html'
-            msg.send()
+            queue_email(subject, html_message, [email], html=True)
             return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return Response({'error': 'Invoice Return not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -938,33 +963,29 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from django.core.mail import EmailMessage
+from core.outbox import queue_email
 from django.template.loader import render_to_string
-import io
 from .models import DeliveryNoteReturn, DeliveryNoteReturnItem, DeliveryNoteReturnAttachment, DeliveryNoteReturnRemark, DeliveryNoteReturnHistory, DeliveryNoteReturnComment
 from .serializers import DeliveryNoteReturnSerializer, DeliveryNoteReturnItemSerializer, DeliveryNoteReturnAttachmentSerializer, DeliveryNoteReturnRemarkSerializer, DeliveryNoteReturnHistorySerializer, DeliveryNoteReturnCommentSerializer
 
 class DeliveryNoteReturnListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    list_filter = IndexedFilter(DeliveryNoteReturn, {
+        'status': ('status', 'exact'),
+        'customer': ('customer', 'in', lambda value: matching_ids('customer', value)),
+        'date_from': ('dnr_date', 'gte', date_param),
+        'date_to': ('dnr_date', 'lte', date_param),
+    }, orderings=('-dnr_date', 'dnr_date'))
+
     def get(self, request):
-        returns = DeliveryNoteReturn.objects.all().order_by('-dnr_date')
-        status_filter = request.query_params.get('status', 'All')
-        customer_filter = request.query_params.get('customer', 'All')
-        date_from = request.query_params.get('date_from')
-        date_to = request.query_params.get('date_to')
-        if status_filter != 'All':
-            returns = returns.filter(status=status_filter)
-        if customer_filter != 'All':
-            returns = returns.filter(customer__name__icontains=customer_filter)
-        if date_from:
-            returns = returns.filter(dnr_date__gte=date_from)
-        if date_to:
-            returns = returns.filter(dnr_date__lte=date_to)
+        returns, ordering = self.list_filter.apply(DeliveryNoteReturn.objects.all(), request)
+        returns = optimize_queryset(returns, DeliveryNoteReturnSerializer)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=ordering)
+            page_obj = paginator.paginate_queryset(returns, request)
+            serializer = DeliveryNoteReturnSerializer(page_obj, many=True)
+            return Response({'delivery_note_returns': serializer.data, **paginator.get_meta()})
         serializer = DeliveryNoteReturnSerializer(returns, many=True)
         return Response(serializer.data)
 
@@ -980,7 +1001,7 @@ class DeliveryNoteReturnDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            return_obj = DeliveryNoteReturn.objects.get(id=pk)
+            return_obj = optimize_queryset(DeliveryNoteReturn.objects.all(), DeliveryNoteReturnSerializer).get(id=pk)
             serializer = DeliveryNoteReturnSerializer(return_obj)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -1045,18 +1066,11 @@ class DeliveryNoteReturnPDFView(APIView):
     def get(self, request, pk):
         try:
             return_obj = DeliveryNoteReturn.objects.get(id=pk)
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = [
-                Paragraph(f"DNR ID: {return_obj.DNR_ID}", style={'fontName': 'Helvetica-Bold', 'fontSize': 14}),
-                Paragraph(f"Date: {return_obj.dnr_date}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-                Paragraph(f"Customer: {return_obj.customer.name}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-            ]
-            doc.build(elements)
-            buffer.seek(0)
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="delivery_note_return_{return_obj.DNR_ID}.pdf"'
-            return response
+            return pdf_response('delivery_note_return', return_obj.pk, f'delivery_note_return_{return_obj.DNR_ID}.pdf', [
+                paragraph(f"DNR ID: {return_obj.DNR_ID}", 'Helvetica-Bold', 14),
+                paragraph(f"Date: {return_obj.dnr_date}"),
+                paragraph(f"Customer: {return_obj.customer or 'N/A'}"),
+            ])
         except ObjectDoesNotExist:
             return Response({'error': 'Delivery Note Return not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -1071,9 +1085,7 @@ class DeliveryNoteReturnEmailView(APIView):
                 return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
             subject = f'Delivery Note Return {return_obj.DNR_ID}'
             html_message = render_to_string('delivery_note_return_email.html', {'delivery_note_return': return_obj})
-            msg = EmailMessage(subject, html_message, to=[email])
-            msg.content_subtype = 'html'
-            msg.send()
+            queue_email(subject, html_message, [email], html=True)
             return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return Response({'error': 'Delivery Note Return not found'}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
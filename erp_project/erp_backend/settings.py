@@ -56,6 +56,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.metrics.PerformanceMiddleware',  # first, so it times the whole request
+    'core.query_budget.RepeatedQueryMiddleware',
     'corsheaders.middleware.CorsMiddleware', #add from prakash raj - frontend integration
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -116,6 +118,11 @@ DATABASES = {
         },
     }
 }
+# Second connection to the same database for document numbers reserved
+# inside a transaction (core.sequences), so they commit on their own.
+# Set DOCUMENT_SEQUENCE_DATABASE = None on SQLite, which allows one writer.
+DATABASES['sequences'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+DOCUMENT_SEQUENCE_DATABASE = 'sequences'
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -161,7 +168,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'core.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -175,12 +182,31 @@ AUTH_USER_MODEL = 'auth.User'  # Default User model
 
 
 # settings.py
+# File-based so every worker process shares one cache (master data, auth
+# tokens, role permissions). Point CACHE_LOCATION at a shared directory.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'core.metrics.MeteredFileBasedCache',  # FileBasedCache counting hits/misses
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache')),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
     }
 }
 
+# Rendered document PDFs are kept here and reused until the document changes
+PDF_CACHE_LOCATION = config('PDF_CACHE_LOCATION', default=str(BASE_DIR / 'pdf_cache'))
+PDF_RENDER_WORKERS = config('PDF_RENDER_WORKERS', default=2, cast=int)
+
+# /api/metrics/ (Prometheus text format) is open to staff users, or to
+# scrapers sending "Authorization: Bearer <METRICS_TOKEN>" when it is set
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# N+1 detection (core.query_budget): 'warn' logs requests running the same
+# SELECT shape REPEATED_QUERY_THRESHOLD+ times, 'raise' fails them
+REPEATED_QUERY_CHECK = config('REPEATED_QUERY_CHECK', default='warn' if DEBUG else '')
+REPEATED_QUERY_THRESHOLD = config('REPEATED_QUERY_THRESHOLD', default=3, cast=int)
+
 
 
 
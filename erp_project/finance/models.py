@@ -1,19 +1,21 @@
+from decimal import Decimal
+
 from django.db import models
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 from core.models import Branch, Candidate, Department,Supplier
 from crm.models import Invoice, Customer, Product
 from purchase.models import PurchaseOrder
+from core.document_totals import sum_lines
+from core.sequences import next_document_number
 
 User = get_user_model()
 
 def generate_credit_note_id():
-    last_cn = CreditNote.objects.order_by('-id').first()
-    return f'CRN-{str(last_cn.id + 1).zfill(4) if last_cn else "0001"}' if last_cn else "CRN-0001"
+    return next_document_number('credit_note')
 
 def generate_debit_note_id():
-    last_dn = DebitNote.objects.order_by('-id').first()
-    return f'DBN-{str(last_dn.id + 1).zfill(4) if last_dn else "0001"}' if last_dn else "DBN-0001"
+    return next_document_number('debit_note')
 
 class CreditNoteAttachment(models.Model):
     credit_note = models.ForeignKey('CreditNote', on_delete=models.CASCADE, related_name='attachments')
@@ -79,8 +81,8 @@ class CreditNotePaymentRefund(models.Model):
         credit_note = self.credit_note
         self.balance_due_by_customer = credit_note.invoice_total - self.amount_paid_by_customer
         if credit_note.invoice_reference and credit_note.invoice_reference.summary:
-            self.invoice_return_amount = sum(item.total for item in credit_note.items.all())  # Simplified
-            self.balance_to_refund = self.invoice_return_amount - self.refund_paid
+            self.invoice_return_amount = sum_lines(credit_note.items.all(), total='total')['total']  # Simplified
+            self.balance_to_refund = self.invoice_return_amount - Decimal(str(self.refund_paid))
             if self.refund_mode in ['Refund', 'Refund & Adjust'] and self.invoice_return_amount > 0:
                 self.editable = True
             else:
@@ -150,8 +152,8 @@ class DebitNotePaymentRecover(models.Model):
         debit_note = self.debit_note
         self.balance_due_to_vendor = debit_note.purchase_total - self.amount_paid_to_vendor
         if debit_note.po_reference:
-            self.purchase_return_amount = sum(item.total for item in debit_note.items.all())  # Simplified
-            self.balance_to_recover = self.purchase_return_amount - self.refund_received
+            self.purchase_return_amount = sum_lines(debit_note.items.all(), total='total')['total']  # Simplified
+            self.balance_to_recover = self.purchase_return_amount - Decimal(str(self.refund_received))
             if self.refund_mode in ['Refund', 'Refund & Adjust'] and self.purchase_return_amount > 0:
                 self.editable = True
             else:
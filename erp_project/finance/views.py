@@ -4,20 +4,23 @@ from rest_framework import status, permissions
 from .models import CreditNote, CreditNoteItem, CreditNoteAttachment, CreditNoteRemark, CreditNotePaymentRefund, DebitNote, DebitNoteItem, DebitNoteAttachment, DebitNoteRemark, DebitNotePaymentRecover
 from .serializers import CreditNoteSerializer, CreditNoteItemSerializer, CreditNoteAttachmentSerializer, CreditNoteRemarkSerializer, CreditNotePaymentRefundSerializer, DebitNoteSerializer, DebitNoteItemSerializer, DebitNoteAttachmentSerializer, DebitNoteRemarkSerializer, DebitNotePaymentRecoverSerializer
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-from django.core.mail import EmailMessage
+from core.pagination import ListPagination
+from core.query_planner import optimize_queryset
+from core.outbox import queue_email
+from core.pdf import paragraph, pdf_response
 from django.template.loader import render_to_string
-import io
 from django.utils import timezone
 
 class CreditNoteListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        credit_notes = CreditNote.objects.all().order_by('-credit_note_date')
+        credit_notes = optimize_queryset(CreditNote.objects.all().order_by('-credit_note_date'), CreditNoteSerializer)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=('-credit_note_date', '-id'))
+            page_obj = paginator.paginate_queryset(credit_notes, request)
+            serializer = CreditNoteSerializer(page_obj, many=True)
+            return Response({'credit_notes': serializer.data, **paginator.get_meta()})
         serializer = CreditNoteSerializer(credit_notes, many=True)
         return Response(serializer.data)
 
@@ -37,7 +40,7 @@ class CreditNoteDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            credit_note = CreditNote.objects.get(id=pk)
+            credit_note = optimize_queryset(CreditNote.objects.all(), CreditNoteSerializer).get(id=pk)
             serializer = CreditNoteSerializer(credit_note)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -91,18 +94,11 @@ class CreditNotePDFView(APIView):
     def get(self, request, pk):
         try:
             credit_note = CreditNote.objects.get(id=pk)
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = [
-                Paragraph(f"Credit Note ID: {credit_note.CREDIT_NOTE_ID}", style={'fontName': 'Helvetica-Bold', 'fontSize': 14}),
-                Paragraph(f"Date: {credit_note.credit_note_date}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-                Paragraph(f"Customer: {credit_note.customer.name}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-            ]
-            doc.build(elements)
-            buffer.seek(0)
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="credit_note_{credit_note.CREDIT_NOTE_ID}.pdf"'
-            return response
+            return pdf_response('credit_note', credit_note.pk, f'credit_note_{credit_note.CREDIT_NOTE_ID}.pdf', [
+                paragraph(f"Credit Note ID: {credit_note.CREDIT_NOTE_ID}", 'Helvetica-Bold', 14),
+                paragraph(f"Date: {credit_note.credit_note_date}"),
+                paragraph(f"Customer: {credit_note.customer or 'N/A'}"),
+            ])
         except ObjectDoesNotExist:
             return Response({'error': 'Credit Note not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -117,9 +113,7 @@ class CreditNoteEmailView(APIView):
                 return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
             subject = f'Credit Note {credit_note.CREDIT_NOTE_ID}'
             html_message = render_to_string('credit_note_email_template.html', {'credit_note': credit_note})
-            msg = EmailMessage(subject, html_message, to=[email])
-            msg.content_subtype = 'html'
-            msg.send()
+            queue_email(subject, html_message, [email], html=True)
             return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return Response({'error': 'Credit Note not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -128,7 +122,12 @@ class DebitNoteListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        debit_notes = DebitNote.objects.all().order_by('-debit_note_date')
+        debit_notes = optimize_queryset(DebitNote.objects.all().order_by('-debit_note_date'), DebitNoteSerializer)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=('-debit_note_date', '-id'))
+            page_obj = paginator.paginate_queryset(debit_notes, request)
+            serializer = DebitNoteSerializer(page_obj, many=True)
+            return Response({'debit_notes': serializer.data, **paginator.get_meta()})
         serializer = DebitNoteSerializer(debit_notes, many=True)
         return Response(serializer.data)
 
@@ -147,7 +146,7 @@ class DebitNoteDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            debit_note = DebitNote.objects.get(id=pk)
+            debit_note = optimize_queryset(DebitNote.objects.all(), DebitNoteSerializer).get(id=pk)
             serializer = DebitNoteSerializer(debit_note)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -201,18 +200,11 @@ class DebitNotePDFView(APIView):
     def get(self, request, pk):
         try:
             debit_note = DebitNote.objects.get(id=pk)
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
-            elements = [
-                Paragraph(f"Debit Note ID: {debit_note.DEBIT_NOTE_ID}", style={'fontName': 'Helvetica-Bold', 'fontSize': 14}),
-                Paragraph(f"Date: {debit_note.debit_note_date}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-                Paragraph(f"Supplier: {debit_note.supplier.name}", style={'fontName': 'Helvetica', 'fontSize': 12}),
-            ]
-            doc.build(elements)
-            buffer.seek(0)
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="debit_note_{debit_note.DEBIT_NOTE_ID}.pdf"'
-            return response
+            return pdf_response('debit_note', debit_note.pk, f'debit_note_{debit_note.DEBIT_NOTE_ID}.pdf', [
+                paragraph(f"Debit Note ID: {debit_note.DEBIT_NOTE_ID}", 'Helvetica-Bold', 14),
+                paragraph(f"Date: {debit_note.debit_note_date}"),
+                paragraph(f"Supplier: {debit_note.supplier.name if debit_note.supplier else 'N/A'}"),
+            ])
         except ObjectDoesNotExist:
             return Response({'error': 'Debit Note not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -227,9 +219,7 @@ class DebitNoteEmailView(APIView):
                 return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
             subject = f'Debit Note {debit_note.DEBIT_NOTE_ID}'
             html_message = render_to_string('debit_note_email_template.html', {'debit_note': debit_note})
-            msg = EmailMessage(subject, html_message, to=[email])
-            msg.content_subtype = 'html'
-            msg.send()
+            queue_email(subject, html_message, [email], html=True)
             return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return Response({'error': 'Debit Note not found'}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
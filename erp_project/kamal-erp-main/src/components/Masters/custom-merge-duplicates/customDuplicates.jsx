@@ -31,6 +31,9 @@ export default function CustomDuplicates({ setShowCustomDuplicates, customMaster
           },
         });
 
+        if (response.status === 202) {
+          toast.info("Duplicates are still being computed. Please check again shortly.");
+        }
         const duplicateGroups = response.data || [];
         setDuplicates(duplicateGroups); // Expected format: [{ primary: {...}, duplicates: [{...}, ...]}, ...]
       } catch (error) {
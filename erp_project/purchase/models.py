@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import Sum
 from django.utils import timezone
 from core.models import Supplier, Product
+from core.sequences import next_document_number
 
 def get_default_po_date():
     return timezone.now().date()
@@ -30,11 +32,12 @@ class PurchaseOrder(models.Model):
     total_order_value = models.DecimalField(max_digits=10, decimal_places=2)
     upload_file_path = models.FileField(upload_to='upload/', blank=True, null=True)
 
+    class Meta:
+        indexes = [models.Index(fields=['PO_date', 'id'])]
+
     def save(self, *args, **kwargs):
         if not self.PO_ID:
-            last_po = PurchaseOrder.objects.order_by('-id').first()
-            new_id = f'PO-{timezone.now().strftime("%Y%m%d")}-{str(last_po.id + 1).zfill(3) if last_po else "001"}'
-            self.PO_ID = new_id
+            self.PO_ID = next_document_number('purchase_order')
         super().save(*args, **kwargs)
 
 class PurchaseOrderItem(models.Model):
@@ -100,9 +103,7 @@ class StockReceipt(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.GRN_ID:
-            last_grn = StockReceipt.objects.order_by('-id').first()
-            new_id = f'GRN-{timezone.now().strftime("%Y%m%d")}-{str(last_grn.id + 1).zfill(4) if last_grn else "0001"}'
-            self.GRN_ID = new_id
+            self.GRN_ID = next_document_number('stock_receipt')
         super().save(*args, **kwargs)
 
 class StockReceiptItem(models.Model):
@@ -187,11 +188,10 @@ class StockReturn(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.SRN_ID:
-            last_srn = StockReturn.objects.order_by('-id').first()
-            new_id = f'SRN-{timezone.now().strftime("%Y%m%d")}-{str(last_srn.id + 1).zfill(4) if last_srn else "0001"}'
-            self.SRN_ID = new_id
-        if self.pk and self.items.exists():
-            self.return_subtotal = sum(item.total for item in self.items.all())
+            self.SRN_ID = next_document_number('stock_return')
+        return_subtotal = self.items.aggregate(total=Sum('total'))['total'] if self.pk else None
+        if return_subtotal is not None:  # has items
+            self.return_subtotal = return_subtotal
             self.global_discount_amount = self.return_subtotal * (self.global_discount / 100)
             self.amount_to_recover = self.return_subtotal - self.global_discount_amount + self.rounding_adjustment
         super().save(*args, **kwargs)
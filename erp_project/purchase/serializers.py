@@ -221,6 +221,7 @@ class StockReturnItemSerializer(serializers.ModelSerializer):
             'total': {'read_only': True},
             'stock_return': {'required': False},
         }
+        prefetch_related_fields = ['stock_receipt_item__serial_numbers']
 
     def get_available_serials(self, obj):
         if obj.stock_receipt_item and obj.stock_receipt_item.stock_dim == 'Serial':
@@ -1,3 +1,33 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
 
-# Create your tests here.
+from core.models import Product
+from core.tests import ROWS, QueryBudgetTestCase
+
+from .models import PurchaseOrder, PurchaseOrderComment, PurchaseOrderHistory, PurchaseOrderItem
+
+
+class PurchaseQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        today = datetime.date.today()
+        product = Product.objects.create(name='Product', unit_price=Decimal('10.00'), status='Active')
+        for i in range(ROWS):
+            purchase_order = PurchaseOrder.objects.create(
+                delivery_date=today, subtotal=Decimal('0'), tax_summary=Decimal('0'),
+                shipping_charges=Decimal('0'), total_order_value=Decimal('0'),
+            )
+            for j in range(2):
+                PurchaseOrderItem.objects.create(
+                    purchase_order=purchase_order, product=product, qty_ordered=1, insufficient_stock=0,
+                    unit_price=Decimal('10.00'), tax=Decimal('18.00'), discount=Decimal('0'),
+                )
+                PurchaseOrderHistory.objects.create(purchase_order=purchase_order, action='Created', performed_by='budget')
+                PurchaseOrderComment.objects.create(purchase_order=purchase_order, comment='Comment', created_by='budget')
+        self.purchase_order = purchase_order
+
+    def test_purchase_order_list(self):
+        self.assertQueryBudget(4, '/api/purchase/purchase-orders/')
+
+    def test_purchase_order_detail(self):
+        self.assertQueryBudget(4, f'/api/purchase/purchase-orders/{self.purchase_order.pk}/')
@@ -4,6 +4,7 @@ from .views import PurchaseOrderListView, PurchaseOrderDetailView, PurchaseOrder
 
 urlpatterns = [
     path('purchase-orders/', PurchaseOrderListView.as_view(), name='purchase-order-list'),
+    path('purchase-orders/export/', views.PurchaseOrderExportView.as_view(), name='purchase-order-export'),
     path('purchase-orders/<int:pk>/', PurchaseOrderDetailView.as_view(), name='purchase-order-detail'),
     path('purchase-orders/<int:pk>/items/', PurchaseOrderItemView.as_view(), name='purchase-order-items'),
     path('purchase-orders/<int:pk>/history/', PurchaseOrderHistoryView.as_view(), name='purchase-order-history'),
@@ -13,6 +14,7 @@ urlpatterns = [
 
     # Stock Receipt URLs
     path('stock-receipts/', views.StockReceiptListView.as_view(), name='stock-receipt-list'),
+    path('stock-receipts/export/', views.StockReceiptExportView.as_view(), name='stock-receipt-export'),
     path('stock-receipts/<int:pk>/', views.StockReceiptDetailView.as_view(), name='stock-receipt-detail'),
     path('stock-receipts/<int:pk>/items/', views.StockReceiptItemView.as_view(), name='stock-receipt-items'),
     path('stock-receipts/<int:pk>/items/<int:item_pk>/serial-numbers/', views.SerialNumberListView.as_view(), name='serial-number-list'),
@@ -1,22 +1,50 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
-from .models import PurchaseOrder,  PurchaseOrderHistory
+from .models import PurchaseOrder,  PurchaseOrderHistory, PurchaseOrderItem
 from .serializers import PurchaseOrderSerializer, PurchaseOrderItemSerializer, PurchaseOrderHistorySerializer, PurchaseOrderCommentSerializer
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
-from reportlab.lib import colors
+from core.pagination import ListPagination
+from core.query_planner import optimize_queryset
+from core.list_filters import IndexedFilter, date_param
 # from reportlab.lib.pagesizes = letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from django.core.mail import EmailMessage
+from core.outbox import queue_email
+from core.pdf import pdf_response, table
+from core.export import export_response
 from django.template.loader import render_to_string
-import io
+
+class PurchaseOrderExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    # One row per order line
+    export_columns = [
+        ('PO ID', 'purchase_order__PO_ID'), ('PO Date', 'purchase_order__PO_date'),
+        ('Delivery Date', 'purchase_order__delivery_date'), ('Status', 'purchase_order__status'),
+        ('Supplier', 'purchase_order__supplier_name'), ('Currency', 'purchase_order__currency'),
+        ('Product ID', 'product__product_id'), ('Product', 'product__name'), ('Qty Ordered', 'qty_ordered'),
+        ('Unit Price', 'unit_price'), ('Tax (%)', 'tax'), ('Discount (%)', 'discount'), ('Total', 'total'),
+        ('Order Total', 'purchase_order__total_order_value'),
+    ]
+
+    def get(self, request):
+        return export_response(request, PurchaseOrderItem.objects.all(), self.export_columns, 'purchase_orders')
 
 class PurchaseOrderListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
+    list_filter = IndexedFilter(PurchaseOrder, {
+        'date_from': ('PO_date', 'gte', date_param),
+        'date_to': ('PO_date', 'lte', date_param),
+    }, orderings=('-PO_date', 'PO_date'))
+
     def get(self, request):
-        purchase_orders = PurchaseOrder.objects.all().order_by('-PO_date')
+        purchase_orders, ordering = self.list_filter.apply(PurchaseOrder.objects.all(), request)
+        purchase_orders = optimize_queryset(purchase_orders, PurchaseOrderSerializer)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=ordering)
+            page_obj = paginator.paginate_queryset(purchase_orders, request)
+            serializer = PurchaseOrderSerializer(page_obj, many=True)
+            return Response({'purchase_orders': serializer.data, **paginator.get_meta()})
         serializer = PurchaseOrderSerializer(purchase_orders, many=True)
         return Response(serializer.data)
 
@@ -32,7 +60,7 @@ class PurchaseOrderDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            purchase_order = PurchaseOrder.objects.get(id=pk)
+            purchase_order = optimize_queryset(PurchaseOrder.objects.all(), PurchaseOrderSerializer).get(id=pk)
             serializer = PurchaseOrderSerializer(purchase_order)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -177,9 +205,7 @@ class PurchaseOrderEmailView(APIView):
 
             subject = f'Purchase Order {purchase_order.PO_ID}'
             html_message = render_to_string('purchase_order_email_template.html', {'purchase_order': purchase_order})
-            msg = EmailMessage(subject, html_message, to=[email])
-            msg.content_subtype = 'html'
-            msg.send()
+            queue_email(subject, html_message, [email], html=True)
             return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return Response({'error': 'Purchase Order not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -193,19 +219,35 @@ from rest_framework import status, permissions
 from .models import StockReceipt, StockReceiptItem, SerialNumber, BatchNumber, BatchSerialNumber, StockReceiptRemark, StockReceiptAttachment
 from .serializers import StockReceiptSerializer, StockReceiptItemSerializer, SerialNumberSerializer, BatchNumberSerializer, StockReceiptAttachmentSerializer, StockReceiptRemarkSerializer
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from django.core.mail import EmailMessage
+from core.outbox import queue_email
 from django.template.loader import render_to_string
-import io
+
+class StockReceiptExportView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    # One row per received line
+    export_columns = [
+        ('GRN ID', 'stock_receipt__GRN_ID'), ('Received Date', 'stock_receipt__received_date'),
+        ('PO ID', 'stock_receipt__PO_reference__PO_ID'), ('Supplier', 'stock_receipt__supplier__name'),
+        ('Status', 'stock_receipt__status'), ('Product ID', 'product__product_id'), ('Product', 'product__name'),
+        ('UOM', 'uom'), ('Warehouse', 'warehouse__name'), ('Qty Ordered', 'qty_ordered'),
+        ('Qty Received', 'qty_received'), ('Accepted Qty', 'accepted_qty'), ('Rejected Qty', 'rejected_qty'),
+        ('Unit Price', 'unit_price'), ('Tax (%)', 'tax'), ('Discount (%)', 'discount'), ('Total', 'total'),
+    ]
+
+    def get(self, request):
+        return export_response(request, StockReceiptItem.objects.all(), self.export_columns, 'stock_receipts')
 
 class StockReceiptListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        stock_receipts = StockReceipt.objects.all().order_by('-received_date')
+        stock_receipts = optimize_queryset(StockReceipt.objects.all().order_by('-received_date'), StockReceiptSerializer)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=('-received_date', '-id'))
+            page_obj = paginator.paginate_queryset(stock_receipts, request)
+            serializer = StockReceiptSerializer(page_obj, many=True)
+            return Response({'stock_receipts': serializer.data, **paginator.get_meta()})
         serializer = StockReceiptSerializer(stock_receipts, many=True)
         return Response(serializer.data)
 
@@ -221,7 +263,7 @@ class StockReceiptDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            stock_receipt = StockReceipt.objects.get(id=pk)
+            stock_receipt = optimize_queryset(StockReceipt.objects.all(), StockReceiptSerializer).get(id=pk)
             serializer = StockReceiptSerializer(stock_receipt)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -312,8 +354,6 @@ class StockReceiptPDFView(APIView):
     def get(self, request, pk):
         try:
             stock_receipt = StockReceipt.objects.get(id=pk)
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
             elements = []
 
             header_data = [
@@ -322,8 +362,7 @@ class StockReceiptPDFView(APIView):
                 ['Supplier', stock_receipt.supplier.name if stock_receipt.supplier else 'N/A'],
                 ['Total Items', len(stock_receipt.items.all())],
             ]
-            header_table = Table(header_data)
-            header_table.setStyle(TableStyle([
+            elements.append(table(header_data, [
                 ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -335,7 +374,6 @@ class StockReceiptPDFView(APIView):
                 ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
                 ('FONTSIZE', (0, 1), (-1, -1), 12),
             ]))
-            elements.append(header_table)
 
             items_data = [['Product', 'UOM', 'Qty Ordered', 'Qty Received', 'Accepted Qty', 'Unit Price', 'Tax (%)', 'Discount (%)', 'Total', 'Serials', 'Batches']]
             for item in stock_receipt.items.all():
@@ -354,8 +392,7 @@ class StockReceiptPDFView(APIView):
                     serials,
                     batches
                 ])
-            items_table = Table(items_data)
-            items_table.setStyle(TableStyle([
+            elements.append(table(items_data, [
                 ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -368,13 +405,8 @@ class StockReceiptPDFView(APIView):
                 ('FONTSIZE', (0, 1), (-1, -1), 10),
                 ('GRID', (0, 0), (-1, -1), 1, colors.black),
             ]))
-            elements.append(items_table)
 
-            doc.build(elements)
-            buffer.seek(0)
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="stock_receipt_{stock_receipt.GRN_ID}.pdf"'
-            return response
+            return pdf_response('stock_receipt', stock_receipt.pk, f'stock_receipt_{stock_receipt.GRN_ID}.pdf', elements)
         except ObjectDoesNotExist:
             return Response({'error': 'Stock Receipt not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
@@ -392,9 +424,7 @@ class StockReceiptEmailView(APIView):
 
             subject = f'Stock Receipt {stock_receipt.GRN_ID}'
             html_message = render_to_string('stock_receipt_email_template.html', {'stock_receipt': stock_receipt})
-            msg = EmailMessage(subject, html_message, to=[email])
-            msg.content_subtype = 'html'
-            msg.send()
+            queue_email(subject, html_message, [email], html=True)
             return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return Response({'error': 'Stock Receipt not found'}, status=status.HTTP_404_NOT_FOUND)
@@ -409,19 +439,19 @@ from .models import StockReturn, StockReturnItem, SerialNumberReturn, StockRetur
 from .serializers import StockReturnSerializer, StockReturnItemSerializer, SerialNumberReturnSerializer, StockReturnAttachmentSerializer, StockReturnRemarkSerializer
 from .models import StockReceiptItem, SerialNumber
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import HttpResponse
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-from django.core.mail import EmailMessage
+from core.outbox import queue_email
 from django.template.loader import render_to_string
-import io
 
 class StockReturnListView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        stock_returns = StockReturn.objects.all().order_by('-return_date')
+        stock_returns = optimize_queryset(StockReturn.objects.all().order_by('-return_date'), StockReturnSerializer)
+        if ListPagination.is_requested(request):
+            paginator = ListPagination(ordering=('-return_date', '-id'))
+            page_obj = paginator.paginate_queryset(stock_returns, request)
+            serializer = StockReturnSerializer(page_obj, many=True)
+            return Response({'stock_returns': serializer.data, **paginator.get_meta()})
         serializer = StockReturnSerializer(stock_returns, many=True)
         return Response(serializer.data)
 
@@ -437,7 +467,7 @@ class StockReturnDetailView(APIView):
 
     def get(self, request, pk):
         try:
-            stock_return = StockReturn.objects.get(id=pk)
+            stock_return = optimize_queryset(StockReturn.objects.all(), StockReturnSerializer).get(id=pk)
             serializer = StockReturnSerializer(stock_return)
             return Response(serializer.data)
         except ObjectDoesNotExist:
@@ -513,8 +543,6 @@ class StockReturnPDFView(APIView):
     def get(self, request, pk):
         try:
             stock_return = StockReturn.objects.get(id=pk)
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=letter)
             elements = []
 
             header_data = [
@@ -523,8 +551,7 @@ class StockReturnPDFView(APIView):
                 ['Supplier', stock_return.supplier.name if stock_return.supplier else 'N/A'],
                 ['Total Items', len(stock_return.items.all())],
             ]
-            header_table = Table(header_data)
-            header_table.setStyle(TableStyle([
+            elements.append(table(header_data, [
                 ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -536,7 +563,6 @@ class StockReturnPDFView(APIView):
                 ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
                 ('FONTSIZE', (0, 1), (-1, -1), 12),
             ]))
-            elements.append(header_table)
 
             items_data = [['Product', 'UOM', 'Qty Ordered', 'Qty Rejected', 'Qty Returned', 'Unit Price', 'Tax (%)', 'Discount (%)', 'Total', 'Serials']]
             for item in stock_return.items.all():
@@ -553,8 +579,7 @@ class StockReturnPDFView(APIView):
                     f"{item.total:.2f}",
                     serials
                 ])
-            items_table = Table(items_data)
-            items_table.setStyle(TableStyle([
+            elements.append(table(items_data, [
                 ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
                 ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
@@ -567,7 +592,6 @@ class StockReturnPDFView(APIView):
                 ('FONTSIZE', (0, 1), (-1, -1), 10),
                 ('GRID', (0, 0), (-1, -1), 1, colors.black),
             ]))
-            elements.append(items_table)
 
             calc_data = [
                 ['Original Purchased Total', f"₹{stock_return.original_purchased_total:.2f}"],
@@ -577,8 +601,7 @@ class StockReturnPDFView(APIView):
                 ['Rounding Adjustment', f"₹{stock_return.rounding_adjustment:.2f}"],
                 ['Amount to Recover', f"₹{stock_return.amount_to_recover:.2f}"],
             ]
-            calc_table = Table(calc_data)
-            calc_table.setStyle(TableStyle([
+            elements.append(table(calc_data, [
                 ('BACKGROUND', (0, 0), (-1, 0), colors.lightgrey),
                 ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
                 ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
@@ -590,13 +613,8 @@ class StockReturnPDFView(APIView):
                 ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
                 ('FONTSIZE', (0, 1), (-1, -1), 10),
             ]))
-            elements.append(calc_table)
 
-            doc.build(elements)
-            buffer.seek(0)
-            response = HttpResponse(buffer, content_type='application/pdf')
-            response['Content-Disposition'] = f'attachment; filename="stock_return_{stock_return.SRN_ID}.pdf"'
-            return response
+            return pdf_response('stock_return', stock_return.pk, f'stock_return_{stock_return.SRN_ID}.pdf', elements)
         except ObjectDoesNotExist:
             return Response({'error': 'Stock Return not found'}, status=status.HTTP_404_NOT_FOUND)
         except Exception as e:
@@ -614,9 +632,7 @@ class StockReturnEmailView(APIView):
 
             subject = f'Stock Return {stock_return.SRN_ID}'
             html_message = render_to_string('stock_return_email_template.html', {'stock_return': stock_return})
-            msg = EmailMessage(subject, html_message, to=[email])
-            msg.content_subtype = 'html'
-            msg.send()
+            queue_email(subject, html_message, [email], html=True)
             return Response({'message': 'Email sent successfully'}, status=status.HTTP_200_OK)
         except ObjectDoesNotExist:
             return Response({'error': 'Stock Return not found'}, status=status.HTTP_404_NOT_FOUND)